@@ -0,0 +1,246 @@
+"""
+產生器效能基準：以合成的大型行程 (數萬筆行程/美食) 量測建置時間，確認隨資料量線性成長。
+
+    python benchmark.py                       # 只量測 CSV → store (單次串流讀取 + 索引)
+    python benchmark.py --full                # 另外量測完整建置 (含預先渲染與 CSS)
+    python benchmark.py --scales 5000 50000   # 自訂規模 (行程筆數)
+    python benchmark.py --page /tmp/bench     # 產生 1 萬筆合成行程的量測頁面，以瀏覽器開啟 index.html
+    python benchmark.py --profile --report bench.json --budget page=5MB --budget total=10s
+                                              # 各規模另跑一次剖析建置 (各階段耗時、頁面組成)，並檢查效能預算
+"""
+import json
+import argparse
+import contextlib
+import csv
+import io
+import os
+import random
+import tempfile
+import time
+
+import generator
+
+ICONS = ["plane", "car", "utensils", "camera", "bed", "ship", "fish", "shopping-bag", "coffee", "map-pin"]
+TAGS = ["food", "traffic", "spot", "shop", "nap", "hotel", "park"]
+FOOD_CATS = ["拉麵", "燒肉", "沖繩料理", "咖啡廳", "甜點", "海鮮", "輕食/速食", "居酒屋", "牛排", "塔可飯"]
+WORDS = ["海景", "親子", "必吃", "免費停車", "需預約", "雨天備案", "人氣", "在地", "排隊名店", "夕陽", "步行可到", "兒童餐"]
+
+def _text(rng, n):
+    return "，".join(rng.choice(WORDS) for _ in range(n)) + "。"
+
+def _write(path, header, rows):
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def write_synthetic_trip(src_dir, events, seed=0):
+    """在 src_dir 產生約 events 筆行程的合成資料 (每天 8 筆，午晚餐各 3 個候選餐廳)"""
+    rng = random.Random(seed)
+    days = max(1, events // 8)
+    files = generator.FILES
+    _write(os.path.join(src_dir, files["daily"]), ["day_id", "date", "theme", "rain_plan"],
+           [[f"day{d}", f"第 {d} 天", f"主題 {d}", _text(rng, 4)] for d in range(1, days + 1)])
+
+    itinerary, food = [], []
+    for i in range(events):
+        d = i // 8 + 1 if i // 8 < days else days
+        slot = f"d{d}_{'lunch' if i % 8 == 3 else 'dinner'}" if i % 8 in (3, 6) else ""
+        itinerary.append([f"day{d}", f"{8 + i % 8 * 2:02d}:00", rng.choice(ICONS), rng.choice(TAGS),
+                          f"景點 {i}", _text(rng, 6), _text(rng, 1) if i % 3 == 0 else "",
+                          _text(rng, 2) if i % 5 == 0 else "", slot])
+        if slot:
+            for k in range(3):
+                food.append([f"餐廳 {i}-{k}", rng.choice(FOOD_CATS), _text(rng, 5), slot, f"Day {d}", f"Restaurant {i}-{k}"])
+    for k in range(events // 4):
+        food.append([f"口袋名單 {k}", rng.choice(FOOD_CATS), _text(rng, 5), "", "", ""])
+    _write(os.path.join(src_dir, files["itinerary"]),
+           ["day_id", "time", "icon", "tag", "title", "desc", "note", "plan_b", "slot"], itinerary)
+    _write(os.path.join(src_dir, files["food"]), ["name", "category", "desc", "slot", "day_info", "map_query"], food)
+
+    _write(os.path.join(src_dir, files["churaumi"]), ["type", "time", "title", "desc"],
+           [["show" if k % 2 else "tip", f"{9 + k % 10}:30", f"✅ 項目 {k}", _text(rng, 4)] for k in range(max(4, events // 50))])
+    _write(os.path.join(src_dir, files["packing"]), ["category", "item", "note"],
+           [[f"分類 {k % 8}", f"物品 {k}", _text(rng, 1) if k % 2 else ""] for k in range(max(8, events // 20))])
+    _write(os.path.join(src_dir, files["shopping"]), ["location", "desc", "item"],
+           [[f"商場 {k}", _text(rng, 3), "|".join(f"商品 {k}-{j}" for j in range(6))] for k in range(max(3, events // 100))])
+    _write(os.path.join(src_dir, files["car"]), ["category", "title", "details"],
+           [[f"分類 {k % 4}", f"項目 {k}", _text(rng, 4)] for k in range(10)])
+    _write(os.path.join(src_dir, files["accommodation"]),
+           ["day_range", "name", "location", "address", "phone", "features", "nearby"],
+           [[f"D{k}-D{k + 2}", f"飯店 {k}", "名護", "地址", "098-000-0000", _text(rng, 4), "超商|餐廳|海灘"] for k in range(max(3, days // 3))])
+    _write(os.path.join(src_dir, files["weather"]), ["item", "value"], [["氣溫", "30°C"]])
+    return os.path.join(src_dir, files["itinerary"])
+
+def _best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        generator.map_url.cache_clear()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _profiled_build(tmp, src_dir, events, budgets):
+    """以 BuildProfile 完整建置一次 (不取最快，剖析本身的計時即為結果)"""
+    cache = generator.BuildCache(cache_dir=os.path.join(tmp, "cache"), force=True, src_dir=src_dir)
+    generator.map_url.cache_clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with generator.BuildProfile(budgets) as profile:
+            generator.generate_html(os.path.join(tmp, f"profile-{events}"), cache=cache, src_dir=src_dir)
+    exceeded = profile.check()
+    return profile.report(), exceeded
+
+def run(scales, repeat=3, full=False, profile=False, budgets=()):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for events in scales:
+            src_dir = os.path.join(tmp, f"trip-{events}")
+            os.makedirs(src_dir)
+            write_synthetic_trip(src_dir, events)
+            paths = {key: os.path.join(src_dir, name) for key, name in generator.FILES.items()}
+            store_s = _best_of(repeat, lambda: generator.build_store(paths))
+            row = {"events": events, "store": store_s}
+            if full:
+                def build():
+                    cache = generator.BuildCache(cache_dir=os.path.join(tmp, "cache"), force=True, src_dir=src_dir)
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        generator.generate_html(os.path.join(tmp, f"out-{events}"), cache=cache, src_dir=src_dir)
+                row["full"] = _best_of(repeat, build)
+            if profile or budgets:
+                row["profile"], row["exceeded"] = _profiled_build(tmp, src_dir, events, budgets)
+            results.append(row)
+            print(f"  ✅ {events} 筆行程")
+    return results
+
+# 瀏覽器端量測 (總表、美食地圖)：切換分頁到可捲動的時間、DOM 節點數、逐畫面捲到底的畫格間隔、分類篩選耗時，
+# 以及改版前「一次渲染全部列」的對照；結果顯示在右下角並存於 window.__bench
+BENCH_SNIPPET = """
+<script>
+    window.addEventListener('load', async () => {
+        const frame = () => new Promise(resolve => requestAnimationFrame(resolve));
+        const countNodes = el => el.getElementsByTagName('*').length;
+        const results = {};
+        for (const tab of ['fulltable', 'foodmap']) {
+            await frame();
+            const start = performance.now();
+            await switchTab(tab);
+            const panel = document.getElementById(`tab-${tab}`);
+            void panel.offsetHeight;
+            const mountMs = performance.now() - start;
+            const nodes = countNodes(panel);
+            let maxNodes = nodes;
+            const frames = [];
+            scrollTo({ top: 0, behavior: 'instant' });
+            await frame();
+            let last = performance.now();
+            for (let y = innerHeight; y < document.documentElement.scrollHeight - innerHeight && frames.length < 400; y += innerHeight) {
+                scrollTo({ top: y, behavior: 'instant' });
+                await frame();
+                const now = performance.now();
+                frames.push(now - last);
+                last = now;
+                maxNodes = Math.max(maxNodes, countNodes(panel));
+            }
+            results[tab] = { items: virtualLists[tab].items.length, mountMs, nodes, maxNodes, frames: frames.length,
+                             avgFrameMs: frames.reduce((a, b) => a + b, 0) / (frames.length || 1), maxFrameMs: Math.max(0, ...frames) };
+        }
+        const cats = [...virtualLists.foodmap.data.cats, '全部'];
+        let start = performance.now();
+        cats.forEach(filterFood);
+        results.filterMs = (performance.now() - start) / cats.length;
+
+        // 對照：把總表全部列一次放進 DOM 並完成排版
+        const { view, data } = virtualLists.fulltable;
+        const table = document.createElement('table');
+        table.style.cssText = 'position:absolute;top:0;left:-10000px;width:800px';
+        start = performance.now();
+        table.innerHTML = '<tbody>' + Array.from({ length: view.count(data) }, (_, i) => view.item(data, i)).join('') + '</tbody>';
+        document.body.appendChild(table);
+        void table.offsetHeight;
+        results.eager = { mountMs: performance.now() - start, nodes: countNodes(table) };
+        table.remove();
+
+        window.__bench = results;
+        console.table(results);
+        const out = document.createElement('pre');
+        out.style.cssText = 'position:fixed;right:8px;bottom:8px;z-index:9999;max-height:60vh;overflow:auto;background:#0f172a;color:#e2e8f0;padding:12px;border-radius:12px;font-size:11px';
+        out.textContent = JSON.stringify(results, (key, value) => typeof value === 'number' ? Math.round(value * 100) / 100 : value, 2);
+        document.body.appendChild(out);
+    });
+</script>
+"""
+
+def write_bench_page(out_dir, events=10000):
+    """產生 events 筆合成行程的單檔頁面，並在 </body> 前嵌入瀏覽器端量測腳本"""
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_trip(tmp, events)
+        cache = generator.BuildCache(cache_dir=os.path.join(tmp, "cache"), force=True, src_dir=tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator.generate_html(out_dir, cache=cache, src_dir=tmp)
+    path = os.path.join(out_dir, "index.html")
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    head, sep, tail = html.rpartition("</body>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(head + BENCH_SNIPPET + sep + tail)
+    return path
+
+def report(results):
+    cols = ["store"] + (["full"] if "full" in results[0] else [])
+    print(f"\n{'行程筆數':>10}" + "".join(f"{c + ' (ms)':>14}{'µs/筆':>10}" for c in cols))
+    for r in results:
+        print(f"{r['events']:>14}" + "".join(f"{r[c] * 1000:>14.1f}{r[c] / r['events'] * 1e6:>10.1f}" for c in cols))
+    first, last = results[0], results[-1]
+    growth = last["events"] / first["events"]
+    for c in cols:
+        print(f"📈 {c}：資料量放大 {growth:.0f} 倍，耗時放大 {last[c] / first[c]:.1f} 倍 (線性為 {growth:.0f} 倍)")
+    if "profile" in first:
+        report_profiles(results)
+
+PROFILE_PHASES = ("total", "data", "images", "search_index", "meal_slots", "render", "template", "css", "write")
+
+def report_profiles(results):
+    """各規模的階段耗時 (ms) 與頁面大小，並列出最大規模下位元組最多的項目"""
+    print(f"\n{'行程筆數':>10}" + "".join(f"{p:>13}" for p in PROFILE_PHASES) + f"{'頁面 (KB)':>12}{'峰值 (MB)':>11}")
+    for r in results:
+        phases, peak = r["profile"]["phases_ms"], r["profile"]["peak_memory"]["bytes"]
+        print(f"{r['events']:>14}" + "".join(f"{phases.get(p, 0):>13.1f}" for p in PROFILE_PHASES)
+              + f"{r['profile']['page']['bytes'] / 1024:>12.1f}{(peak or 0) / 1024 / 1024:>11.1f}")
+    last = results[-1]
+    embedded = [(name, size) for name, size in last["profile"]["bytes"].items() if not name.startswith(("page", "chunk:", "asset:"))]
+    print(f"📦 {last['events']} 筆行程時頁面中最大的項目：" + "、".join(f"{name} {size / 1024:.0f} KB" for name, size in embedded[:6]))
+    for r in results:
+        for key, actual, limit, kind in r["exceeded"]:
+            print(f"❌ {r['events']} 筆行程超出效能預算 {key}：{generator.format_budget(kind, actual)} > {generator.format_budget(kind, limit)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="以合成大型行程量測產生器效能")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000, 32000],
+                        help="各輪的行程筆數 (美食約為其 0.6 倍)")
+    parser.add_argument("--repeat", type=int, default=3, help="每個規模重複次數，取最快一次")
+    parser.add_argument("--full", action="store_true", help="另外量測完整建置 (預先渲染、CSS、寫檔)")
+    parser.add_argument("--page", metavar="OUT_DIR", help="改為產生瀏覽器端量測頁面 (虛擬捲動的總表與美食地圖)")
+    parser.add_argument("--page-events", type=int, default=10000, help="量測頁面的行程筆數")
+    parser.add_argument("--profile", action="store_true", help="各規模另跑一次剖析建置，列出各階段耗時與頁面組成")
+    parser.add_argument("--budget", action="append", default=[], metavar="ITEM=LIMIT",
+                        help="效能預算 (同 generator.py --budget)，任一規模超出時以 exit code 1 結束")
+    parser.add_argument("--report", metavar="PATH", help="把各規模的量測結果 (含剖析報告) 寫成 JSON")
+    args = parser.parse_args()
+    try:
+        budgets = [generator.parse_budget(text) for text in args.budget]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.page:
+        path = write_bench_page(args.page, args.page_events)
+        print(f"✅ 量測頁面已生成：{path} (以瀏覽器開啟，結果顯示於右下角與 console)")
+        raise SystemExit
+    print(f"🏁 產生合成資料並量測 {len(args.scales)} 種規模...")
+    results = run(sorted(args.scales), args.repeat, args.full, args.profile, budgets)
+    report(results)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"scales": results}, f, ensure_ascii=False, indent=2)
+        print(f"🧾 量測報告：{args.report}")
+    if any(r.get("exceeded") for r in results):
+        raise SystemExit(1)
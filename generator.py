@@ -1,8 +1,45 @@
+import codecs
 import csv
 import json
 import os
+import re
 import urllib.parse
 import base64
+import hashlib
+import zlib
+import tempfile
+import tracemalloc
+import shutil
+import argparse
+import time
+import threading
+import http.server
+import glob
+import io
+import contextlib
+import functools
+import unicodedata
+import sys
+from typing import NamedTuple, Optional, Union
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tailwind_css import build_css, unknown_classes
+from icons import ICONS, build_sprite, replace_icon_tags, resolve_icon
+
+try:
+    from PIL import Image, features as pil_features
+except ImportError:  # Pillow 為選用套件，缺少時僅複製原圖
+    Image = None
+
+try:
+    import brotli
+except ImportError:  # brotli 為選用套件，缺少時只能輸出 .gz
+    brotli = None
+
+try:
+    import resource
+except ImportError:  # Windows 沒有 resource，無法回報 RSS 峰值
+    resource = None
 
 # 檔案對照
 FILES = {
@@ -17,183 +54,1602 @@ FILES = {
     "churaumi": "churaumi.csv"
 }
 
-def read_csv(filename):
+# 圖片設定：來源檔、載入失敗時的備用圖
+IMAGES = {
+    "okinawa_map_2": {"src": "okinawa_map_2.jpg", "fallback": "https://placehold.co/800x400/e0f2fe/1e293b?text=Map+Route+Image"},
+    "churaumi_map": {"src": "churaumi_map.jpg", "fallback": "https://placehold.co/800x400/e2e8f0/64748b?text=Please+Add+churaumi_map.jpg"},
+    "churaumi_timetable": {"src": "churaumi_timetable.png", "fallback": ""},  # 無備用圖，直接隱藏
+}
+IMAGE_WIDTHS = (480, 960, 1600)  # 響應式寬度 (不會放大超過原圖)
+IMAGE_QUALITY = {"avif": 50, "webp": 75, "jpeg": 80}
+IMAGE_FALLBACK_FORMATS = {"JPEG": "jpeg", "MPO": "jpeg"}  # Pillow 判讀的實際格式 → 相容用備用圖格式，其餘一律 PNG
+IMAGE_SIZES = "(min-width: 896px) 864px, 100vw"  # 對應 max-w-4xl 內容寬度
+INLINE_MAX_BYTES = 4 * 1024  # 小於此大小的圖片直接內嵌為 Base64
+ASSET_DIR = "assets"
+CACHE_DIR = ".okinawa-cache"
+CHUNK_DIR = "chunks"
+STREAM_BLOCK = 64 * 1024  # 串流輸出時每次編碼、寫入的區塊大小
+PWA_SW_FILE = "sw.js"
+PWA_MANIFEST_FILE = "manifest.webmanifest"
+PWA_ICON_FILE = "icon.svg"
+PWA_THEME_COLOR = "#0ea5e9"
+PROFILE_FILE = "build-profile.json"  # --profile 報告的預設檔名 (寫在輸出目錄)
+
+# 分頁 (第一個為預設分頁)；各分頁 HTML 於建置時預先渲染，
+# --split 模式下其餘分頁各自輸出為雜湊檔，切換分頁時才載入
+TABS = ("dashboard", "days", "churaumi", "foodmap", "planner", "hotel", "prep", "fulltable")
+PREFETCH_TABS = ("days", "planner")  # 從總覽最常點開的分頁，先以 prefetch 預載
+# --split 時另存成雜湊區塊的共用資料 → 用到它的分頁 (載入分頁前先載入)；搜尋索引則在第一次搜尋時才載入
+SPLIT_DATA = {"foodmap": ("days", "foodmap", "planner", "fulltable")}
+
+# 行程基本資訊 (各行程資料夾可用 trip.json 覆寫)
+TRIP_FILE = "trip.json"
+TRIP_DEFAULTS = {
+    "title": "🌊 沖繩親子自駕攻略 2026",
+    "brand": "沖繩自駕趣",
+    "dates": "2026.07.19-25",
+    "footer": "Made for 沖繩 7天6夜 親子自駕行",
+    "flights": [
+        {"label": "去程 7/19", "value": "14:25 抵達"},
+        {"label": "回程 7/25", "value": "15:35 起飛"},
+    ],
+    "weather_title": "7月天氣概況",
+    "weather_lines": ["🌡️ 27°C - 32°C", "👕 穿著建議：短袖、透氣材質", "☂️ 注意事項：午後雷陣雨、室內冷氣強"],
+    "budgets": {},  # 效能預算，例如 {"page": "500KB", "total": "3s"}，超出時建置失敗 (見 parse_budget)
+}
+
+def load_trip(src_dir="."):
+    """讀取行程資料夾的 trip.json，未填的欄位沿用預設值"""
+    trip = dict(TRIP_DEFAULTS)
+    path = os.path.join(src_dir, TRIP_FILE)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8-sig") as f:
+            trip.update(json.load(f))
+    return trip
+
+CSV_ENCODINGS = ['utf-8-sig', 'cp950', 'big5', 'utf-8']
+CSV_SAMPLE_BYTES = 64 * 1024  # 判斷編碼時只讀檔案開頭這麼多位元組
+
+def _detect_encodings(filename):
+    """只以檔案開頭的樣本試解碼，依 CSV_ENCODINGS 的順序回傳可能的編碼 (後段若解碼失敗，讀取時再換下一個)"""
+    with open(filename, "rb") as f:
+        sample = f.read(CSV_SAMPLE_BYTES)
+    candidates = []
+    for enc in CSV_ENCODINGS:
+        try:
+            # 樣本可能切在多位元組字元中間，未讀到檔尾時不要求結尾完整
+            codecs.getincrementaldecoder(enc)().decode(sample, final=len(sample) < CSV_SAMPLE_BYTES)
+        except UnicodeDecodeError:
+            continue
+        candidates.append(enc)
+    return candidates
+
+def iter_rows(filename, fields):
+    """
+    逐列串流讀取 CSV，每列只取出 fields 指定的欄位 (tuple，缺少的欄位為空字串)，
+    不保留整份 DictReader 結果，資料量再大也只需常數記憶體。
+    """
     if not os.path.exists(filename):
         print(f"警告：找不到 {filename}，將使用空資料。")
-        return []
-    
+        return
+
     # 嘗試多種編碼，解決 Windows Excel 存檔造成的編碼問題
-    encodings = ['utf-8-sig', 'cp950', 'big5', 'utf-8']
-    
+    name = f"csv:{os.path.basename(filename)}"
+    with profile_phase(name):
+        encodings = _detect_encodings(filename)
+    if not encodings:
+        print(f"嚴重錯誤：無法識別 {filename} 的編碼。請嘗試使用記事本開啟並另存為 UTF-8。")
+        return
+    yield from profile_iter(name, _read_rows(filename, encodings, fields))
+
+def _read_rows(filename, encodings, fields):
+    """依序以 encodings 解析；讀到一半才解碼失敗時換下一個編碼重讀，並跳過已輸出的列 (不重複輸出)"""
+    done = 0
     for enc in encodings:
         try:
-            with open(filename, mode='r', encoding=enc) as f:
-                reader = csv.DictReader(f)
-                return [row for row in reader]
+            with open(filename, mode='r', encoding=enc, newline='') as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                columns = {name.strip(): i for i, name in enumerate(header)}
+                picks = [columns.get(name) for name in fields]
+                k = 0
+                for row in reader:
+                    if not row:
+                        continue
+                    k += 1
+                    if k <= done:
+                        continue
+                    n = len(row)
+                    yield tuple(row[i] if i is not None and i < n else "" for i in picks)
+                    done += 1
+            return
         except UnicodeDecodeError:
             continue
         except Exception as e:
             print(f"讀取 {filename} 時發生未預期的錯誤: {e}")
-            return []
-            
+            return
     print(f"嚴重錯誤：無法識別 {filename} 的編碼。請嘗試使用記事本開啟並另存為 UTF-8。")
-    return []
 
-def get_base64_image(filepath, fallback_url=""):
-    """讀取圖片並轉為 Base64，若檔案不存在則回傳備用 URL"""
+def iter_data_uri(filepath):
+    """以 Base64 分段輸出圖片的 data URI (每段編碼 3 的倍數位元組，可直接串接)，不把整張圖讀進記憶體"""
+    ext = os.path.splitext(filepath)[1].lower().replace('.', '')
+    if ext == 'jpg': ext = 'jpeg'
+    yield f"data:image/{ext};base64,"
+    with open(filepath, "rb") as image_file:
+        for block in iter(lambda: image_file.read(STREAM_BLOCK // 4 * 3), b""):
+            yield base64.b64encode(block).decode("ascii")
+
+def _image_formats(fallback_fmt):
+    """依 Pillow 支援度決定輸出格式，最後一個為相容用的原格式"""
+    formats = [fmt for fmt in ("avif", "webp") if pil_features.check(fmt)]
+    return formats + [fallback_fmt]
+
+def _encode_image(img, fmt, width):
+    """將圖片縮放至指定寬度並編碼，回傳 bytes"""
+    from io import BytesIO
+    if img.width > width:
+        height = round(img.height * width / img.width)
+        img = img.resize((width, height), Image.LANCZOS)
+    if fmt == "jpeg" and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buf = BytesIO()
+    if fmt == "png":
+        img.save(buf, "PNG", optimize=True)
+    elif fmt == "jpeg":
+        img.save(buf, "JPEG", quality=IMAGE_QUALITY["jpeg"], optimize=True, progressive=True)
+    else:
+        img.save(buf, fmt.upper(), quality=IMAGE_QUALITY[fmt])
+    return buf.getvalue()
+
+def _atomic_write(path, content):
+    """先寫暫存檔再改名，平行建置時其他行程不會讀到寫一半的檔案"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+def _atomic_copy(src, dst):
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+# --- 串流輸出：片段邊產生邊編碼寫出 (可同時壓縮)，不在記憶體組出整份文件 ---
+COMPRESS_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+class _CompressedSink:
+    """以最高壓縮等級串流寫入 .gz / .br"""
+    def __init__(self, f, kind):
+        self._f = f
+        if kind == "gzip":
+            c = zlib.compressobj(9, zlib.DEFLATED, 31)  # wbits=31：gzip 格式 (不含時間戳記，輸出可重現)
+            self._process, self._finish = c.compress, c.flush
+        else:
+            c = brotli.Compressor(quality=11)
+            self._process, self._finish = c.process, c.finish
+
+    def write(self, data):
+        self._f.write(self._process(data))
+
+    def finish(self):
+        self._f.write(self._finish())
+
+    def close(self):
+        self.finish()
+        self._f.close()
+
+class FragmentWriter:
+    """
+    累積字串片段到 STREAM_BLOCK 後才編碼寫出，同時計算內容雜湊與位元組數；
+    sinks 為任何具 write(bytes) 的物件 (檔案、壓縮串流)。
+    """
+    def __init__(self, sinks):
+        self.sinks = sinks
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._buf, self._pending = [], 0
+
+    def write(self, fragment):
+        self._buf.append(fragment)
+        self._pending += len(fragment)
+        if self._pending >= STREAM_BLOCK:
+            self.flush()
+
+    def write_all(self, fragments):
+        for fragment in fragments:
+            self.write(fragment)
+
+    def write_bytes(self, data):
+        self.flush()
+        self._emit(data)
+
+    def flush(self):
+        if self._buf:
+            data = "".join(self._buf).encode("utf-8")
+            self._buf, self._pending = [], 0
+            self._emit(data)
+
+    def _emit(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        for sink in self.sinks:
+            sink.write(data)
+
+    @property
+    def digest(self):
+        return self._hash.hexdigest()
+
+class OutputStream(FragmentWriter):
+    """
+    串流寫入輸出檔，compress 可另外產生 .gz / .br。先寫暫存檔，關閉時若內容雜湊與上次相同且檔案都在就丟棄暫存檔
+    (保留檔案時間戳記)，否則改名取代；content_named=True 時檔名改為「名稱.雜湊.副檔名」。
+    以 with 使用，發生例外時清掉暫存檔、不動既有輸出。
+    """
+    def __init__(self, path, cache=None, compress=(), content_named=False):
+        self.path, self.cache, self.content_named = path, cache, content_named
+        self.written = False
+        self._tmp = f"{path}.{os.getpid()}.tmp"
+        self._suffixes = [""] + [COMPRESS_SUFFIXES[kind] for kind in compress]
+        sinks = [open(self._tmp, "wb")]
+        for kind in compress:
+            sinks.append(_CompressedSink(open(self._tmp + COMPRESS_SUFFIXES[kind], "wb"), kind))
+        super().__init__(sinks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _close_sinks(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def abort(self):
+        self._close_sinks()
+        for suffix in self._suffixes:
+            if os.path.exists(self._tmp + suffix):
+                os.remove(self._tmp + suffix)
+
+    def close(self):
+        self.flush()
+        self._close_sinks()
+        digest = self.digest
+        if self.content_named:
+            stem, ext = os.path.splitext(self.path)
+            self.path = f"{stem}.{digest[:10]}{ext}"
+        outputs = self.cache.manifest["outputs"] if self.cache is not None else {}
+        if (self.cache is not None and not self.cache.force and outputs.get(self.path) == digest
+                and all(os.path.exists(self.path + suffix) for suffix in self._suffixes)):
+            for suffix in self._suffixes:
+                os.remove(self._tmp + suffix)
+        else:
+            for suffix in self._suffixes:
+                os.replace(self._tmp + suffix, self.path + suffix)
+            outputs[self.path] = digest
+            self.written = True
+        # 這次沒要求的壓縮檔可能與內容不符，一併移除
+        for suffix in COMPRESS_SUFFIXES.values():
+            if suffix not in self._suffixes and os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+class MemoryOutput(FragmentWriter):
+    """與 OutputStream 相同的介面，但只在記憶體中產生內容；關閉後 variants 為 {編碼: 位元組} (含 "identity")"""
+    def __init__(self, compress=()):
+        self._buffers = {kind: io.BytesIO() for kind in ("identity", *compress)}
+        self._compressed = [_CompressedSink(self._buffers[kind], kind) for kind in compress]
+        super().__init__([self._buffers["identity"], *self._compressed])
+        self.path, self.written, self.variants = None, False, {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def close(self):
+        self.flush()
+        for sink in self._compressed:
+            sink.finish()
+        self.variants = {kind: buf.getvalue() for kind, buf in self._buffers.items()}
+
+class Page(NamedTuple):
+    """
+    一次建置產生的 index.html：path 為寫入的檔案 (只在記憶體中渲染時為 None)，digest 為內容雜湊；
+    variants 為記憶體渲染的 {編碼: 位元組}，寫檔時為空。
+    """
+    path: Optional[str]
+    digest: str
+    size: int
+    variants: dict
+
+    @property
+    def body(self):
+        return self.variants.get("identity")
+
+def _load_image_cache(cache_dir):
+    index_path = os.path.join(cache_dir, "index.json")
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+def _save_image_cache(cache_dir, index):
+    os.makedirs(cache_dir, exist_ok=True)
+    merged = _load_image_cache(cache_dir)  # 合併其他行程同時寫入的項目
+    merged.update(index)
+    _atomic_write(os.path.join(cache_dir, "index.json"), json.dumps(merged, indent=1).encode("utf-8"))
+
+def build_image(filepath, asset_dir, asset_url=ASSET_DIR, inline_max=INLINE_MAX_BYTES, cache_dir=None, force=False):
+    """
+    產生響應式圖片：多種寬度的 AVIF/WebP 與依實際內容判定格式的備用檔 (不比原檔小的版本不輸出，備用圖改用原檔)，
+    以內容雜湊命名輸出至 asset_dir (網址前綴為 asset_url)，並依來源雜湊快取編碼結果。
+    回傳 {"src", "srcset", "sources", "width", "height"}；小圖另有 "inline" (輸出時才以 Base64 串流內嵌)，
+    找不到檔案時回傳 None。cache_dir 預設為呼叫當下的 CACHE_DIR (建置時傳入 BuildCache 的目錄)。
+    """
     if not os.path.exists(filepath):
-        return fallback_url
-    
-    try:
-        with open(filepath, "rb") as image_file:
-            encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-            ext = os.path.splitext(filepath)[1].lower().replace('.', '')
-            if ext == 'jpg': ext = 'jpeg'
-            return f"data:image/{ext};base64,{encoded_string}"
-    except Exception as e:
-        print(f"圖片轉換失敗 {filepath}: {e}")
-        return fallback_url
+        return None
+    with open(filepath, "rb") as f:
+        raw = f.read()
+    stem, ext = os.path.splitext(os.path.basename(filepath))
 
-def generate_html():
-    print("🚀 正在讀取 CSV 資料並產生互動版網頁...")
-    
-    data = {key: read_csv(filename) for key, filename in FILES.items()}
-
-    # --- 0. 圖片處理 (嵌入 Base64) ---
-    print("📸 正在嵌入圖片...")
-#    img_okinawa_map = get_base64_image("okinawa_map.jpg", "https://images.unsplash.com/photo-1542051841857-5f90071e7989?q=80&w=1200&auto=format&fit=crop")
-    img_okinawa_map_2 = get_base64_image("okinawa_map_2.jpg", "https://placehold.co/800x400/e0f2fe/1e293b?text=Map+Route+Image")
-    img_churaumi_map = get_base64_image("churaumi_map.jpg", "https://placehold.co/800x400/e2e8f0/64748b?text=Please+Add+churaumi_map.jpg")
-    img_churaumi_timetable = get_base64_image("churaumi_timetable.png", "") # 無備用圖，直接隱藏
-
-    # --- 1. 資料處理：美食 ---
-    meal_options = {}
-    extra_food = []
-    all_food_list = []
-    food_categories = set()
-
-    for row in data['food']:
-        slot = row.get('slot', '').strip()
-        query = row.get('map_query', row['name'])
-        map_url = f"https://www.google.com/maps/search/?api=1&query={urllib.parse.quote(query)}"
-        category = row['category']
-        food_categories.add(category)
-        
-        food_item = {
-            "name": row['name'],
-            "category": category,
-            "desc": row['desc'],
-            "dayInfo": row['day_info'],
-            "mapUrl": map_url,
-            "slot": slot
+    # 小圖直接內嵌，省一次請求
+    if len(raw) <= inline_max:
+        return {"src": "", "inline": filepath, "srcset": "", "sources": [], "width": None, "height": None}
+
+    img_cache_dir = os.path.join(CACHE_DIR if cache_dir is None else cache_dir, "images")
+    settings = repr((IMAGE_WIDTHS, sorted(IMAGE_QUALITY.items()), IMAGE_FALLBACK_FORMATS, Image is not None))
+    src_hash = hashlib.sha256(raw + settings.encode()).hexdigest()[:16]
+    index = _load_image_cache(img_cache_dir)
+    entry = None if force else index.get(src_hash)
+
+    if entry is None:
+        os.makedirs(img_cache_dir, exist_ok=True)
+        variants = []
+        if Image is None:
+            # 無 Pillow：不縮放、不轉檔，只做雜湊命名 (無法判讀內容，格式沿用副檔名)
+            print(f"⚠️ 未安裝 Pillow，{filepath} 將以原檔輸出 (pip install pillow 以啟用壓縮)")
+            fallback_fmt = ext.lower().lstrip(".").replace("jpg", "jpeg")
+            cached = f"{src_hash}-orig{ext.lower()}"
+            _atomic_write(os.path.join(img_cache_dir, cached), raw)
+            variants.append({"width": 0, "format": fallback_fmt, "file": cached,
+                             "hash": hashlib.sha256(raw).hexdigest()[:10]})
+            size = (None, None)
+        else:
+            print(f"🖼️ 正在編碼 {filepath} ...")
+            with Image.open(filepath) as img:
+                img.load()
+                size = img.size
+                # 備用圖格式依實際內容 (副檔名可能不符，例如 .png 裡其實是 JPEG)
+                fallback_fmt = IMAGE_FALLBACK_FORMATS.get(img.format, "png")
+                widths = sorted({min(w, img.width) for w in IMAGE_WIDTHS})
+                for fmt in _image_formats(fallback_fmt):
+                    kept = []
+                    for w in widths:
+                        encoded = _encode_image(img, fmt, w)
+                        if len(encoded) >= len(raw):  # 不比原檔小就不輸出
+                            continue
+                        cached = f"{src_hash}-{w}.{fmt}"
+                        _atomic_write(os.path.join(img_cache_dir, cached), encoded)
+                        kept.append({"width": w, "format": fmt, "file": cached,
+                                     "hash": hashlib.sha256(encoded).hexdigest()[:10]})
+                    if kept and kept[-1]["width"] == widths[-1]:
+                        variants += kept
+                    elif fmt == fallback_fmt:
+                        # 原寬度的備用圖不比原檔小：改用原檔 (格式相同，只是副檔名可能不同)
+                        cached = f"{src_hash}-orig.{fmt}"
+                        _atomic_write(os.path.join(img_cache_dir, cached), raw)
+                        variants += kept + [{"width": img.width, "format": fmt, "file": cached,
+                                             "hash": hashlib.sha256(raw).hexdigest()[:10]}]
+                    # 新格式連原寬度都不比原檔小時整個略過，支援的瀏覽器改用備用圖，不拿較低解析度的版本
+        entry = {"width": size[0], "height": size[1], "fallback": fallback_fmt, "variants": variants}
+        index[src_hash] = entry
+        _save_image_cache(img_cache_dir, index)
+
+    # 從快取複製到輸出目錄 (檔名含內容雜湊，可長期快取；多個行程共用時只存一份)
+    os.makedirs(asset_dir, exist_ok=True)
+    by_format = {}
+    for v in entry["variants"]:
+        out_ext = "jpg" if v["format"] == "jpeg" else v["format"]
+        name = f"{stem}-{v['width']}.{v['hash']}.{out_ext}" if v["width"] else f"{stem}.{v['hash']}.{out_ext}"
+        target = os.path.join(asset_dir, name)
+        if not os.path.exists(target):
+            _atomic_copy(os.path.join(img_cache_dir, v["file"]), target)
+        by_format.setdefault(v["format"], []).append((v["width"], f"{asset_url}/{name}"))
+
+    def srcset(items):
+        return ", ".join(f"{url} {w}w" for w, url in items) if items[0][0] else ""
+
+    fallback = by_format.pop(entry["fallback"])
+    return {
+        "src": fallback[-1][1],
+        "srcset": srcset(fallback),
+        "sources": [{"type": f"image/{fmt}", "srcset": srcset(items)} for fmt, items in by_format.items()],
+        "width": entry["width"],
+        "height": entry["height"],
+    }
+
+def picture_html(asset, alt, css_class, fallback_url="", eager=False):
+    """
+    逐段產生 <picture>，瀏覽器自動挑選支援的格式與合適寬度；載入失敗時換成備用圖或隱藏。
+    內嵌小圖的 Base64 直接分段輸出，不先組成完整字串。
+    """
+    if asset is None:
+        if fallback_url:
+            yield f'<img src="{fallback_url}" alt="{alt}" class="{css_class}">'
+        return
+    if fallback_url:
+        onerror = f"this.onerror=null;this.removeAttribute('srcset');this.parentNode.replaceWith(this);this.src='{fallback_url}'"
+    else:
+        onerror = "this.style.display='none'"
+    sources = "".join(f'<source type="{s["type"]}" srcset="{s["srcset"]}" sizes="{IMAGE_SIZES}">' for s in asset["sources"] if s["srcset"])
+    attrs = f' srcset="{asset["srcset"]}" sizes="{IMAGE_SIZES}"' if asset["srcset"] else ""
+    if asset["width"]:
+        attrs += f' width="{asset["width"]}" height="{asset["height"]}"'
+    loading = "eager" if eager else "lazy"
+    yield f'<picture>{sources}<img src="'
+    if asset.get("inline"):
+        yield from profile_iter(f"inline:{os.path.basename(asset['inline'])}", iter_data_uri(asset["inline"]), count_bytes=True)
+    else:
+        yield asset["src"]
+    yield f'"{attrs} alt="{alt}" class="{css_class}" loading="{loading}" decoding="async" onerror="{onerror}"></picture>'
+
+def _sha(data):
+    return hashlib.sha256(data if isinstance(data, bytes) else data.encode("utf-8")).hexdigest()
+
+def _code_hash():
+    """產生器本身的程式碼雜湊：樣板或邏輯修改後，所有快取自動失效"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.sha256()
+    for name in ("generator.py", "tailwind_css.py", "icons.py", "lucide_icons.json"):
+        with open(os.path.join(here, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+class BuildCache:
+    """
+    以內容雜湊為鍵的增量建置快取 (.okinawa-cache/manifest.json)。
+    每個區段記錄其輸入雜湊與計算結果，輸入不變時直接沿用；
+    force=True 時忽略既有快取全部重算。
+    """
+    def __init__(self, cache_dir=None, force=False, src_dir="."):
+        # 每個行程資料夾一份 manifest，批次建置時互不干擾
+        self.cache_dir = cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+        key = _sha(os.path.abspath(src_dir))[:12]
+        self.path = os.path.join(cache_dir, f"manifest-{key}.json")
+        self.blob_dir = os.path.join(cache_dir, f"blobs-{key}")  # 較大的區段結果 (分頁 HTML、搜尋索引) 另存成檔案
+        self.force = force
+        self.code = _code_hash()
+        self.manifest = {"sections": {}, "outputs": {}}
+        self.begin()
+        if not force and os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError):
+                print("⚠️ 快取檔損毀，將重新建置")
+
+    def begin(self):
+        """開始新一輪建置 (watch 模式重複使用同一個快取物件)"""
+        self.hits, self.misses = [], []
+        self._file_hashes = {}
+
+    def file_hash(self, path):
+        if path not in self._file_hashes:
+            if os.path.exists(path):
+                h = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for block in iter(lambda: f.read(STREAM_BLOCK), b""):
+                        h.update(block)
+                self._file_hashes[path] = h.hexdigest()
+            else:
+                self._file_hashes[path] = "missing"
+        return self._file_hashes[path]
+
+    def _key(self, name, deps):
+        return _sha(json.dumps([self.code, name, deps], ensure_ascii=False))
+
+    def lookup(self, name, deps, valid=None):
+        """輸入未變時回傳該區段的紀錄 {"key", "value"} 並記為命中，否則回傳 None"""
+        entry = self.manifest["sections"].get(name)
+        if entry and entry["key"] == self._key(name, deps) and (valid is None or valid(entry["value"])):
+            self.hits.append(name)
+            return entry
+        return None
+
+    def store(self, name, deps, value):
+        self.manifest["sections"][name] = {"key": self._key(name, deps), "value": value}
+        self.misses.append(name)
+        return value
+
+    def section(self, name, deps, compute, valid=None):
+        """deps 為輸入雜湊 (或任何可字串化的設定)；valid(value) 可檢查輸出檔是否仍在"""
+        entry = self.lookup(name, deps, valid)
+        if entry is not None:
+            return entry["value"]
+        return self.store(name, deps, compute())
+
+    # 較大的區段結果不放進 manifest (每次建置都要整份讀寫)，而是存成 blob_dir 下以內容雜湊命名的檔案，
+    # manifest 只記錄檔名與少量中繼資料
+    def blob_path(self, value):
+        return os.path.join(self.blob_dir, value["file"])
+
+    def lookup_blob(self, name, deps):
+        """命中時回傳 {"file", ...中繼資料}，檔案已被刪除或輸入變動時回傳 None"""
+        entry = self.lookup(name, deps, valid=lambda value: os.path.exists(self.blob_path(value)))
+        return entry["value"] if entry is not None else None
+
+    def store_blob(self, name, deps, fragments, meta=None):
+        """
+        逐段輸出 fragments 並同時寫進快取檔，全部產生完才登記 (中途失敗不留下半份)；
+        meta 為呼叫端在產生過程中填入的中繼資料 (集合會轉成排序後的清單)。
+        """
+        os.makedirs(self.blob_dir, exist_ok=True)
+        tmp = os.path.join(self.blob_dir, f"{name.replace(':', '-')}.{os.getpid()}.tmp")
+        digest = hashlib.sha256()
+        try:
+            with open(tmp, "wb") as f:
+                for fragment in fragments:
+                    data = fragment.encode("utf-8")
+                    f.write(data)
+                    digest.update(data)
+                    yield fragment
+        except BaseException:
+            os.remove(tmp)
+            raise
+        value = {"file": f"{name.replace(':', '-')}.{digest.hexdigest()[:16]}"}
+        value.update({key: sorted(v) if isinstance(v, set) else v for key, v in (meta or {}).items()})
+        os.replace(tmp, self.blob_path(value))
+        previous = self.manifest["sections"].get(name)
+        if previous and previous["value"].get("file") not in (None, value["file"]) and os.path.exists(self.blob_path(previous["value"])):
+            os.remove(self.blob_path(previous["value"]))
+        self.store(name, deps, value)
+
+    def read_blob(self, value):
+        """以區塊讀回快取檔的位元組"""
+        with open(self.blob_path(value), "rb") as f:
+            yield from iter(lambda: f.read(STREAM_BLOCK), b"")
+
+    def read_blob_text(self, value):
+        """以區塊讀回快取檔的文字 (逐段解碼，多位元組字元不會被切開)"""
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for block in self.read_blob(value):
+            yield decoder.decode(block)
+        yield decoder.decode(b"", final=True)
+
+    def write_output(self, path, content):
+        """內容雜湊與上次相同且檔案仍在時略過寫入；回傳是否實際寫入"""
+        digest = _sha(content)
+        if not self.force and self.manifest["outputs"].get(path) == digest and os.path.exists(path):
+            return False
+        _atomic_write(path, content)
+        self.manifest["outputs"][path] = digest
+        return True
+
+    def open_output(self, path, compress=(), content_named=False):
+        """串流寫入輸出檔 (OutputStream)，內容未變時同樣略過寫入"""
+        return OutputStream(path, self, compress, content_named)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+def peak_memory():
+    """
+    建置期間的記憶體高峰 (位元組, 說明)：有啟用 tracemalloc 時為 Python 配置的精確峰值，
+    否則為行程的最大常駐記憶體 (RSS)；兩者皆不可用時回傳 (None, None)。
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1], "Python 配置"
+    if resource is not None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return (rss if sys.platform == "darwin" else rss * 1024), "RSS"
+    return None, None
+
+# --- 建置剖析與效能預算 (--profile / --budget) ---
+# 耗時項目 (秒，含巢狀的子項目)：total、images / image:<key>、data / data:<區段> / csv:<檔名>、search_index、
+#   meal_slots、render / render:<分頁> / json:<資料集>、template、css、write、pwa
+# 位元組項目：page、css、sprite、script、tab:<分頁> (內嵌)、chunk:<分頁> (--split)、json:<資料集>、
+#   inline:<圖檔> (Base64 內嵌)、asset:<key> (圖片檔，不計入頁面)
+BUDGET_UNITS = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "ms": 0.001, "s": 1}
+
+def parse_budget(text):
+    """'page=500KB'、'total=3s'、'render:days=300ms' → (項目, "bytes" 或 "seconds", 上限)"""
+    key, sep, value = text.partition("=")
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([A-Za-z]+)\s*", value)
+    if not sep or not key.strip() or m is None or m[2].lower() not in BUDGET_UNITS:
+        raise ValueError(f"無法解析效能預算 {text!r} (格式如 page=500KB、total=3s、render:days=300ms)")
+    unit = m[2].lower()
+    return key.strip(), "seconds" if unit in ("ms", "s") else "bytes", float(m[1]) * BUDGET_UNITS[unit]
+
+_profile = None  # 進行中的 BuildProfile；None 時以下的剖析掛勾不做任何事
+
+def profile_phase(name):
+    """剖析中時計時 name 階段 (同名累加)"""
+    return _profile.phase(name) if _profile is not None else contextlib.nullcontext()
+
+def profile_iter(name, fragments, count_bytes=False):
+    """剖析中時逐段計時片段產生器 (見 BuildProfile.timed)，否則原樣回傳"""
+    return _profile.timed(name, fragments, count_bytes) if _profile is not None else fragments
+
+class BuildProfile:
+    """
+    以 with 包住一次建置：期間各階段的耗時、頁面的位元組組成與記憶體峰值都記在這裡，
+    check() 比對效能預算，save() 寫出 JSON 報告。巢狀階段的耗時包含其子項目。
+    """
+    def __init__(self, budgets=()):
+        self.budgets = list(budgets)
+        self.seconds, self.bytes, self.counts = {}, {}, {}
+        self.page, self.peak, self.results = {}, {}, []
+        self._previous, self._start = None, 0.0
+
+    def __enter__(self):
+        global _profile
+        self._previous, _profile = _profile, self
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _profile
+        self.add("total", time.perf_counter() - self._start)
+        peak, kind = peak_memory()
+        self.peak = {"bytes": peak, "kind": kind}
+        _profile = self._previous
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def add_bytes(self, name, size):
+        self.bytes[name] = self.bytes.get(name, 0) + size
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed(self, name, fragments, count_bytes=False):
+        """
+        只累計產生每個片段所花的時間 (不含呼叫端處理片段的時間)，串流交錯執行的階段也能分開計時；
+        同時計算片段數 (CSV 為列數)，count_bytes 時另外累計 UTF-8 位元組數。
+        """
+        clock, it = time.perf_counter, iter(fragments)
+        count = 0
+        try:
+            while True:
+                start = clock()
+                try:
+                    fragment = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    self.add(name, clock() - start)
+                count += 1
+                if count_bytes:
+                    self.add_bytes(name, len(fragment.encode("utf-8")) if isinstance(fragment, str) else len(fragment))
+                yield fragment
+        finally:
+            self.counts[name] = self.counts.get(name, 0) + count
+
+    def check(self):
+        """比對效能預算，回傳超出的項目 [(項目, 實際, 上限, 種類)]；找不到的項目只提出警告"""
+        self.results, exceeded = [], []
+        for key, kind, limit in self.budgets:
+            actual = (self.seconds if kind == "seconds" else self.bytes).get(key)
+            if actual is None:
+                print(f"⚠️ 效能預算項目 {key} 沒有量測值 (拼錯或此次建置未產生)，略過")
+                continue
+            ok = actual <= limit
+            self.results.append({"key": key, "kind": kind, "limit": limit, "actual": actual, "ok": ok})
+            if not ok:
+                exceeded.append((key, actual, limit, kind))
+        return exceeded
+
+    def report(self):
+        return {
+            "page": self.page,
+            "peak_memory": self.peak,
+            "phases_ms": {name: round(s * 1000, 3) for name, s in self.seconds.items()},
+            "counts": self.counts,
+            "bytes": dict(sorted(self.bytes.items(), key=lambda item: -item[1])),
+            "budgets": self.results,
         }
-        all_food_list.append(food_item)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _atomic_write(path, json.dumps(self.report(), ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def print_summary(self, top=12):
+        total = self.seconds.get("total") or 1e-9
+        print("⏱️ 建置剖析 (耗時最多的項目，含子項目)：")
+        for name, s in sorted(self.seconds.items(), key=lambda item: -item[1])[:top]:
+            print(f"   {name:<28}{s * 1000:>10.1f} ms{s / total * 100:>6.0f}%")
+        page = self.bytes.get("page") or 1
+        print("📦 頁面組成 (位元組最多的項目)：")
+        for name, size in sorted(((n, b) for n, b in self.bytes.items() if n != "page"), key=lambda item: -item[1])[:top]:
+            share = f"{size / page * 100:>6.0f}%" if not name.startswith(("chunk:", "asset:")) else "   外部"
+            print(f"   {name:<28}{size / 1024:>10.1f} KB{share}")
+
+def format_budget(kind, value):
+    return f"{value * 1000:.0f} ms" if kind == "seconds" else f"{value / 1024:.1f} KB"
+
+def trip_budgets(src_dir=".", extra=()):
+    """trip.json 的 budgets 加上命令列的 --budget (同一項目以命令列為準)"""
+    budgets = {}
+    for text in [f"{key}={value}" for key, value in load_trip(src_dir)["budgets"].items()] + list(extra):
+        key, kind, limit = parse_budget(text)
+        budgets[key, kind] = limit
+    return [(key, kind, limit) for (key, kind), limit in budgets.items()]
+
+def finish_profile(profile, report_path=None):
+    """比對效能預算，report_path 不為 None 時寫出 JSON 報告並印出摘要；回傳超出預算的說明 (空字串表示通過)"""
+    exceeded = profile.check()
+    if report_path is not None:
+        profile.save(report_path)
+        profile.print_summary()
+        print(f"🧾 剖析報告：{report_path}")
+    message = "；".join(f"{key} {format_budget(kind, actual)} > {format_budget(kind, limit)}" for key, actual, limit, kind in exceeded)
+    if message:
+        print(f"❌ 超出效能預算：{message}")
+    elif profile.results:
+        print(f"✅ 符合 {len(profile.results)} 項效能預算")
+    return message
+
+# --- 資料處理：正規化資料 (每筆資料只出現一次，各種檢視以索引陣列表示) ---
+# 每份 CSV 只串流讀過一次，直接建成緊湊的具名 tuple 與索引，所有分頁共用同一份 store：
+#   food:      Food；foodCats 依首次出現順序，catFood[i] 為第 i 個分類的 food 索引
+#   events:    Event；day 為日索引 (找不到時為原始 day_id)
+#   days:      Day；dayEvents[i] 為第 i 天的 events 索引
+#   slots:     {slot: [food 索引]}；extra: 沒有 slot 的 food 索引
+MAP_URL_PREFIX = "https://www.google.com/maps/search/?api=1&query="
+
+class Day(NamedTuple):
+    id: str
+    date: str
+    theme: str
+    rain_plan: str
+
+class Event(NamedTuple):
+    day: Union[int, str]
+    time: str
+    icon: str
+    tag: str
+    title: str
+    desc: str
+    note: str
+    plan_b: str
+    slot: str
+
+class Food(NamedTuple):
+    name: str
+    category: int
+    desc: str
+    day_info: str
+    query: str
+    slot: str
+
+@functools.lru_cache(maxsize=4096)  # 有上限：watch / serve.py 長時間執行時不會無限成長
+def map_url(query):
+    """Google Maps 搜尋網址 (同一地點在每日行程、總表、美食地圖間只組一次)"""
+    return MAP_URL_PREFIX + urllib.parse.quote(query, safe="-_.!~*()")
+
+def typed_store(store):
+    """快取還原的 store 為純 list，轉回具名 tuple"""
+    store["days"] = [Day(*d) for d in store["days"]]
+    store["events"] = [Event(*e) for e in store["events"]]
+    store["food"] = [Food(*f) for f in store["food"]]
+    return store
+
+# --- 1. 資料處理：美食 ---
+def build_food(path):
+    intern = sys.intern
+    cats, cat_index, cat_food = [], {}, []
+    food, slots, extra = [], {}, []
+    for i, (name, category, desc, day_info, query, slot) in enumerate(
+            iter_rows(path, ("name", "category", "desc", "day_info", "map_query", "slot"))):
+        cat = cat_index.get(category)
+        if cat is None:
+            cat = cat_index[category] = len(cats)
+            cats.append(category)
+            cat_food.append([])
+        slot = intern(slot.strip())
+        food.append(Food(name, cat, desc, intern(day_info), query or name, slot))
+        cat_food[cat].append(i)
         if slot:
-            if slot not in meal_options: meal_options[slot] = []
-            meal_options[slot].append(food_item)
+            slots.setdefault(slot, []).append(i)
         else:
-            extra_food.append(food_item)
+            extra.append(i)
+    return {"foodCats": cats, "catFood": cat_food, "food": food, "slots": slots, "extra": extra}
 
-    sorted_categories = ["全部"] + sorted(list(food_categories))
-    
-    # --- 2. 資料處理：行程 ---
-    days_json = []
-    for day_info in data['daily']:
-        day_id = day_info['day_id']
-        day_events = [e for e in data['itinerary'] if e['day_id'] == day_id]
-        events_formatted = []
-        for ev in day_events:
-            map_query = urllib.parse.quote(ev['title'])
-            map_url = f"https://www.google.com/maps/search/?api=1&query={map_query}"
-            events_formatted.append({
-                "time": ev['time'], "icon": ev['icon'], "tag": ev['tag'],
-                "title": ev['title'], "desc": ev['desc'], "note": ev['note'],
-                "planB": ev['plan_b'], "slot": ev.get('slot', ''), "mapUrl": map_url
-            })
-        days_json.append({
-            "id": day_id, "date": day_info['date'],
-            "theme": day_info['theme'], "rainPlan": day_info['rain_plan'],
-            "events": events_formatted
-        })
-
-    # --- 3. 資料處理：總表 ---
-    full_table_raw = []
-    date_map = {d['day_id']: d['date'] for d in data['daily']}
-    for ev in data['itinerary']:
-        map_query = urllib.parse.quote(ev['title'])
-        map_url = f"https://www.google.com/maps/search/?api=1&query={map_query}"
-        full_table_raw.append({
-            "day": date_map.get(ev['day_id'], ev['day_id']),
-            "time": ev['time'], "title": ev['title'], "tag": ev['tag'],
-            "desc": ev['desc'], "note": ev['note'], "planB": ev['plan_b'],
-            "slot": ev.get('slot', ''), "mapUrl": map_url
-        })
-
-    # --- 4. 資料處理：美麗海 ---
-    churaumi_shows = [r for r in data.get('churaumi', []) if r['type'] == 'show']
-    churaumi_tips = [r for r in data.get('churaumi', []) if r['type'] != 'show']
-
-    # --- 5. 資料處理：其他 ---
-    # 住宿 HTML
-    acc_html = '<div class="grid gap-6 md:grid-cols-3">'
-    for row in data['accommodation']:
-        hotel_map = f"https://www.google.com/maps/search/?api=1&query={urllib.parse.quote(row['name'])}"
-        nearby_tags = "".join([f'<span class="text-[10px] bg-indigo-50 text-indigo-600 px-2 py-1 rounded-md">{t.strip()}</span>' for t in row['nearby'].split('|')])
-        acc_html += f'''
+# --- 2. 資料處理：行程 (每日行程與總表共用同一份 events) ---
+def build_days(daily_path, itinerary_path):
+    days = [Day(*row) for row in iter_rows(daily_path, ("day_id", "date", "theme", "rain_plan"))]
+    day_index = {d.id: i for i, d in enumerate(days)}
+    day_events = [[] for _ in days]
+    events = []
+    intern = sys.intern
+    for i, (day_id, time_, icon, tag, *text, slot) in enumerate(
+            iter_rows(itinerary_path, ("day_id", "time", "icon", "tag", "title", "desc", "note", "plan_b", "slot"))):
+        day = day_index.get(day_id, day_id)
+        if isinstance(day, int):
+            day_events[day].append(i)
+        events.append(Event(day, intern(time_), resolve_icon(icon), intern(tag), *text, intern(slot)))
+    return {"days": days, "dayEvents": day_events, "events": events}
+
+# --- 4. 資料處理：美麗海 ---
+def build_churaumi(path):
+    shows, tips = [], []
+    for kind, *row in iter_rows(path, ("type", "time", "title", "desc")):
+        (shows if kind == 'show' else tips).append(row)
+    return {"shows": shows, "tips": tips}
+
+# --- 5. 資料處理：其他 ---
+# 住宿 HTML
+def build_acc_html(path):
+    parts = ['<div class="grid gap-6 md:grid-cols-3">']
+    for day_range, name, location, address, phone, features, nearby in iter_rows(
+            path, ("day_range", "name", "location", "address", "phone", "features", "nearby")):
+        nearby_tags = "".join([f'<span class="text-[10px] bg-indigo-50 text-indigo-600 px-2 py-1 rounded-md">{t.strip()}</span>' for t in nearby.split('|')])
+        parts.append(f'''
             <div class="bg-white p-4 rounded-xl border border-indigo-100 shadow-sm flex flex-col">
-                <div class="mb-3"><span class="text-xs font-bold text-white bg-indigo-500 px-3 py-1 rounded-full">{row['day_range']}</span></div>
-                <h3 class="font-bold text-slate-800 text-lg mb-1">{row['name']}</h3>
-                <p class="text-xs text-slate-500 mb-2"><i data-lucide="map-pin" class="w-3 h-3 inline"></i> {row['location']}</p>
+                <div class="mb-3"><span class="text-xs font-bold text-white bg-indigo-500 px-3 py-1 rounded-full">{day_range}</span></div>
+                <h3 class="font-bold text-slate-800 text-lg mb-1">{name}</h3>
+                <p class="text-xs text-slate-500 mb-2"><i data-lucide="map-pin" class="w-3 h-3 inline"></i> {location}</p>
                 <div class="bg-slate-50 p-2 rounded text-xs text-slate-600 mb-2 space-y-1">
-                    <div>📍 {row.get('address','')}</div><div>📞 {row.get('phone','')}</div>
+                    <div>📍 {address}</div><div>📞 {phone}</div>
                 </div>
-                <p class="text-sm text-slate-600 mb-3 flex-grow">{row['features']}</p>
+                <p class="text-sm text-slate-600 mb-3 flex-grow">{features}</p>
                 <div class="border-t pt-2 flex flex-wrap gap-1">{nearby_tags}</div>
-                <a href="{hotel_map}" target="_blank" class="mt-3 text-center block w-full py-2 bg-indigo-50 text-indigo-600 text-xs font-bold rounded hover:bg-indigo-100">查看地圖</a>
-            </div>'''
-    acc_html += '</div>'
+                <a href="{map_url(name)}" target="_blank" class="mt-3 text-center block w-full py-2 bg-indigo-50 text-indigo-600 text-xs font-bold rounded hover:bg-indigo-100">查看地圖</a>
+            </div>''')
+    parts.append('</div>')
+    return "".join(parts)
 
-    # 清單 JSON
+# 清單
+def build_packing(path):
     packing_grouped = {}
-    for item in data['packing']:
-        cat = item['category']
-        if cat not in packing_grouped: packing_grouped[cat] = []
-        packing_grouped[cat].append({"item": item['item'], "note": item.get('note', '')})
-    
-    shopping_json_list = []
-    for row in data['shopping']:
-        shopping_json_list.append({"location": row['location'], "desc": row['desc'], "items": [i.strip() for i in row['item'].split('|')]})
-
-    # 序列化 JSON 供 JS 使用
-    # 這裡直接使用 list/dict 物件，解決 NameError 問題
-    js_data = {
-        "daysDataRaw": json.dumps(days_json, ensure_ascii=False),
-        "mealOptions": json.dumps(meal_options, ensure_ascii=False),
-        "extraFood": json.dumps(extra_food, ensure_ascii=False),
-        "allFoodList": json.dumps(all_food_list, ensure_ascii=False),
-        "foodCategories": json.dumps(sorted_categories, ensure_ascii=False), # 修正: 使用 sorted_categories
-        "packingData": json.dumps([{"category": k, "items": v} for k, v in packing_grouped.items()], ensure_ascii=False),
-        "shoppingData": json.dumps(shopping_json_list, ensure_ascii=False),
-        "carData": json.dumps(data['car'], ensure_ascii=False),
-        "weatherData": json.dumps(data['weather'], ensure_ascii=False),
-        "fullTableRaw": json.dumps(full_table_raw, ensure_ascii=False),
-        "churaumiShows": json.dumps(churaumi_shows, ensure_ascii=False),
-        "churaumiTips": json.dumps(churaumi_tips, ensure_ascii=False)
+    for category, item, note in iter_rows(path, ("category", "item", "note")):
+        packing_grouped.setdefault(category, []).append([item, note])
+    return [[k, v] for k, v in packing_grouped.items()]
+
+def build_shopping(path):
+    return [[location, desc, [i.strip() for i in item.split('|')]]
+            for location, desc, item in iter_rows(path, ("location", "desc", "item"))]
+
+def build_car(path):
+    return [list(row) for row in iter_rows(path, ("category", "title", "details"))]
+
+def build_store(paths, cache=None):
+    """
+    由各 CSV 建出所有分頁共用的 store；
+    cache 為 BuildCache 時，各區段只在其輸入 CSV 變動時重新計算。
+    """
+    if cache is None:
+        cached, files = (lambda name, deps, compute: compute()), dict.fromkeys(paths)
+    else:
+        cached, files = cache.section, {key: cache.file_hash(path) for key, path in paths.items()}
+
+    def section(name, deps, compute):
+        with profile_phase(f"data:{name}"):
+            return cached(name, deps, compute)
+    store = {}
+    store.update(section("food", [files["food"]], lambda: build_food(paths["food"])))
+    store.update(section("days", [files["daily"], files["itinerary"]],
+                         lambda: build_days(paths["daily"], paths["itinerary"])))
+    store["churaumi"] = section("churaumi", [files["churaumi"]], lambda: build_churaumi(paths["churaumi"]))
+    store["packing"] = section("packing", [files["packing"]], lambda: build_packing(paths["packing"]))
+    store["shopping"] = section("shopping", [files["shopping"]], lambda: build_shopping(paths["shopping"]))
+    store["car"] = section("car", [files["car"]], lambda: build_car(paths["car"]))
+    store["accHtml"] = section("acc_html", [files["accommodation"]], lambda: build_acc_html(paths["accommodation"]))
+    return typed_store(store)
+
+def legacy_payload_bytes(store, weather_path):
+    """舊版頁面 (每種檢視各自序列化) 的資料量，供建置報告比較用"""
+    cats = store["foodCats"]
+    food = [{"name": f.name, "category": cats[f.category], "desc": f.desc, "dayInfo": f.day_info,
+             "mapUrl": map_url(f.query), "slot": f.slot} for f in store["food"]]
+    events = [{"day": _event_day(store, e), "time": e.time, "icon": e.icon, "tag": e.tag, "title": e.title,
+               "desc": e.desc, "note": e.note, "planB": e.plan_b, "slot": e.slot, "mapUrl": map_url(e.title)}
+              for e in store["events"]]
+    weather_fields = ("month", "avg_temp", "rain", "clothing", "tips")
+    weather = [dict(zip(weather_fields, row)) for row in iter_rows(weather_path, weather_fields)]
+    legacy = [
+        [{"id": d.id, "date": d.date, "theme": d.theme, "rainPlan": d.rain_plan,
+          "events": [{k: v for k, v in events[j].items() if k != "day"} for j in store["dayEvents"][i]]}
+         for i, d in enumerate(store["days"])],
+        {slot: [food[i] for i in ids] for slot, ids in store["slots"].items()},
+        [food[i] for i in store["extra"]], food, ["全部"] + cats,
+        [{"category": c, "items": [{"item": i, "note": n} for i, n in items]} for c, items in store["packing"]],
+        [{"location": l, "desc": d, "items": items} for l, d, items in store["shopping"]],
+        [{"category": c, "title": t, "details": d} for c, t, d in store["car"]], weather,
+        [{k: v for k, v in e.items() if k != "icon"} for e in events],
+        [{"type": "show", "time": t, "title": ti, "desc": d} for t, ti, d in store["churaumi"]["shows"]],
+        [{"type": "tip", "time": t, "title": ti, "desc": d} for t, ti, d in store["churaumi"]["tips"]],
+    ]
+    return sum(len(json.dumps(part, ensure_ascii=False).encode("utf-8")) for part in legacy)
+
+# --- 6. 預先渲染：各分頁 HTML 在建置時產生，瀏覽器只負責切換顯示 ---
+TAG_LABELS = {"food": "美食", "traffic": "交通", "spot": "景點", "shop": "購物", "nap": "午睡/休息", "hotel": "住宿", "park": "公園/放電"}
+
+def _event_day(store, ev):
+    return store["days"][ev.day].date if isinstance(ev.day, int) else ev.day
+
+def build_meal_slots(store):
+    """
+    餐廳排程 {slot: [候選餐廳在 food 中的索引, {事件編號: 該事件原本的備案}]}；同一時段可綁定多個行程事件，各自保留備案。
+    店名、說明與導航網址不重複存放：瀏覽器端由頁面共用的 data-foodmap 取用 (見 meal_record)。
+    """
+    meals = {}
+    for j, ev in enumerate(store["events"]):
+        options = store["slots"].get(ev.slot) if ev.slot else None
+        if not options:
+            continue
+        plans = meals.setdefault(ev.slot, [options, {}])[1]
+        if ev.plan_b:
+            plans[str(j)] = ev.plan_b  # JSON 物件的鍵為字串，快取還原前後一致
+    return meals
+
+def meal_record(food, entry, index, event):
+    """
+    時段 entry 選第 index 個候選時，第 event 個事件顯示的 (title, desc, planB, mapUrl)；
+    備案為其餘候選，沒有其他候選時為該事件原本的備案。與瀏覽器端的 mealRecord 相同
+    """
+    options, plans = entry
+    f = food[options[index]]
+    backups = " / ".join(food[j].name for k, j in enumerate(options) if k != index)
+    return f.name, f.desc, backups or plans.get(str(event), ""), map_url(f.query)
+
+def _event_display(ev, j, food, meals):
+    """第 j 個行程事件目前顯示的 (title, desc, planB, mapUrl)；綁定餐廳時段的事件預設為第一個候選"""
+    if ev.slot in meals:
+        return meal_record(food, meals[ev.slot], 0, j)
+    return ev.title, ev.desc, ev.plan_b, map_url(ev.title)
+
+CLASS_ATTR_RE = re.compile(r'class="([^"]*)"')
+# 只作為 JS / 圖示標記、刻意沒有樣式的 class (不列入未知 class 警告)
+HOOK_CLASS_RE = re.compile(r"lucide(-[a-z0-9-]+)?|checklist-item|food-card")
+
+def class_tokens(attrs):
+    """class 屬性值拆成個別 class；略過 JS 樣板中含 ${...} 插值的 token"""
+    return {cls for attr in attrs for cls in attr.split() if "$" not in cls and "{" not in cls}
+
+def render_dashboard(trip, images):
+    flights_html = "".join(
+        f'<div class="flex justify-between items-center{" border-b border-slate-50 pb-2 mb-2" if i < len(trip["flights"]) - 1 else ""}">'
+        f'<span class="text-xs text-slate-400">{f["label"]}</span><span class="font-bold text-slate-800">{f["value"]}</span></div>'
+        for i, f in enumerate(trip["flights"]))
+    weather_html = "".join(f"<p>{line}</p>" for line in trip["weather_lines"])
+    yield '<div class="fade-in space-y-8">'
+    # 航班 & 天氣
+    yield f'<div class="grid grid-cols-1 md:grid-cols-2 gap-4"><div class="bg-white p-5 rounded-2xl border border-slate-100 shadow-sm"><h3 class="font-bold text-slate-700 mb-3 flex items-center gap-2"><i data-lucide="plane" class="text-blue-500"></i> 航班資訊</h3>{flights_html}</div><div class="bg-orange-50 p-5 rounded-2xl border border-orange-100"><h3 class="font-bold text-orange-800 mb-3 flex items-center gap-2"><i data-lucide="sun" class="text-orange-500"></i> {trip["weather_title"]}</h3><div class="text-sm text-orange-700 space-y-1">{weather_html}</div></div></div>'
+    # 插畫 & 地圖
+    yield '<div class="bg-white p-4 rounded-2xl border border-slate-100 shadow-sm"><h2 class="font-bold text-slate-700 mb-3 text-lg flex items-center gap-2"><i data-lucide="navigation" class="text-green-500"></i> 路線地圖</h2>'
+    yield from picture_html(images["okinawa_map_2"], "沖繩路線地圖", "w-full h-auto rounded-xl", IMAGES["okinawa_map_2"]["fallback"], eager=True)
+    yield '</div>'
+    yield '</div>'
+
+def render_days(store, meals):
+    days, day_events, events = store["days"], store["dayEvents"], store["events"]
+    yield '<div class="fade-in space-y-8">'
+    yield '<div class="flex gap-2 overflow-x-auto hide-scrollbar pb-2 sticky top-[110px] bg-[#f8fafc] z-40 py-2">'
+    for idx, day in enumerate(days):
+        yield f'''<button onclick="document.getElementById('day-{day.id}').scrollIntoView({{behavior:'smooth', block:'center'}})" class="px-4 py-1.5 rounded-full bg-white border border-slate-200 text-sm font-bold text-slate-600 shadow-sm whitespace-nowrap hover:bg-blue-50 hover:text-blue-600 transition-colors">D{idx + 1} {day.theme}</button>'''
+    yield '</div>'
+    for idx, (day_id, date, theme, rain_plan) in enumerate(days):
+        yield f'<div id="day-{day_id}" class="bg-white rounded-3xl shadow-sm border border-slate-100 overflow-hidden scroll-mt-32"><div class="bg-slate-50 px-6 py-4 border-b border-slate-100 flex justify-between items-center"><div><span class="text-xs font-bold text-blue-500 uppercase tracking-wider">Day {idx + 1}</span><h2 class="text-xl font-bold text-slate-800">{date}</h2></div><div class="text-right"><div class="text-sm font-bold text-slate-600">{theme}</div></div></div><div class="bg-blue-50/50 px-6 py-3 border-b border-blue-100/50 flex gap-3 text-sm text-blue-800"><i data-lucide="cloud-rain" class="w-4 h-4 shrink-0 mt-0.5"></i><span>{rain_plan}</span></div><div class="p-6 relative">'
+        for e_idx, j in enumerate(day_events[idx]):
+            ev = events[j]
+            is_nap = ev.tag == 'nap'
+            line = '' if e_idx == len(day_events[idx]) - 1 else '<div class="absolute left-[19px] top-8 bottom-[-32px] w-[2px] bg-slate-100 group-hover:bg-blue-100 transition-colors"></div>'
+            ring = 'bg-purple-100 text-purple-600 ring-4 ring-purple-50' if is_nap else 'bg-white border border-slate-200 text-slate-500 group-hover:border-blue-300 group-hover:text-blue-500'
+            card = 'bg-purple-50 border-purple-100' if is_nap else 'bg-white border-slate-100 hover:border-blue-200'
+            note_html = f'<span class="text-xs bg-slate-100 text-slate-500 px-2 py-1 rounded flex items-center gap-1"><i data-lucide="sticky-note" width="12"></i> {ev.note}</span>' if ev.note else ''
+            title, desc, plan_b, href = _event_display(ev, j, store["food"], meals)
+            # 綁定餐廳時段的事件標上 data-meal 與可更新的欄位，改選時瀏覽器端只修改這些節點
+            bound = ev.slot in meals
+            field = (lambda name: f' data-field="{name}"') if bound else (lambda name: "")
+            meal_attr = f' data-meal="{ev.slot}" data-event="{j}"' if bound else ""
+            if bound:
+                plan_b_html = f'<span class="text-xs bg-amber-50 text-amber-700 px-2 py-1 rounded border border-amber-100 flex items-center gap-1" data-show="planB"{"" if plan_b else " hidden"}><i data-lucide="info" width="12"></i>備案：<span data-field="planB">{plan_b}</span></span>'
+            else:
+                plan_b_html = f'<span class="text-xs bg-amber-50 text-amber-700 px-2 py-1 rounded border border-amber-100 flex items-center gap-1"><i data-lucide="info" width="12"></i>備案：{plan_b}</span>' if plan_b else ''
+            yield f'<div class="flex gap-4 relative group" data-doc="ev-{j}"{meal_attr}>{line}<div class="flex flex-col items-center min-w-[50px] z-10"><span class="text-[10px] font-bold font-mono mb-1 text-slate-400">{ev.time}</span><div class="w-10 h-10 rounded-full flex items-center justify-center {ring} transition-all shadow-sm"><i data-lucide="{ev.icon}" width="18"></i></div></div><div class="flex-1 pb-8"><div class="{card} border rounded-2xl p-4 transition-all shadow-sm"><div class="flex justify-between items-start mb-2"><h3 class="font-bold text-lg text-slate-800"{field("title")}>{title}</h3><span class="tag tag-{ev.tag}">{TAG_LABELS.get(ev.tag, "其他")}</span></div><p class="text-sm text-slate-600 leading-relaxed mb-3"{field("desc")}>{desc}</p><div class="flex flex-wrap gap-2">{plan_b_html}{note_html}<a href="{href}" target="_blank" class="text-xs bg-blue-50 text-blue-600 px-2 py-1 rounded border border-blue-100 flex items-center gap-1 hover:bg-blue-100 transition-colors ml-auto"{field("map")}><i data-lucide="map-pin" width="12"></i> 導航</a></div></div></div></div>'
+        yield '</div></div>'
+    yield '</div>'
+
+def render_churaumi(store, images):
+    yield '<div class="fade-in space-y-8">'
+    yield '<div><h2 class="font-bold text-slate-800 mb-3 text-xl flex items-center gap-2"><i data-lucide="fish" class="text-cyan-500"></i> 美麗海水族館攻略</h2>'
+    yield from picture_html(images["churaumi_map"], "美麗海園區地圖", "hero-img", IMAGES["churaumi_map"]["fallback"])
+    yield '</div>'
+    yield '<div class="bg-white rounded-2xl shadow-sm border border-slate-100 p-5"><h3 class="font-bold text-lg text-slate-700 mb-4 flex items-center gap-2"><i data-lucide="clock" class="text-blue-500"></i> 表演時刻表</h3>'
+    yield from picture_html(images["churaumi_timetable"], "表演時間表", "w-full h-auto rounded-lg mb-6 border border-slate-200", IMAGES["churaumi_timetable"]["fallback"])
+    yield '<div class="space-y-4">'
+    for i, (time_, title, desc) in enumerate(store["churaumi"]["shows"]):
+        yield f'<div class="flex gap-4 border-b border-slate-50 pb-3 last:border-0 last:pb-0" data-doc="show-{i}"><div class="text-blue-600 font-mono font-bold text-lg min-w-[50px]">{time_}</div><div><div class="font-bold text-slate-800">{title}</div><p class="text-sm text-slate-500 mt-1">{desc}</p></div></div>'
+    yield '</div></div>'
+    yield '<div class="bg-cyan-50 rounded-2xl border border-cyan-100 p-5"><h3 class="font-bold text-lg text-cyan-800 mb-4 flex items-center gap-2"><i data-lucide="lightbulb" class="text-cyan-600"></i> 達人筆記</h3><div class="space-y-3">'
+    for i, (_, title, desc) in enumerate(store["churaumi"]["tips"]):
+        yield f'<div class="flex gap-3 items-start" data-doc="tip-{i}"><i data-lucide="check-circle" class="w-5 h-5 text-cyan-500 shrink-0 mt-0.5"></i><div class="text-sm text-cyan-900 leading-relaxed"><span class="font-bold block mb-1">{title.replace("✅ ", "", 1)}</span>{desc}</div></div>'
+    yield '</div></div></div>'
+
+def render_foodmap(store):
+    """篩選按鈕預先渲染；卡片資料在頁面共用的 data-foodmap (見 foodmap_data)，由瀏覽器端虛擬捲動只建立視窗附近的卡片"""
+    cats = store["foodCats"]
+    yield '<div class="fade-in space-y-6">'
+    yield '<div class="sticky top-[110px] bg-slate-50/95 backdrop-blur z-30 py-2 -mx-4 px-4 border-b border-slate-200 flex gap-2 overflow-x-auto hide-scrollbar">'
+    for cat in ["全部"] + sorted(cats):
+        active = 'active' if cat == '全部' else ''
+        yield f'''<button onclick="filterFood('{cat}')" class="filter-btn px-4 py-1.5 rounded-full bg-white border border-slate-200 text-sm font-bold text-slate-600 whitespace-nowrap transition-all {active}">{cat}</button>'''
+    yield '</div><div id="food-grid" data-virtual="foodmap"></div></div>'
+
+def foodmap_data(store):
+    """
+    美食資料 (美食地圖卡片與餐廳排程共用；單檔模式內嵌於頁面，--split 時另存成資料區塊，見 SPLIT_DATA)：
+    food 為 [店名, 分類, 說明, 日期, 地圖查詢字]，查詢字與店名相同時省略 (瀏覽器端改用店名)
+    """
+    return {"cats": store["foodCats"], "catFood": store["catFood"],
+            "food": [[f.name, f.category, f.desc, f.day_info, "" if f.query == f.name else f.query] for f in store["food"]]}
+
+def render_planner(store):
+    food, cats = store["food"], store["foodCats"]
+    yield '<div class="fade-in space-y-8"><div class="bg-orange-50 p-4 rounded-xl border border-orange-100 text-orange-800 text-sm"><i data-lucide="info" class="inline w-4 h-4 mr-1"></i> 在此勾選您想吃的餐廳，<strong>每日行程</strong>與<strong>詳細總表</strong>會自動更新！</div>'
+    for slot in sorted(store["slots"]):
+        options = store["slots"][slot]
+        day_label = food[options[0]].day_info or slot
+        yield f'<div class="bg-white rounded-2xl shadow-sm border border-slate-100 overflow-hidden"><div class="bg-slate-50 px-4 py-3 border-b border-slate-100 font-bold text-slate-700 flex items-center gap-2"><span class="bg-white border border-slate-200 px-2 py-0.5 rounded text-xs text-slate-500 font-mono">{slot}</span>{day_label}</div><div class="p-4 space-y-3">'
+        for idx, i in enumerate(options):
+            name, cat, desc = food[i].name, food[i].category, food[i].desc
+            checked = 'checked' if idx == 0 else ''
+            yield f'''<label class="block relative cursor-pointer group"><input type="radio" name="{slot}" value="{idx}" class="peer sr-only meal-radio" {checked} onchange="updateMeal('{slot}', {idx})"><div class="p-3 rounded-xl border border-slate-200 bg-white hover:bg-slate-50 transition-all flex items-start gap-3"><div class="w-5 h-5 rounded-full border border-slate-300 flex items-center justify-center bg-white peer-checked:border-orange-500 peer-checked:bg-orange-500 mt-0.5 shrink-0"><div class="w-2 h-2 rounded-full bg-white opacity-0 check-icon transition-opacity"></div></div><div class="flex-1"><div class="flex justify-between items-start"><h4 class="font-bold text-slate-800 text-sm">{name}</h4><span class="text-[10px] bg-slate-100 text-slate-500 px-1.5 rounded">{cats[cat]}</span></div><p class="text-xs text-slate-500 mt-1">{desc}</p></div></div></label>'''
+        yield '</div></div>'
+    yield '<h3 class="font-bold text-lg text-slate-700 mt-8 mb-4">✨ 更多推薦 (口袋名單)</h3><div class="grid gap-3 sm:grid-cols-2">'
+    for i in store["extra"]:
+        yield f'<div class="bg-white p-3 rounded-xl border border-slate-100 flex gap-3 items-center"><div class="w-10 h-10 rounded-full bg-pink-50 flex items-center justify-center text-pink-500 font-bold text-xs shrink-0">推</div><div><div class="font-bold text-sm text-slate-800">{food[i].name}</div><div class="text-xs text-slate-500">{food[i].desc}</div></div></div>'
+    yield '</div></div>'
+
+def render_hotel(store, acc_html):
+    yield f'<div class="fade-in space-y-8"><div><h2 class="text-xl font-bold text-slate-800 mb-4 flex items-center gap-2"><i data-lucide="bed" class="text-indigo-500"></i> 住宿安排</h2>{acc_html}</div><div><h2 class="text-xl font-bold text-slate-800 mb-4 flex items-center gap-2"><i data-lucide="car" class="text-blue-500"></i> 租車資訊</h2><div class="grid gap-4 sm:grid-cols-2">'
+    for category, title, details in store["car"]:
+        yield f'<div class="bg-white p-4 rounded-xl border border-slate-100 shadow-sm"><span class="text-[10px] font-bold text-slate-400 uppercase tracking-wider block mb-1">{category}</span><h3 class="font-bold text-slate-700 mb-2">{title}</h3><p class="text-sm text-slate-600 leading-relaxed">{details}</p></div>'
+    yield '</div></div></div>'
+
+def render_prep(store):
+    yield '<div class="fade-in space-y-8"><div><h2 class="text-xl font-bold text-slate-800 mb-4 flex items-center gap-2"><i data-lucide="backpack" class="text-purple-500"></i> 攜帶物品</h2><div class="grid gap-4 sm:grid-cols-2">'
+    def item_html(n, item, note):
+        note_html = f'<span class="text-xs text-slate-400">{note}</span>' if note else ''
+        return f'<li class="checklist-item flex items-start gap-3" data-doc="pack-{n}"><input type="checkbox" class="mt-1 w-4 h-4 accent-purple-600 rounded border-slate-300 cursor-pointer"><div class="flex-1"><span class="text-sm text-slate-700 font-medium block">{item}</span>{note_html}</div></li>'
+    n = 0
+    for category, items in store["packing"]:
+        items_html = "".join(item_html(n + k, item, note) for k, (item, note) in enumerate(items))
+        n += len(items)
+        yield f'<div class="bg-white p-5 rounded-2xl border border-purple-50 shadow-sm"><h3 class="font-bold text-purple-700 mb-3 border-b border-purple-50 pb-2">{category}</h3><ul class="space-y-3">{items_html}</ul></div>'
+    yield '</div></div><div><h2 class="text-xl font-bold text-slate-800 mb-4 flex items-center gap-2"><i data-lucide="shopping-bag" class="text-pink-500"></i> 購物攻略</h2><div class="space-y-4">'
+    for i, (location, desc, items) in enumerate(store["shopping"]):
+        items_html = "".join(f'<span class="bg-pink-50 text-pink-700 text-xs px-2.5 py-1 rounded-md border border-pink-100 flex items-center gap-1"><i data-lucide="check" width="10"></i> {i}</span>' for i in items)
+        yield f'<div class="bg-white p-5 rounded-2xl border border-pink-50 shadow-sm flex flex-col sm:flex-row gap-4" data-doc="shop-{i}"><div class="sm:w-1/3 border-b sm:border-b-0 sm:border-r border-pink-50 pb-3 sm:pb-0 sm:pr-4"><h3 class="font-bold text-pink-700 text-lg">{location}</h3><p class="text-sm text-slate-500 mt-1">{desc}</p></div><div class="flex-1"><div class="flex flex-wrap gap-2">{items_html}</div></div></div>'
+    yield '</div></div></div>'
+
+def render_fulltable(store, meals):
+    """
+    表頭預先渲染，表身只輸出資料 (虛擬捲動)：rows 為 [日, 時間, 活動, 說明, 備案]，
+    綁定餐廳時段的事件為 [日, 時間, slot]，顯示內容由頁面共用的 MEAL_SLOTS 與 data-foodmap 組出。日為 days 的索引或原始字串。
+    """
+    days = [d.date for d in store["days"]]
+    rows = [[ev.day, ev.time, ev.slot] if ev.slot in meals else [ev.day, ev.time, ev.title, ev.desc, ev.plan_b]
+            for ev in store["events"]]
+    yield '<div class="fade-in bg-white rounded-xl shadow-sm border border-slate-200 overflow-hidden"><div class="p-4 bg-slate-50 border-b border-slate-200 flex justify-between items-center"><h2 class="font-bold text-slate-700">📋 行程詳細總表 (動態更新)</h2></div><div class="overflow-x-auto"><table class="w-full min-w-[640px] table-fixed text-sm text-left text-slate-500"><thead class="text-xs text-slate-700 uppercase bg-slate-50"><tr><th class="px-4 py-3 w-28">Day</th><th class="px-4 py-3 w-20">時間</th><th class="px-4 py-3 w-40">活動</th><th class="px-4 py-3">詳細說明</th><th class="px-4 py-3 w-40">備案</th></tr></thead><tbody data-virtual="fulltable"></tbody></table></div>'
+    yield '<script type="application/json" id="data-fulltable">'
+    yield from iter_dataset("fulltable", {"days": days, "rows": rows})
+    yield '</script></div>'
+
+# --- 7. 搜尋索引：建置時產生倒排索引，瀏覽器端每個詞只需一次 Map 查詢 ---
+# 中日韓文字取相鄰兩字 (bigram)，英數字 (含 map_query 的羅馬拼音店名) 取長度 2 以上的前綴，可邊打邊搜；
+# 以陣列輸出：terms 為空白分隔的詞，counts[i] 為第 i 個詞的文件數，postings 依序為各詞的文件編號差值
+SEARCH_TOKEN_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+|[a-z0-9]+")
+SEARCH_PREFIX_MAX = 12
+SEARCH_KINDS = (  # (分頁, data-doc 前綴, 標籤)
+    ("days", "ev", "行程"), ("foodmap", "food", "美食"), ("prep", "shop", "購物"),
+    ("prep", "pack", "行李"), ("churaumi", "show", "表演"), ("churaumi", "tip", "美麗海"),
+)
+
+def search_terms(text):
+    """正規化 (NFKC、小寫) 後切出索引詞；瀏覽器端的查詢以相同規則切詞"""
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    terms = set()
+    for run in SEARCH_TOKEN_RE.findall(text.lower()):
+        if run[0] < "\u3040":  # 英數字
+            terms.update(run[:n] for n in range(2, min(len(run), SEARCH_PREFIX_MAX) + 1))
+        elif len(run) == 1:
+            terms.add(run)
+        else:
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+# 各資料來源 (名稱, 輸入 CSV) 的部分索引分開快取：只改一份 CSV 時只需重新切詞該來源，再合併
+SEARCH_SOURCES = (("events", ("daily", "itinerary")), ("food", ("food",)), ("shopping", ("shopping",)),
+                  ("packing", ("packing",)), ("churaumi", ("churaumi",)))
+
+def _search_docs(store, source):
+    """逐筆產生 source 的 (種類, 分頁內編號, 標題, 副標, 索引文字)；分頁內編號與渲染時的 data-doc 一致"""
+    if source == "events":
+        for i, ev in enumerate(store["events"]):
+            yield 0, i, ev.title, f"{_event_day(store, ev)} {ev.time}", (ev.title, ev.desc, ev.note, ev.plan_b, TAG_LABELS.get(ev.tag, ""))
+    elif source == "food":
+        cats = store["foodCats"]
+        for i, f in enumerate(store["food"]):
+            yield 1, i, f.name, cats[f.category], (f.name, cats[f.category], f.desc, f.day_info, f.query)
+    elif source == "shopping":
+        for i, (location, desc, items) in enumerate(store["shopping"]):
+            yield 2, i, location, desc, (location, desc, *items)
+    elif source == "packing":
+        n = 0
+        for category, items in store["packing"]:
+            for item, note in items:
+                yield 3, n, item, category, (item, note, category)
+                n += 1
+    elif source == "churaumi":
+        for i, (time_, title, desc) in enumerate(store["churaumi"]["shows"]):
+            yield 4, i, title, time_, (title, desc)
+        for i, (_, title, desc) in enumerate(store["churaumi"]["tips"]):
+            yield 5, i, title.replace("✅ ", "", 1), "達人筆記", (title, desc)
+
+def search_partial(store, source):
+    """單一資料來源的部分索引：docs 與 {詞: [來源內的文件序號]}"""
+    docs, postings = [], {}
+    for doc, (kind, local, title, sub, texts) in enumerate(_search_docs(store, source)):
+        docs.append([kind, local, title, sub])
+        for term in search_terms(" ".join(texts)):
+            postings.setdefault(term, []).append(doc)
+    return {"docs": docs, "postings": postings}
+
+def merge_search_index(partials):
+    """依 SEARCH_SOURCES 的順序串接各來源的部分索引，文件編號加上前面來源的文件數"""
+    docs, postings = [], {}
+    for part in partials:
+        offset = len(docs)
+        docs += part["docs"]
+        for term, ids in part["postings"].items():
+            postings.setdefault(term, []).extend([i + offset for i in ids] if offset else ids)
+    terms = sorted(postings)
+    counts, deltas = [], []
+    for term in terms:
+        docs_of_term = postings[term]
+        counts.append(len(docs_of_term))
+        prev = 0
+        for doc in docs_of_term:
+            deltas.append(doc - prev)
+            prev = doc
+    return {"kinds": [list(kind) for kind in SEARCH_KINDS], "docs": docs,
+            "terms": " ".join(terms), "counts": counts, "postings": deltas}
+
+def build_search_index(store):
+    return merge_search_index([search_partial(store, source) for source, _ in SEARCH_SOURCES])
+
+def _js_json(value):
+    """緊湊 JSON，並跳脫 </ 以便安全地放進 <script>"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+def iter_js_json(value):
+    """與 _js_json 相同的輸出，但逐段產生 (字串值整段輸出，跳脫不會被切開)，可直接寫進串流"""
+    for chunk in _JSON_ENCODER.iterencode(value):
+        yield chunk.replace("</", "<\\/")
+
+def iter_dataset(name, value):
+    """嵌入頁面的 JSON 資料集 (併成區塊串流輸出)；剖析時記錄其序列化耗時與位元組數 (json:<name>)"""
+    return profile_iter(f"json:{name}", iter_blocks(iter_js_json(value)), count_bytes=True)
+
+def iter_blocks(fragments, size=STREAM_BLOCK):
+    """把細碎的片段 (如 iterencode 的逐個 token) 併成約 size 字元的區塊，減少後續逐段處理的次數"""
+    buf, pending = [], 0
+    for fragment in fragments:
+        buf.append(fragment)
+        pending += len(fragment)
+        if pending >= size:
+            yield "".join(buf)
+            buf, pending = [], 0
+    if buf:
+        yield "".join(buf)
+
+def iter_js_string(fragments):
+    """逐段輸出 JS 字串常值 (含引號)，並跳脫 </ (含跨片段的情形) 以便安全地放進 <script>"""
+    yield '"'
+    after_lt = False
+    for fragment in fragments:
+        s = json.dumps(fragment, ensure_ascii=False)[1:-1].replace("</", "<\\/")
+        if not s:
+            continue
+        if after_lt and s[0] == "/":
+            s = "\\" + s
+        after_lt = s[-1] == "<"
+        yield s
+    yield '"'
+
+def write_chunks(chunks, out_dir, cache, compress=(), data=None):
+    """
+    將各分頁的 HTML 片段串流寫成 chunks/<name>.<hash>.js，清掉舊版本；
+    chunks 為 {name: 片段產生器}，data 為 {資料集名稱: JSON 片段產生器} (寫成 chunks/data-<name>.<hash>.js，
+    載入時呼叫 __data)，回傳 ({區塊名稱: 網址}, {區塊名稱: 位元組數})。
+    """
+    chunk_dir = os.path.join(out_dir, CHUNK_DIR)
+    os.makedirs(chunk_dir, exist_ok=True)
+    jobs = [(name, "__chunk", name, iter_js_string(fragments)) for name, fragments in chunks.items()]
+    jobs += [(f"data-{name}", "__data", name, fragments) for name, fragments in (data or {}).items()]
+    urls, sizes = {}, {}
+    for chunk, callback, name, body in jobs:
+        with cache.open_output(os.path.join(chunk_dir, f"{chunk}.js"), compress, content_named=True) as out:
+            out.write(f"{callback}({json.dumps(name)},")
+            out.write_all(body)
+            out.write(");")
+        urls[chunk] = f"{CHUNK_DIR}/{os.path.basename(out.path)}"
+        sizes[chunk] = out.size
+    current = {url.rsplit("/", 1)[-1] for url in urls.values()}
+    for stale in os.listdir(chunk_dir):
+        if stale.split(".js", 1)[0] + ".js" not in current and stale.endswith((".js", ".js.gz", ".js.br")):
+            os.remove(os.path.join(chunk_dir, stale))
+    return urls, sizes
+
+# --- PWA：離線可用的 manifest 與 Service Worker (--pwa) ---
+# 預先快取清單來自實際建置輸出：檔名含雜湊者直接以網址為鍵，其餘 (index.html 等) 附上內容版本，
+# 安裝時只下載新增或變動的項目，啟用時清掉已不在清單中的舊版本
+SW_TEMPLATE = """// 由 generator.py 產生，請勿手動修改
+const PRECACHE = __PRECACHE__;
+const RUNTIME_IMAGES = __RUNTIME_IMAGES__;  // {首次使用才快取的圖片網址: 離線時代替的預先快取圖片或 null}
+const SCOPE = self.registration.scope;
+const PRECACHE_NAME = `okinawa-precache:${SCOPE}`;
+const IMAGE_CACHE_NAME = `okinawa-images:${SCOPE}`;
+const FONT_CACHE_NAME = 'okinawa-fonts';
+const FONT_CSS_ORIGIN = 'https://fonts.googleapis.com';
+const FONT_FILE_ORIGIN = 'https://fonts.gstatic.com';
+
+const absolute = url => new URL(url, self.location).href;
+const cacheKeys = new Map(PRECACHE.map(([url, rev]) => [absolute(url), rev ? `${absolute(url)}?__rev=${rev}` : absolute(url)]));
+const imageFallbacks = new Map(Object.entries(RUNTIME_IMAGES).map(([url, fallback]) => [absolute(url), fallback && absolute(fallback)]));
+const indexKey = cacheKeys.get(absolute('index.html'));
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(PRECACHE_NAME);
+        const cached = new Set((await cache.keys()).map(request => request.url));
+        await Promise.all([...cacheKeys].filter(([, key]) => !cached.has(key)).map(async ([url, key]) => {
+            const response = await fetch(url, { cache: 'no-cache' });
+            if (!response.ok) throw new Error(`${url}: ${response.status}`);
+            await cache.put(key, response);
+        }));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const wanted = [[PRECACHE_NAME, new Set(cacheKeys.values())], [IMAGE_CACHE_NAME, new Set(imageFallbacks.keys())]];
+        for (const [name, keep] of wanted) {
+            const cache = await caches.open(name);
+            for (const request of await cache.keys()) {
+                if (!keep.has(request.url)) await cache.delete(request);
+            }
+        }
+        await self.clients.claim();
+    })());
+});
+
+async function cacheFirst(cacheName, request, key = request) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(key);
+    if (cached) return cached;
+    const response = await fetch(request);
+    if (response.ok || response.type === 'opaque') await cache.put(key, response.clone());
+    return response;
+}
+
+async function staleWhileRevalidate(cacheName, request, event) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request);
+    const update = fetch(request).then(async response => {
+        if (response.ok || response.type === 'opaque') await cache.put(request, response.clone());
+        return response;
+    });
+    if (!cached) return update;
+    event.waitUntil(update.catch(() => {}));
+    return cached;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+    const bare = url.origin + url.pathname;
+    let key = cacheKeys.get(bare);
+    if (!key && request.mode === 'navigate' && bare === SCOPE) key = indexKey;
+    if (key) {
+        event.respondWith(cacheFirst(PRECACHE_NAME, request, key));
+    } else if (imageFallbacks.has(bare)) {
+        // 圖片有多種格式與寬度，只快取瀏覽器實際用到的那一份；離線且尚未快取時改回應同格式預先快取的最小寬度
+        event.respondWith(cacheFirst(IMAGE_CACHE_NAME, request, bare).catch(async () => {
+            const fallback = imageFallbacks.get(bare);
+            const cached = fallback && await (await caches.open(PRECACHE_NAME)).match(cacheKeys.get(fallback));
+            return cached || Response.error();
+        }));
+    } else if (url.origin === FONT_FILE_ORIGIN) {
+        event.respondWith(cacheFirst(FONT_CACHE_NAME, request));
+    } else if (url.origin === FONT_CSS_ORIGIN) {
+        event.respondWith(staleWhileRevalidate(FONT_CACHE_NAME, request, event));
+    }
+});
+"""
+
+# 關閉 --pwa 後取代舊的 sw.js：瀏覽器更新檢查拿到這個版本後清掉此頁的快取並解除註冊，
+# 已開啟的頁面重新載入成網路上的最新版 (只刪除 sw.js 會 404，舊的 worker 仍會繼續提供快取的舊頁面)
+SW_KILL_SWITCH = """// 由 generator.py 產生：此網站已停用 PWA，清除快取並解除註冊，請勿手動修改
+const SCOPE = self.registration.scope;
+
+self.addEventListener('install', () => self.skipWaiting());
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        for (const name of await caches.keys()) {
+            if (name === 'okinawa-fonts' || (name.startsWith('okinawa-') && name.endsWith(`:${SCOPE}`))) await caches.delete(name);
+        }
+        await self.registration.unregister();
+        for (const client of await self.clients.matchAll({ type: 'window' })) client.navigate(client.url);
+    })());
+});
+"""
+
+PWA_REGISTER_JS = "if ('serviceWorker' in navigator && location.protocol !== 'file:') navigator.serviceWorker.register('sw.js');"
+
+def app_icon_svg():
+    """主畫面圖示：與導覽列相同的藍底飛機"""
+    return ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 512 512"><rect width="512" height="512" rx="112" fill="#3b82f6"/>'
+            '<svg x="112" y="112" width="288" height="288" viewBox="0 0 24 24" fill="none" stroke="#fff" stroke-width="2" '
+            f'stroke-linecap="round" stroke-linejoin="round">{ICONS["plane"]}</svg></svg>')
+
+def pwa_head_tags():
+    return (f'\n    <link rel="manifest" href="{PWA_MANIFEST_FILE}">'
+            f'\n    <meta name="theme-color" content="{PWA_THEME_COLOR}">'
+            f'\n    <link rel="icon" href="{PWA_ICON_FILE}" type="image/svg+xml">')
+
+def write_pwa(out_dir, trip, index_digest, hashed_urls, image_urls, cache):
+    """
+    輸出 manifest、圖示與 sw.js；index_digest 為 index.html 的內容雜湊，hashed_urls 為檔名已含雜湊的輸出 (CSS、分頁區塊)，
+    image_urls 為 {圖片網址: 離線備用圖網址或 None} (見 _offline_images)：備用圖預先快取 (延遲載入的圖片沒開過也能離線顯示)，
+    其他格式與寬度首次使用時才快取。回傳 (預先快取項目數, 本次變動數)。
+    """
+    manifest = json.dumps({
+        "name": trip["title"], "short_name": trip["brand"], "start_url": "./", "scope": "./",
+        "display": "standalone", "background_color": "#f8fafc", "theme_color": PWA_THEME_COLOR,
+        "icons": [{"src": PWA_ICON_FILE, "sizes": "any", "type": "image/svg+xml", "purpose": "any"}],
+    }, ensure_ascii=False, indent=2).encode("utf-8")
+    icon = app_icon_svg().encode("utf-8")
+    precache = [["index.html", index_digest[:10]], [PWA_MANIFEST_FILE, _sha(manifest)[:10]],
+                [PWA_ICON_FILE, _sha(icon)[:10]]] + [[url, None] for url in sorted(set(hashed_urls) | {url for url in image_urls.values() if url})]
+    runtime_images = {url: fallback for url, fallback in sorted(image_urls.items()) if url != fallback}
+    sw = (SW_TEMPLATE.replace("__PRECACHE__", _js_json(precache))
+          .replace("__RUNTIME_IMAGES__", _js_json(runtime_images)).encode("utf-8"))
+
+    cache.write_output(os.path.join(out_dir, PWA_MANIFEST_FILE), manifest)
+    cache.write_output(os.path.join(out_dir, PWA_ICON_FILE), icon)
+    sw_path = os.path.join(out_dir, PWA_SW_FILE)
+    cache.write_output(sw_path, sw)
+    previous = cache.manifest.setdefault("precache", {}).get(sw_path, [])
+    cache.manifest["precache"][sw_path] = precache
+    return len(precache), len([entry for entry in precache if entry not in previous])
+
+def retire_pwa(out_dir, cache):
+    """先前以 --pwa 建置過 (out_dir 有 sw.js) 時改寫成 SW_KILL_SWITCH，並移除其預先快取紀錄；回傳是否改寫"""
+    sw_path = os.path.join(out_dir, PWA_SW_FILE)
+    if not os.path.exists(sw_path):
+        return False
+    cache.manifest.get("precache", {}).pop(sw_path, None)
+    return cache.write_output(sw_path, SW_KILL_SWITCH.encode("utf-8"))
+
+def _asset_urls(asset):
+    """圖片輸出的所有網址 (各格式、各寬度)；內嵌或找不到的圖片為空"""
+    if asset is None or asset.get("inline"):
+        return []
+    srcsets = [asset["srcset"]] + [s["srcset"] for s in asset["sources"]]
+    return list(dict.fromkeys([asset["src"]] + [u.split(" ")[0] for srcset in srcsets for u in srcset.split(", ") if u]))
+
+def _offline_images(asset):
+    """
+    {圖片網址: 離線備用圖網址或 None}：只預先快取第一種新格式 (AVIF 或 WebP) 的最小寬度，同格式的其他寬度離線時以它代替；
+    其他格式 (瀏覽器選了它表示不支援該新格式) 不備用，首次使用時才快取
+    """
+    urls = dict.fromkeys(_asset_urls(asset))
+    if urls and asset["sources"]:
+        modern = [u.split(" ")[0] for u in asset["sources"][0]["srcset"].split(", ") if u]
+        urls.update(dict.fromkeys(modern, modern[0]))
+    return urls
+
+def _assets_exist(asset_dir, asset):
+    return all(os.path.exists(os.path.join(asset_dir, u.rsplit("/", 1)[-1])) for u in _asset_urls(asset))
+
+def generate_html(out_dir=".", inline_max=INLINE_MAX_BYTES, css_mode="inline", force=False, cache=None,
+                  src_dir=".", asset_dir=None, asset_url=ASSET_DIR, split=False, pwa=False, compress=(), write=True):
+    """
+    各分頁以片段產生器渲染，邊產生邊寫入輸出檔，記憶體用量不隨行程大小成長；回傳 Page。
+    src_dir: CSV、圖片與 trip.json 所在的行程資料夾
+    split: 輸出精簡的殼頁面，各分頁資料另存為雜湊 JS 區塊於首次使用時載入 (預設為可離線分享的單一檔案)
+    pwa: 另外輸出 manifest 與 Service Worker，重複開啟時直接從快取載入並可完全離線使用
+    asset_dir / asset_url: 圖片與 CSS 的輸出位置及其在頁面中的網址前綴
+    (預設為 out_dir/assets；批次建置時指向共用目錄以去除重複)
+    compress: 另外串流輸出 "gzip" / "br" 壓縮檔 (index.html.gz 等)，供伺服器直接回應
+    write: False 時 index.html 只在記憶體中渲染 (Page.variants)，不寫入 out_dir；圖片與 CSS 檔仍輸出至 asset_dir
+    """
+    if not write and (split or pwa):
+        raise ValueError("split / pwa 模式需要寫出多個檔案，不支援只在記憶體中渲染")
+    print("🚀 正在讀取 CSV 資料並產生互動版網頁...")
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+    if asset_dir is None:
+        asset_dir = os.path.join(out_dir, ASSET_DIR)
+    if cache is None:
+        cache = BuildCache(force=force, src_dir=src_dir)
+    else:
+        cache.begin()
+    paths = {key: os.path.join(src_dir, filename) for key, filename in FILES.items()}
+    trip = load_trip(src_dir)
+
+    # --- 0. 圖片處理 (響應式、雜湊命名、快取) ---
+    print("📸 正在處理圖片...")
+    images = {}
+    with profile_phase("images"):
+        for key, cfg in IMAGES.items():
+            with profile_phase(f"image:{key}"):
+                images[key] = cache.section(
+                    f"image:{key}", [cache.file_hash(os.path.join(src_dir, cfg["src"])), os.path.abspath(asset_dir), asset_url, inline_max],
+                    lambda cfg=cfg: build_image(os.path.join(src_dir, cfg["src"]), asset_dir, asset_url, inline_max,
+                                                cache_dir=cache.cache_dir, force=force),
+                    valid=lambda asset: _assets_exist(asset_dir, asset))
+    if _profile is not None:
+        for key, asset in images.items():
+            files = [os.path.join(asset_dir, url.rsplit("/", 1)[-1]) for url in _asset_urls(asset)]
+            if files:
+                _profile.add_bytes(f"asset:{key}", sum(os.path.getsize(f) for f in files if os.path.exists(f)))
+
+    # --- 1~5. 資料處理 (各區段只在其輸入 CSV 變動時重新計算) ---
+    with profile_phase("data"):
+        store = build_store(paths, cache)
+    acc_html = store["accHtml"]
+
+    # 正規化 store 與舊版各檢視分開序列化的資料量比較 (以所有 CSV 雜湊快取)
+    files = {key: cache.file_hash(path) for key, path in paths.items()}
+    legacy_bytes, store_bytes = cache.section(
+        "legacy_payload", [files[k] for k in sorted(files)],
+        lambda: [legacy_payload_bytes(store, paths["weather"]),
+                 len(_js_json({k: v for k, v in store.items() if k != "accHtml"}).encode("utf-8"))])
+    print(f"📦 資料量：舊格式 {legacy_bytes / 1024:.1f} KB → 正規化 {store_bytes / 1024:.1f} KB "
+          f"(-{(1 - store_bytes / max(legacy_bytes, 1)) * 100:.0f}%)")
+
+    # --- 7. 搜尋索引 (以 CSV 雜湊快取；序列化後的索引另存成檔案，命中時直接串流進頁面) ---
+    search_deps = {source: [files[key] for key in keys] for source, keys in SEARCH_SOURCES}
+    search_start = time.perf_counter()
+    search_cached = cache.lookup_blob("search_index", search_deps)
+    search_index = None
+    if search_cached is None:
+        with profile_phase("search_index"):
+            partials = []
+            for source, _ in SEARCH_SOURCES:
+                value = cache.lookup_blob(f"search:{source}", search_deps[source])
+                if value is not None:
+                    partial = json.loads(b"".join(cache.read_blob(value)))
+                else:
+                    partial = search_partial(store, source)
+                    for _ in cache.store_blob(f"search:{source}", search_deps[source],
+                                              [json.dumps(partial, ensure_ascii=False, separators=(",", ":"))]):
+                        pass
+                partials.append(partial)
+            search_index = merge_search_index(partials)
+        search_meta = {"docs": len(search_index["docs"]), "terms": len(search_index["counts"])}
+    else:
+        search_meta = search_cached
+    search_ms = (time.perf_counter() - search_start) * 1000
+    with profile_phase("meal_slots"):
+        meals = cache.section("meal_slots", [files["food"], files["itinerary"]], lambda: build_meal_slots(store))
+
+    # --- 6. 預先渲染各分頁 (片段產生器，寫出時才逐段產生) ---
+    # 各分頁的輸出、class 屬性與圖示以其輸入雜湊快取：只改一份 CSV 時，其餘分頁直接沿用上次的 HTML
+    print("🧱 正在預先渲染各分頁...")
+    image_deps = [images, [cache.file_hash(os.path.join(src_dir, cfg["src"])) for cfg in IMAGES.values()]]
+    itinerary_deps = [files["daily"], files["itinerary"], files["food"]]
+    renderers = {
+        "dashboard": ([trip, image_deps], lambda: render_dashboard(trip, images)),
+        "days": (itinerary_deps, lambda: render_days(store, meals)),
+        "churaumi": ([files["churaumi"], image_deps], lambda: render_churaumi(store, images)),
+        "foodmap": ([files["food"]], lambda: render_foodmap(store)),
+        "planner": ([files["food"]], lambda: render_planner(store)),
+        "hotel": ([files["car"], files["accommodation"]], lambda: render_hotel(store, acc_html)),
+        "prep": ([files["packing"], files["shopping"]], lambda: render_prep(store)),
+        "fulltable": (itinerary_deps, lambda: render_fulltable(store, meals)),
     }
+    # --- 圖示：只輸出用到的 sprite，取代執行期的 lucide.createIcons() ---
+    # 分頁 HTML 由少數樣板重複組成，寫出時順便收集去重後的 class 屬性供 CSS 掃描 (資料量大時省下大部分掃描時間)
+    icons_used, tab_classes = set(), set()
+    def cached_tab(tab):
+        """快取命中時回傳分頁的快取紀錄 (並併入其 class 與圖示)，否則回傳 None"""
+        value = cache.lookup_blob(f"tab:{tab}", renderers[tab][0])
+        if value is not None:
+            icons_used.update(value["icons"])
+            tab_classes.update(value["classes"])
+        return value
+
+    def render_tab(tab):
+        meta = {"icons": set(), "classes": set()}
+        def rendered():
+            for fragment in profile_iter(f"render:{tab}", renderers[tab][1]()):
+                fragment = replace_icon_tags(fragment, meta["icons"])
+                meta["classes"].update(CLASS_ATTR_RE.findall(fragment))
+                yield fragment
+            icons_used.update(meta["icons"])
+            tab_classes.update(meta["classes"])
+        return cache.store_blob(f"tab:{tab}", renderers[tab][0], rendered(), meta)
+
+    def fragments(tab):
+        value = cached_tab(tab)
+        return cache.read_blob_text(value) if value is not None else render_tab(tab)
+
+    # 預設分頁直接放進頁面；單檔模式其餘分頁也一併內嵌 (隱藏)，--split 模式則各自輸出為雜湊區塊
+    # (搜尋索引與美食資料也另存成區塊，殼頁面只留第一個分頁需要的內容)
+    prefetch_tags = ""
+    chunk_urls, chunk_deps, tab_sizes = {}, {}, {}
+    search_fragments = (cache.store_blob("search_index", search_deps, iter_dataset("search_index", search_index), search_meta)
+                        if search_cached is None else cache.read_blob_text(search_cached))
+    with profile_phase("render"):
+        if split:
+            data = {"foodmap": iter_dataset("foodmap", foodmap_data(store)), "search": search_fragments}
+            chunk_urls, tab_sizes = write_chunks({tab: fragments(tab) for tab in TABS[1:]}, out_dir, cache, compress, data)
+            for name, tabs in SPLIT_DATA.items():
+                for tab in tabs:
+                    chunk_deps.setdefault(tab, []).append(f"data-{name}")
+            prefetch = [dep for tab in PREFETCH_TABS for dep in chunk_deps.get(tab, [])] + list(PREFETCH_TABS)
+            prefetch_tags = "".join(f'\n    <link rel="prefetch" href="{chunk_urls[chunk]}" as="script">' for chunk in dict.fromkeys(prefetch))
+        if pwa:
+            prefetch_tags += pwa_head_tags()
+        # 頁首的 CSS 與 sprite 取決於所有分頁用到的 class 與圖示，內嵌的分頁先串流到暫存檔，最後再接進頁面
+        spool = tempfile.TemporaryFile()
+        panels = FragmentWriter([spool])
+        for i, tab in enumerate(TABS):
+            panels.write(f'\n        <section id="tab-{tab}" data-panel="{tab}"{"" if i == 0 else " hidden"}>')
+            if tab not in chunk_urls:
+                panels.flush()
+                start = panels.size
+                value = cached_tab(tab)
+                if value is not None:
+                    for block in cache.read_blob(value):
+                        panels.write_bytes(block)
+                else:
+                    panels.write_all(render_tab(tab))
+                panels.flush()
+                tab_sizes[tab] = panels.size - start
+            panels.write('</section>')
+        panels.flush()
+    print("📦 分頁 HTML：" + "、".join(f"{tab} {tab_sizes[tab] / 1024:.1f} KB" for tab in TABS))
+    if _profile is not None:
+        for tab, size in tab_sizes.items():
+            _profile.add_bytes(f"chunk:{tab}" if tab in chunk_urls else f"tab:{tab}", size)
 
     # --- HTML 樣板 (拆分以避免 f-string 錯誤) ---
-    
-    html_head = """<!DOCTYPE html>
-<html lang="zh-TW">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
-    <title>🌊 沖繩親子自駕攻略 2026</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script src="https://unpkg.com/lucide@latest"></script>
-    <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+TC:wght@300;400;500;700&family=Zen+Maru+Gothic:wght@500;700&display=swap" rel="stylesheet">
-    <style>
+    template_start = time.perf_counter()
+    page_css = """
         body { font-family: 'Zen Maru Gothic', 'Noto Sans TC', sans-serif; background-color: #f8fafc; color: #334155; padding-bottom: 80px; }
+        [hidden] { display: none !important; }
         .hide-scrollbar::-webkit-scrollbar { display: none; }
         .hide-scrollbar { -ms-overflow-style: none; scrollbar-width: none; }
         .tag { font-size: 0.7rem; padding: 2px 8px; border-radius: 6px; font-weight: bold; white-space: nowrap; }
@@ -213,16 +1669,32 @@ def generate_html():
         .meal-radio:checked + div .check-icon { opacity: 1; transform: scale(1); }
         .filter-btn.active { background-color: #f97316; color: white; border-color: #f97316; }
         .hero-img { width: 100%; height: auto; border-radius: 16px; box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.1); margin-bottom: 20px; object-fit: cover; }
-    </style>
+        .search-hit { animation: searchHit 1.6s ease-out; border-radius: 16px; }
+        @keyframes searchHit { from { box-shadow: 0 0 0 3px #0ea5e9; } to { box-shadow: 0 0 0 3px transparent; } }
+"""
+    
+    html_head_template = f"""<!DOCTYPE html>
+<html lang="zh-TW">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
+    <title>{trip['title']}</title>
+    <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+TC:wght@300;400;500;700&family=Zen+Maru+Gothic:wght@500;700&display=swap" rel="stylesheet">
+    {{css_tag}}{prefetch_tags}
 </head>"""
 
-    html_body_start = """
+    html_body_start = f"""
 <body class="bg-slate-50">
     <nav class="sticky top-0 z-50 bg-white/90 backdrop-blur-md shadow-sm border-b border-slate-200">
         <div class="max-w-4xl mx-auto px-4">
             <div class="flex items-center justify-between h-14">
-                <h1 class="text-lg font-bold text-slate-800 flex items-center gap-2"><span class="bg-blue-500 text-white p-1 rounded-md"><i data-lucide="plane" width="16"></i></span> 沖繩自駕趣</h1>
-                <div class="text-xs text-slate-500 font-mono">2026.07.19-25</div>
+                <h1 class="text-lg font-bold text-slate-800 flex items-center gap-2"><span class="bg-blue-500 text-white p-1 rounded-md"><i data-lucide="plane" width="16"></i></span> {trip['brand']}</h1>
+                <div class="relative flex-1 min-w-0 max-w-xs mx-3">
+                    <input id="search-input" type="search" autocomplete="off" placeholder="搜尋行程、美食、購物..." aria-label="搜尋" class="w-full pl-8 pr-3 py-1.5 text-sm rounded-full bg-slate-100 border border-slate-200 focus:bg-white focus:border-blue-300 outline-none">
+                    <i data-lucide="search" width="14" class="absolute left-3 top-[9px] text-slate-400 pointer-events-none"></i>
+                    <div id="search-results" class="absolute right-0 top-full mt-2 w-80 max-w-[90vw] max-h-[70vh] overflow-y-auto bg-white rounded-2xl shadow-lg border border-slate-100 p-2" hidden></div>
+                </div>
+                <div class="text-xs text-slate-500 font-mono">{trip['dates']}</div>
             </div>
             <div class="flex overflow-x-auto hide-scrollbar -mx-4 px-4 pb-1 gap-2 text-sm whitespace-nowrap">
                 <button onclick="switchTab('dashboard')" class="nav-btn active" data-tab="dashboard">總覽</button>
@@ -237,198 +1709,777 @@ def generate_html():
         </div>
     </nav>
 
-    <main id="content-area" class="max-w-4xl mx-auto p-4 min-h-[80vh]"></main>
+    <main id="content-area" class="max-w-4xl mx-auto p-4 min-h-[80vh]">{{panels_html}}
+    </main>
 
     <footer class="text-center py-8 text-slate-400 text-xs">
-        <p>Made for 沖繩 7天6夜 親子自駕行</p>
+        <p>{trip['footer']}</p>
     </footer>
 """
 
     # JS 部分，使用 f-string 填入資料，注意 JS 的大括號需雙倍 {{ }}
     html_script = f"""
     <script>
-        const accContent = `{acc_html}`;
-        const daysDataRaw = {js_data['daysDataRaw']};
-        const mealOptions = {js_data['mealOptions']};
-        const extraFood = {js_data['extraFood']};
-        const allFoodList = {js_data['allFoodList']};
-        const foodCategories = {js_data['foodCategories']};
-        const packingData = {js_data['packingData']};
-        const shoppingData = {js_data['shoppingData']};
-        const carData = {js_data['carData']};
-        const weatherData = {js_data['weatherData']};
-        const fullTableRaw = {js_data['fullTableRaw']};
-        const churaumiShows = {js_data['churaumiShows']};
-        const churaumiTips = {js_data['churaumiTips']};
-
-        const selectedMeals = {{}};
-        for (const [slot, options] of Object.entries(mealOptions)) {{
-            if (options.length > 0) selectedMeals[slot] = 0; 
-        }}
+        const CHUNK_URLS = {_js_json(chunk_urls)};
+        const CHUNK_DEPS = {_js_json(chunk_deps)};
+        {PWA_REGISTER_JS if pwa else ""}
 
-        const contentArea = document.getElementById('content-area');
-        const navBtns = document.querySelectorAll('.nav-btn');
+        // 共用資料：單檔模式為頁面內的 JSON (data-<名稱>，第一次用到時才解析)，--split 模式由資料區塊呼叫 __data 送達
+        const datasets = {{}};
+        const dataset = name => datasets[name] ||= JSON.parse(document.getElementById(`data-${{name}}`).textContent);
+        function __data(name, value) {{ datasets[name] = value; }}
 
-        function switchTab(tabId) {{
-            navBtns.forEach(btn => btn.classList.remove('active'));
-            const activeBtn = document.querySelector(`.nav-btn[data-tab="${{tabId}}"]`);
-            if (activeBtn) activeBtn.classList.add('active');
-            
-            window.scrollTo({{ top: 0, behavior: 'smooth' }});
-            contentArea.innerHTML = '';
-            
-            if (tabId === 'dashboard') renderDashboard();
-            else if (tabId === 'days') renderDaysView();
-            else if (tabId === 'churaumi') renderChuraumi();
-            else if (tabId === 'foodmap') renderFoodMap();
-            else if (tabId === 'planner') renderMealPlanner();
-            else if (tabId === 'hotel') renderHotelTraffic();
-            else if (tabId === 'prep') renderPreparation();
-            else if (tabId === 'fulltable') renderFullTable();
-            lucide.createIcons();
+        // 餐廳排程：MEAL_SLOTS 只記各時段的候選餐廳索引與各事件原本的備案，顯示內容由 data-foodmap 組出 (與 meal_record 相同)；
+        // 改選時只更新綁定該時段的節點 (每日行程的卡片、總表目前渲染的列)，選擇合併成一次寫入存到 localStorage
+        const MEAL_FIELDS = {{ title: 0, desc: 1, planB: 2, map: 3 }};
+        const MEAL_STORAGE_KEY = `meals:${{location.pathname}}`;
+        const MEAL_SAVE_DELAY = 300;
+        const selectedMeals = loadMeals();
+        const mealNodes = {{}};
+        function loadMeals() {{
+            try {{
+                const saved = JSON.parse(localStorage.getItem(MEAL_STORAGE_KEY)) || {{}};
+                // 資料更新後時段或候選可能已不存在，丟掉失效的選擇
+                return Object.fromEntries(Object.entries(saved).filter(([slot, index]) => Number.isInteger(index) && index >= 0 && index < (MEAL_SLOTS[slot]?.[0].length ?? 0)));
+            }} catch (e) {{
+                return {{}};
+            }}
         }}
-
-        function getEventDisplayData(ev) {{
-            if (ev.slot && mealOptions[ev.slot]) {{
-                const selectedIdx = selectedMeals[ev.slot] || 0;
-                const meal = mealOptions[ev.slot][selectedIdx];
-                const backups = mealOptions[ev.slot]
-                    .filter((_, idx) => idx !== selectedIdx)
-                    .map(m => m.name)
-                    .join(' / ');
-                return {{ title: meal.name, desc: meal.desc, planB: backups || ev.planB, mapUrl: meal.mapUrl, note: ev.note }};
+        let mealSaveTimer = 0;
+        function saveMeals() {{
+            clearTimeout(mealSaveTimer);
+            mealSaveTimer = 0;
+            try {{
+                localStorage.setItem(MEAL_STORAGE_KEY, JSON.stringify(selectedMeals));
+            }} catch (e) {{}}
+        }}
+        window.addEventListener('pagehide', () => {{ if (mealSaveTimer) saveMeals(); }});
+        // 時段選第 index 個候選時，第 event 個事件的 [標題, 說明, 備案 (其餘候選或事件原本的備案), 導航網址]
+        function mealRecord(slot, index, event) {{
+            const [options, plans] = MEAL_SLOTS[slot], food = dataset('foodmap').food;
+            const [name, , desc, , query] = food[options[index]];
+            const backups = options.filter((_, k) => k !== index).map(i => food[i][0]).join(' / ');
+            return [name, desc, backups || plans[event] || '', mapUrl(query || name)];
+        }}
+        function patchMeal(el, slot) {{
+            const record = mealRecord(slot, selectedMeals[slot] || 0, el.dataset.event);
+            el.querySelectorAll('[data-field]').forEach(node => {{
+                const value = record[MEAL_FIELDS[node.dataset.field]];
+                if (node.dataset.field === 'map') node.href = value;
+                else node.innerHTML = value || node.dataset.empty || '';
+            }});
+            el.querySelectorAll('[data-show]').forEach(node => {{ node.hidden = !record[MEAL_FIELDS[node.dataset.show]]; }});
+        }}
+        // 分頁內容就緒時登記一次綁定的節點，並套用已儲存的選擇
+        function bindMeals(root) {{
+            root.querySelectorAll('[data-meal]').forEach(el => {{
+                const slot = el.dataset.meal;
+                (mealNodes[slot] ||= []).push(el);
+                if (selectedMeals[slot]) patchMeal(el, slot);
+            }});
+            root.querySelectorAll('.meal-radio').forEach(input => {{
+                if (input.name in selectedMeals) input.checked = Number(input.value) === selectedMeals[input.name];
+            }});
+        }}
+        window.updateMeal = function(slot, index) {{
+            selectedMeals[slot] = index;
+            (mealNodes[slot] || []).forEach(el => patchMeal(el, slot));
+            const table = virtualLists.fulltable;
+            if (table) {{
+                table.root.querySelectorAll(`[data-meal="${{slot}}"]`).forEach(el => patchMeal(el, slot));
+                measureVirtual(table);
             }}
-            return ev;
+            mealSaveTimer ||= setTimeout(saveMeals, MEAL_SAVE_DELAY);
         }}
 
-        function renderChuraumi() {{
-            let html = `<div class="fade-in space-y-8">`;
-            html += `<div><h2 class="font-bold text-slate-800 mb-3 text-xl flex items-center gap-2"><i data-lucide="fish" class="text-cyan-500"></i> 美麗海水族館攻略</h2><img src="{img_churaumi_map}" alt="美麗海園區地圖" class="hero-img" onerror="this.src='https://placehold.co/800x400/e2e8f0/64748b?text=Please+Add+churaumi_map.jpg';"></div>`;
-            html += `<div class="bg-white rounded-2xl shadow-sm border border-slate-100 p-5"><h3 class="font-bold text-lg text-slate-700 mb-4 flex items-center gap-2"><i data-lucide="clock" class="text-blue-500"></i> 表演時刻表</h3><img src="{img_churaumi_timetable}" alt="表演時間表" class="w-full h-auto rounded-lg mb-6 border border-slate-200" onerror="this.style.display='none'"><div class="space-y-4">`;
-            churaumiShows.forEach(show => {{
-                html += `<div class="flex gap-4 border-b border-slate-50 pb-3 last:border-0 last:pb-0"><div class="text-blue-600 font-mono font-bold text-lg min-w-[50px]">${{show.time}}</div><div><div class="font-bold text-slate-800">${{show.title}}</div><p class="text-sm text-slate-500 mt-1">${{show.desc}}</p></div></div>`;
+        // 虛擬捲動 (總表、美食地圖)：資料以 JSON 隨分頁送達，只有視窗附近的列在 DOM 中。
+        // 內文完整顯示，列高各不相同：渲染後量測實際列高，以前綴和換算捲動位置與上下留白，尚未量過的列以估計值計算
+        const VIRTUAL_OVERSCAN = 6;
+        const MAP_URL_PREFIX = {_js_json(MAP_URL_PREFIX)};
+        const mapUrl = query => MAP_URL_PREFIX + encodeURIComponent(query).replace(/'/g, '%27');
+        const VIRTUAL_VIEWS = {{
+            fulltable: {{
+                prefix: null,
+                count: data => data.rows.length,
+                columns: () => 1,
+                item(data, i) {{
+                    const row = data.rows[i];
+                    const slot = row.length === 3 ? row[2] : null;
+                    const [title, desc, planB] = slot ? mealRecord(slot, selectedMeals[slot] || 0, i) : row.slice(2);
+                    const field = name => slot ? ` data-field="${{name}}"` : '';
+                    const day = typeof row[0] === 'number' ? data.days[row[0]] : row[0];
+                    return `<tr class="bg-white border-b hover:bg-slate-50"${{slot ? ` data-meal="${{slot}}" data-event="${{i}}"` : ''}}><td class="px-4 py-3 font-medium text-slate-900 whitespace-nowrap">${{day}}</td><td class="px-4 py-3 font-mono">${{row[1]}}</td><td class="px-4 py-3 font-bold text-slate-800 break-words"><div${{field('title')}}>${{title}}</div></td><td class="px-4 py-3 break-words"><div${{field('desc')}}>${{desc}}</div></td><td class="px-4 py-3 text-xs text-amber-600 break-words"><div${{field('planB')}} data-empty="-">${{planB || '-'}}</div></td></tr>`;
+                }},
+                wrap: (top, bottom, html) => `<tr style="height:${{top}}px"></tr>${{html}}<tr style="height:${{bottom}}px"></tr>`,
+                rowHeights: root => Array.from(root.rows).slice(1, -1).map(row => row.offsetHeight),
+            }},
+            foodmap: {{
+                prefix: 'food',
+                count: data => data.food.length,
+                columns: () => matchMedia('(min-width: 640px)').matches ? 2 : 1,
+                item(data, i) {{
+                    const [name, cat, desc, dayInfo, query] = data.food[i];
+                    const dayHtml = dayInfo ? `<span class="text-xs bg-slate-100 px-2 py-1 rounded text-slate-500 font-mono whitespace-nowrap">${{dayInfo}}</span>` : '';
+                    return `<div class="food-card bg-white p-4 rounded-2xl border border-slate-100 shadow-sm flex flex-col group hover:shadow-md transition-all" data-doc="food-${{i}}"><div class="flex justify-between items-start gap-2 mb-2"><div class="min-w-0"><span class="text-[10px] font-bold text-slate-400 uppercase tracking-wide block mb-1">${{data.cats[cat]}}</span><h3 class="font-bold text-lg text-slate-800 break-words group-hover:text-pink-600 transition-colors">${{name}}</h3></div>${{dayHtml}}</div><p class="text-sm text-slate-600 mb-3 leading-relaxed">${{desc}}</p><a href="${{mapUrl(query || name)}}" target="_blank" class="w-full mt-auto py-2 rounded-lg bg-pink-50 text-pink-600 text-sm font-bold flex items-center justify-center gap-2 hover:bg-pink-100 transition-colors"><i data-lucide="map-pin" width="14"></i> Google Maps</a></div>`;
+                }},
+                wrap: (top, bottom, html) => `<div style="height:${{top}}px"></div><div class="grid gap-4 sm:grid-cols-2">${{html}}</div><div style="height:${{bottom}}px"></div>`,
+                // 同一列的卡片等高 (grid 預設 stretch)，列高取最高者再加上列距
+                rowHeights: (root, cols) => {{
+                    const grid = root.children[1], cards = grid.children, heights = [];
+                    const gap = parseFloat(getComputedStyle(grid).rowGap) || 0;
+                    for (let i = 0; i < cards.length; i += cols) {{
+                        let height = 0;
+                        for (let j = i; j < Math.min(i + cols, cards.length); j++) height = Math.max(height, cards[j].offsetHeight);
+                        heights.push(height + gap);
+                    }}
+                    return heights;
+                }},
+            }},
+        }};
+        const virtualLists = {{}};
+        function mountVirtual(panel) {{
+            panel.querySelectorAll('[data-virtual]').forEach(root => {{
+                const name = root.dataset.virtual;
+                let list = virtualLists[name];
+                if (!list || list.root !== root) {{
+                    const data = dataset(name);
+                    const view = VIRTUAL_VIEWS[name];
+                    const all = Array.from({{ length: view.count(data) }}, (_, i) => i);
+                    list = virtualLists[name] = {{ root, data, view, all, items: all, heights: null, estimate: 0, range: '' }};
+                }}
+                renderVirtual(list, true);
             }});
-            html += `</div></div>`;
-
-            html += `<div class="bg-cyan-50 rounded-2xl border border-cyan-100 p-5"><h3 class="font-bold text-lg text-cyan-800 mb-4 flex items-center gap-2"><i data-lucide="lightbulb" class="text-cyan-600"></i> 達人筆記</h3><div class="space-y-3">`;
-            churaumiTips.forEach(tip => {{
-                html += `<div class="flex gap-3 items-start"><i data-lucide="check-circle" class="w-5 h-5 text-cyan-500 shrink-0 mt-0.5"></i><div class="text-sm text-cyan-900 leading-relaxed"><span class="font-bold block mb-1">${{tip.title.replace('✅ ', '')}}</span>${{tip.desc}}</div></div>`;
+        }}
+        // 各列的上緣位置 (offsets[r]，offsets[列數] 為總高)，量到新的列高時才重算
+        function virtualOffsets(list) {{
+            if (!list.offsets) {{
+                const {{ heights, estimate }} = list, offsets = new Float64Array(heights.length + 1);
+                for (let r = 0; r < heights.length; r++) offsets[r + 1] = offsets[r] + (heights[r] || estimate);
+                list.offsets = offsets;
+            }}
+            return list.offsets;
+        }}
+        // 上緣不超過 y 的最後一列 (二分搜尋)
+        function virtualRowAt(offsets, y) {{
+            let lo = 0, hi = Math.max(0, offsets.length - 2);
+            while (lo < hi) {{
+                const mid = (lo + hi + 1) >> 1;
+                if (offsets[mid] <= y) lo = mid; else hi = mid - 1;
+            }}
+            return lo;
+        }}
+        function renderVirtual(list, force) {{
+            const {{ root, view, items }} = list;
+            if (root.closest('[data-panel]').hidden) return;
+            const cols = view.columns();
+            const rows = Math.ceil(items.length / cols);
+            if (!list.heights || list.cols !== cols || list.layout !== items) {{
+                // 欄數或篩選結果改變：量過的列高不再對應，重新累積
+                Object.assign(list, {{ cols, layout: items, heights: new Float64Array(rows), offsets: null, range: '' }});
+            }}
+            if (!list.estimate && items.length) {{
+                root.innerHTML = view.wrap(0, 0, items.slice(0, cols).map(i => view.item(list.data, i)).join(''));
+                list.estimate = view.rowHeights(root, cols)[0] || 1;
+                Object.assign(list, {{ offsets: null, range: '' }});
+            }}
+            const offsets = virtualOffsets(list);
+            const top = root.getBoundingClientRect().top;
+            const first = Math.max(0, virtualRowAt(offsets, -top) - VIRTUAL_OVERSCAN);
+            const last = Math.max(first, Math.min(rows, virtualRowAt(offsets, innerHeight - top) + 1 + VIRTUAL_OVERSCAN));
+            const range = `${{first}}:${{last}}:${{cols}}`;
+            if (force || range !== list.range) {{
+                list.range = range;
+                list.first = first;
+                const html = items.slice(first * cols, last * cols).map(i => view.item(list.data, i)).join('');
+                root.innerHTML = view.wrap(offsets[first], offsets[rows] - offsets[last], html);
+            }}
+            measureVirtual(list);
+        }}
+        // 記下畫面上各列的實際高度；上下留白只涵蓋未渲染的列，不受影響，下次捲動時才用新的前綴和
+        function measureVirtual(list) {{
+            if (!list.range || list.root.closest('[data-panel]').hidden) return;
+            list.view.rowHeights(list.root, list.cols).forEach((height, k) => {{
+                if (height && list.heights[list.first + k] !== height) {{
+                    list.heights[list.first + k] = height;
+                    list.offsets = null;
+                }}
             }});
-            html += `</div></div></div>`;
-            
-            contentArea.innerHTML = html;
-            lucide.createIcons();
         }}
-
-        function renderFoodMap() {{
-            let html = `<div class="fade-in space-y-6">`;
-            html += `<div class="sticky top-[110px] bg-slate-50/95 backdrop-blur z-30 py-2 -mx-4 px-4 border-b border-slate-200 flex gap-2 overflow-x-auto hide-scrollbar">`;
-            foodCategories.forEach(cat => {{ html += `<button onclick="filterFood('${{cat}}')" class="filter-btn px-4 py-1.5 rounded-full bg-white border border-slate-200 text-sm font-bold text-slate-600 whitespace-nowrap transition-all ${{cat==='全部'?'active':''}}">${{cat}}</button>`; }});
-            html += `</div><div id="food-grid" class="grid gap-4 sm:grid-cols-2">`;
-            allFoodList.forEach(food => {{ html += `<div class="food-card bg-white p-4 rounded-2xl border border-slate-100 shadow-sm flex flex-col group hover:shadow-md transition-all" data-cat="${{food.category}}"><div class="flex justify-between items-start mb-2"><div><span class="text-[10px] font-bold text-slate-400 uppercase tracking-wide block mb-1">${{food.category}}</span><h3 class="font-bold text-lg text-slate-800 group-hover:text-pink-600 transition-colors">${{food.name}}</h3></div>${{food.dayInfo ? `<span class="text-xs bg-slate-100 px-2 py-1 rounded text-slate-500 font-mono whitespace-nowrap">${{food.dayInfo}}</span>` : ''}}</div><p class="text-sm text-slate-600 mb-4 flex-grow leading-relaxed">${{food.desc}}</p><a href="${{food.mapUrl}}" target="_blank" class="w-full mt-auto py-2 rounded-lg bg-pink-50 text-pink-600 text-sm font-bold flex items-center justify-center gap-2 hover:bg-pink-100 transition-colors"><i data-lucide="map-pin" width="14"></i> Google Maps</a></div>`; }});
-            html += `</div></div>`;
-            contentArea.innerHTML = html;
-            lucide.createIcons();
+        // 捲動與縮放事件合併到下一個畫格才處理；寬度改變時文字換行與欄數跟著變，列高重新量測。
+        // 只有高度改變 (手機捲動時網址列收合也會觸發 resize) 時沿用已量的列高，避免畫面跳動
+        let virtualFrame = 0, virtualResized = false, virtualWidth = innerWidth;
+        function scheduleVirtual(resized) {{
+            virtualResized ||= resized;
+            virtualFrame ||= requestAnimationFrame(() => {{
+                const force = virtualResized;
+                virtualFrame = 0;
+                virtualResized = false;
+                for (const list of Object.values(virtualLists)) {{
+                    if (force) Object.assign(list, {{ heights: null, estimate: 0 }});
+                    renderVirtual(list, force);
+                }}
+            }});
+        }}
+        window.addEventListener('scroll', () => scheduleVirtual(false), {{ passive: true }});
+        window.addEventListener('resize', () => {{
+            const resized = innerWidth !== virtualWidth;
+            virtualWidth = innerWidth;
+            scheduleVirtual(resized);
+        }});
+        // 把第 item 筆捲到畫面中央並確保已渲染，回傳其節點
+        function revealVirtual(list, item) {{
+            const pos = list.items.indexOf(item);
+            if (pos < 0) return null;
+            renderVirtual(list, false);
+            // 目標附近的列渲染後才量得到實際高度，目標位置可能跟著移動，重新對準幾次
+            for (let pass = 0; pass < 3; pass++) {{
+                const row = Math.floor(pos / list.cols), offsets = virtualOffsets(list);
+                const rowTop = list.root.getBoundingClientRect().top + scrollY + offsets[row];
+                const target = Math.max(0, rowTop - (innerHeight - (offsets[row + 1] - offsets[row])) / 2);
+                if (pass && Math.abs(target - scrollY) < 1) break;
+                window.scrollTo({{ top: target }});
+                renderVirtual(list, false);
+            }}
+            return list.root.querySelector(`[data-doc="${{list.view.prefix}}-${{item}}"]`);
         }}
 
+        // 分類篩選：直接換成建置時產生的分類索引陣列，不查詢、不逐一修改 DOM
         window.filterFood = function(category) {{
-            document.querySelectorAll('.filter-btn').forEach(btn => {{ if(btn.innerText === category) {{ btn.classList.add('active'); }} else {{ btn.classList.remove('active'); }} }});
-            document.querySelectorAll('.food-card').forEach(card => {{ card.style.display = (category === '全部' || card.dataset.cat === category) ? 'flex' : 'none'; }});
+            document.querySelectorAll('.filter-btn').forEach(btn => btn.classList.toggle('active', btn.innerText === category));
+            const list = virtualLists.foodmap;
+            if (!list) return;
+            const cat = list.data.cats.indexOf(category);
+            list.items = cat < 0 ? list.all : list.data.catFood[cat];
+            renderVirtual(list, true);
         }}
 
-        function renderMealPlanner() {{
-            let html = `<div class="fade-in space-y-8"><div class="bg-orange-50 p-4 rounded-xl border border-orange-100 text-orange-800 text-sm"><i data-lucide="info" class="inline w-4 h-4 mr-1"></i> 在此勾選您想吃的餐廳，<strong>每日行程</strong>與<strong>詳細總表</strong>會自動更新！</div>`;
-            const sortedSlots = Object.keys(mealOptions).sort();
-            sortedSlots.forEach(slot => {{
-                const options = mealOptions[slot];
-                const dayLabel = options[0].dayInfo || slot; 
-                html += `<div class="bg-white rounded-2xl shadow-sm border border-slate-100 overflow-hidden"><div class="bg-slate-50 px-4 py-3 border-b border-slate-100 font-bold text-slate-700 flex items-center gap-2"><span class="bg-white border border-slate-200 px-2 py-0.5 rounded text-xs text-slate-500 font-mono">${{slot}}</span>${{dayLabel}}</div><div class="p-4 space-y-3">`;
-                options.forEach((opt, idx) => {{
-                    const isChecked = (selectedMeals[slot] === idx) ? 'checked' : '';
-                    html += `<label class="block relative cursor-pointer group"><input type="radio" name="${{slot}}" value="${{idx}}" class="peer sr-only meal-radio" ${{isChecked}} onchange="updateMeal('${{slot}}', ${{idx}})"><div class="p-3 rounded-xl border border-slate-200 bg-white hover:bg-slate-50 transition-all flex items-start gap-3"><div class="w-5 h-5 rounded-full border border-slate-300 flex items-center justify-center bg-white peer-checked:border-orange-500 peer-checked:bg-orange-500 mt-0.5 shrink-0"><div class="w-2 h-2 rounded-full bg-white opacity-0 check-icon transition-opacity"></div></div><div class="flex-1"><div class="flex justify-between items-start"><h4 class="font-bold text-slate-800 text-sm">${{opt.name}}</h4><span class="text-[10px] bg-slate-100 text-slate-500 px-1.5 rounded">${{opt.category}}</span></div><p class="text-xs text-slate-500 mt-1">${{opt.desc}}</p></div></div></label>`;
-                }});
-                html += `</div></div>`;
+        // --split 模式：分頁 HTML 第一次用到時才以 <script> 載入
+        const pendingChunks = {{}};
+        function __chunk(tabId, html) {{
+            const panel = document.getElementById(`tab-${{tabId}}`);
+            panel.innerHTML = html;
+            panel.dataset.loaded = '1';
+            bindMeals(panel);
+        }}
+        function loadChunk(tabId) {{
+            return pendingChunks[tabId] ||= new Promise((resolve, reject) => {{
+                const script = document.createElement('script');
+                script.src = CHUNK_URLS[tabId];
+                script.onload = resolve;
+                script.onerror = () => {{ delete pendingChunks[tabId]; script.remove(); reject(new Error(tabId)); }};
+                document.head.appendChild(script);
             }});
-            html += `<h3 class="font-bold text-lg text-slate-700 mt-8 mb-4">✨ 更多推薦 (口袋名單)</h3><div class="grid gap-3 sm:grid-cols-2">`;
-            extraFood.forEach(food => {{ html += `<div class="bg-white p-3 rounded-xl border border-slate-100 flex gap-3 items-center"><div class="w-10 h-10 rounded-full bg-pink-50 flex items-center justify-center text-pink-500 font-bold text-xs shrink-0">推</div><div><div class="font-bold text-sm text-slate-800">${{food.name}}</div><div class="text-xs text-slate-500">${{food.desc}}</div></div></div>`; }});
-            html += `</div></div>`;
-            contentArea.innerHTML = html;
-            lucide.createIcons();
         }}
 
-        window.updateMeal = function(slot, index) {{ selectedMeals[slot] = index; }}
-
-        function renderDaysView() {{
-            let html = `<div class="fade-in space-y-8">`;
-            html += `<div class="flex gap-2 overflow-x-auto hide-scrollbar pb-2 sticky top-[110px] bg-[#f8fafc] z-40 py-2">`;
-            daysDataRaw.forEach((day, idx) => {{ html += `<button onclick="document.getElementById('day-${{day.id}}').scrollIntoView({{behavior:'smooth', block:'center'}})" class="px-4 py-1.5 rounded-full bg-white border border-slate-200 text-sm font-bold text-slate-600 shadow-sm whitespace-nowrap hover:bg-blue-50 hover:text-blue-600 transition-colors">D${{idx+1}} ${{day.theme}}</button>`; }});
-            html += `</div>`;
-            daysDataRaw.forEach((day, idx) => {{
-                html += `<div id="day-${{day.id}}" class="bg-white rounded-3xl shadow-sm border border-slate-100 overflow-hidden scroll-mt-32"><div class="bg-slate-50 px-6 py-4 border-b border-slate-100 flex justify-between items-center"><div><span class="text-xs font-bold text-blue-500 uppercase tracking-wider">Day ${{idx+1}}</span><h2 class="text-xl font-bold text-slate-800">${{day.date}}</h2></div><div class="text-right"><div class="text-sm font-bold text-slate-600">${{day.theme}}</div></div></div><div class="bg-blue-50/50 px-6 py-3 border-b border-blue-100/50 flex gap-3 text-sm text-blue-800"><i data-lucide="cloud-rain" class="w-4 h-4 shrink-0 mt-0.5"></i><span>${{day.rainPlan}}</span></div><div class="p-6 relative">`;
-                day.events.forEach((ev, eIdx) => {{
-                    const displayData = getEventDisplayData(ev);
-                    const isLast = eIdx === day.events.length - 1;
-                    const isNap = ev.tag === 'nap';
-                    html += `<div class="flex gap-4 relative group">${{!isLast ? '<div class="absolute left-[19px] top-8 bottom-[-32px] w-[2px] bg-slate-100 group-hover:bg-blue-100 transition-colors"></div>' : ''}}<div class="flex flex-col items-center min-w-[50px] z-10"><span class="text-[10px] font-bold font-mono mb-1 text-slate-400">${{ev.time}}</span><div class="w-10 h-10 rounded-full flex items-center justify-center ${{isNap ? 'bg-purple-100 text-purple-600 ring-4 ring-purple-50' : 'bg-white border border-slate-200 text-slate-500 group-hover:border-blue-300 group-hover:text-blue-500'}} transition-all shadow-sm"><i data-lucide="${{ev.icon}}" width="18"></i></div></div><div class="flex-1 pb-8"><div class="${{isNap ? 'bg-purple-50 border-purple-100' : 'bg-white border-slate-100 hover:border-blue-200'}} border rounded-2xl p-4 transition-all shadow-sm"><div class="flex justify-between items-start mb-2"><h3 class="font-bold text-lg text-slate-800">${{displayData.title}}</h3><span class="tag tag-${{ev.tag}}">${{getTagLabel(ev.tag)}}</span></div><p class="text-sm text-slate-600 leading-relaxed mb-3">${{displayData.desc}}</p><div class="flex flex-wrap gap-2">${{displayData.planB ? `<span class="text-xs bg-amber-50 text-amber-700 px-2 py-1 rounded border border-amber-100 flex items-center gap-1"><i data-lucide="info" width="12"></i>備案：${{displayData.planB}}</span>` : ''}}${{displayData.note ? `<span class="text-xs bg-slate-100 text-slate-500 px-2 py-1 rounded flex items-center gap-1"><i data-lucide="sticky-note" width="12"></i> ${{displayData.note}}</span>` : ''}}<a href="${{displayData.mapUrl}}" target="_blank" class="text-xs bg-blue-50 text-blue-600 px-2 py-1 rounded border border-blue-100 flex items-center gap-1 hover:bg-blue-100 transition-colors ml-auto"><i data-lucide="map-pin" width="12"></i> 導航</a></div></div></div></div>`;
+        // 搜尋：建置時產生的倒排索引，每個詞以 Map 直接查到文件編號，不掃描 DOM
+        const SEARCH_TOKEN_RE = /[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+|[a-z0-9]+/g;
+        const SEARCH_PREFIX_MAX = {SEARCH_PREFIX_MAX};
+        const SEARCH_LIMIT = 30;
+        let searchTerms = null, searchChars = null;
+        function searchTermIndex() {{
+            if (!searchTerms) {{
+                searchTerms = new Map();
+                let offset = 0;
+                const terms = SEARCH_INDEX.terms ? SEARCH_INDEX.terms.split(' ') : [];
+                terms.forEach((term, i) => {{
+                    searchTerms.set(term, [offset, SEARCH_INDEX.counts[i]]);
+                    offset += SEARCH_INDEX.counts[i];
                 }});
-                html += `</div></div>`;
-            }});
-            html += `</div>`;
-            contentArea.innerHTML = html;
-            lucide.createIcons();
+            }}
+            return searchTerms;
         }}
-
-        function renderFullTable() {{
-            let html = `<div class="fade-in bg-white rounded-xl shadow-sm border border-slate-200 overflow-hidden"><div class="p-4 bg-slate-50 border-b border-slate-200 flex justify-between items-center"><h2 class="font-bold text-slate-700">📋 行程詳細總表 (動態更新)</h2></div><div class="overflow-x-auto"><table class="w-full text-sm text-left text-slate-500"><thead class="text-xs text-slate-700 uppercase bg-slate-50"><tr><th class="px-4 py-3">Day</th><th class="px-4 py-3">時間</th><th class="px-4 py-3">活動</th><th class="px-4 py-3">詳細說明</th><th class="px-4 py-3">備案</th></tr></thead><tbody>`;
-            fullTableRaw.forEach(row => {{
-                const displayData = getEventDisplayData(row);
-                html += `<tr class="bg-white border-b hover:bg-slate-50"><td class="px-4 py-3 font-medium text-slate-900 whitespace-nowrap">${{row.day}}</td><td class="px-4 py-3 font-mono">${{row.time}}</td><td class="px-4 py-3 font-bold text-slate-800">${{displayData.title}}</td><td class="px-4 py-3 min-w-[200px]">${{displayData.desc}}</td><td class="px-4 py-3 text-xs text-amber-600">${{displayData.planB || '-'}}</td></tr>`;
-            }});
-            html += `</tbody></table></div></div>`;
-            contentArea.innerHTML = html;
+        function postings(term) {{
+            const entry = searchTermIndex().get(term);
+            if (!entry) return [];
+            const [start, count] = entry, docs = new Array(count);
+            for (let i = 0, doc = 0; i < count; i++) docs[i] = doc += SEARCH_INDEX.postings[start + i];
+            return docs;
         }}
-
-        function renderDashboard() {{
-            let html = `<div class="fade-in space-y-8">`;
-            // 航班 & 天氣
-            html += `<div class="grid grid-cols-1 md:grid-cols-2 gap-4"><div class="bg-white p-5 rounded-2xl border border-slate-100 shadow-sm"><h3 class="font-bold text-slate-700 mb-3 flex items-center gap-2"><i data-lucide="plane" class="text-blue-500"></i> 航班資訊</h3><div class="flex justify-between items-center border-b border-slate-50 pb-2 mb-2"><span class="text-xs text-slate-400">去程 7/19</span><span class="font-bold text-slate-800">14:25 抵達</span></div><div class="flex justify-between items-center"><span class="text-xs text-slate-400">回程 7/25</span><span class="font-bold text-slate-800">15:35 起飛</span></div></div><div class="bg-orange-50 p-5 rounded-2xl border border-orange-100"><h3 class="font-bold text-orange-800 mb-3 flex items-center gap-2"><i data-lucide="sun" class="text-orange-500"></i> 7月天氣概況</h3><div class="text-sm text-orange-700 space-y-1"><p>🌡️ 27°C - 32°C</p><p>👕 穿著建議：短袖、透氣材質</p><p>☂️ 注意事項：午後雷陣雨、室內冷氣強</p></div></div></div>`;
-            // 插畫 & 地圖
-            html += `<div class="bg-white p-4 rounded-2xl border border-slate-100 shadow-sm"><h2 class="font-bold text-slate-700 mb-3 text-lg flex items-center gap-2"><i data-lucide="navigation" class="text-green-500"></i> 路線地圖</h2><img src="{img_okinawa_map_2}" alt="沖繩路線地圖" class="w-full h-auto rounded-xl" onerror="this.src='https://placehold.co/800x400/e0f2fe/1e293b?text=Map+Route'"></div>`;
-            html += `</div>`;
-            contentArea.innerHTML = html;
-            lucide.createIcons();
+        // 單一個中日文字：合併含有該字的所有 bigram (第一次用到時才建立字 → 詞的對照)
+        function charPostings(ch) {{
+            if (!searchChars) {{
+                searchChars = new Map();
+                for (const term of searchTermIndex().keys()) {{
+                    if (term.charCodeAt(0) < 0x3040) continue;
+                    for (const c of new Set(term)) {{
+                        if (!searchChars.has(c)) searchChars.set(c, []);
+                        searchChars.get(c).push(term);
+                    }}
+                }}
+            }}
+            const docs = new Set();
+            for (const term of searchChars.get(ch) || []) postings(term).forEach(doc => docs.add(doc));
+            return [...docs].sort((a, b) => a - b);
+        }}
+        function intersect(a, b) {{
+            const out = [];
+            for (let i = 0, j = 0; i < a.length && j < b.length;) {{
+                if (a[i] === b[j]) {{ out.push(a[i]); i++; j++; }}
+                else if (a[i] < b[j]) i++;
+                else j++;
+            }}
+            return out;
+        }}
+        function searchDocs(text) {{
+            const lists = [];
+            for (const run of text.normalize('NFKC').toLowerCase().match(SEARCH_TOKEN_RE) || []) {{
+                if (run.charCodeAt(0) < 0x3040) {{
+                    if (run.length > 1) lists.push(postings(run.slice(0, SEARCH_PREFIX_MAX)));
+                }} else if (run.length === 1) {{
+                    lists.push(charPostings(run));
+                }} else {{
+                    for (let i = 0; i < run.length - 1; i++) lists.push(postings(run.slice(i, i + 2)));
+                }}
+            }}
+            if (!lists.length) return null;
+            lists.sort((a, b) => a.length - b.length);
+            return lists.reduce(intersect);
         }}
 
-        // (其他功能函式保持不變: renderHotelTraffic, renderPreparation, getTagLabel)
-        function renderHotelTraffic() {{
-            let html = `<div class="fade-in space-y-8"><div><h2 class="text-xl font-bold text-slate-800 mb-4 flex items-center gap-2"><i data-lucide="bed" class="text-indigo-500"></i> 住宿安排</h2>${{accContent}}</div><div><h2 class="text-xl font-bold text-slate-800 mb-4 flex items-center gap-2"><i data-lucide="car" class="text-blue-500"></i> 租車資訊</h2><div class="grid gap-4 sm:grid-cols-2">`;
-            carData.forEach(row => {{ html += `<div class="bg-white p-4 rounded-xl border border-slate-100 shadow-sm"><span class="text-[10px] font-bold text-slate-400 uppercase tracking-wider block mb-1">${{row.category}}</span><h3 class="font-bold text-slate-700 mb-2">${{row.title}}</h3><p class="text-sm text-slate-600 leading-relaxed">${{row.details}}</p></div>`; }});
-            html += `</div></div></div>`;
-            contentArea.innerHTML = html;
-            lucide.createIcons();
+        const searchInput = document.getElementById('search-input');
+        const searchResults = document.getElementById('search-results');
+        // 搜尋索引在第一次聚焦或輸入搜尋框時才載入 (--split 模式為雜湊區塊) 並解析
+        let SEARCH_INDEX = null, searchReady = null;
+        function loadSearchIndex() {{
+            searchReady ||= (CHUNK_URLS['data-search'] ? loadChunk('data-search') : Promise.resolve())
+                .then(() => {{ SEARCH_INDEX = dataset('search'); }})
+                .catch(e => {{ searchReady = null; throw e; }});
+            return searchReady;
+        }}
+        function searchFailed() {{
+            searchResults.innerHTML = `<div class="px-3 py-6 text-center text-sm text-red-500">搜尋資料載入失敗，請檢查網路後再試一次</div>`;
+            searchResults.hidden = false;
+        }}
+        function renderSearch() {{
+            const docs = searchDocs(searchInput.value);
+            if (docs === null) {{ searchResults.hidden = true; return; }}
+            searchResults.innerHTML = docs.length ? docs.slice(0, SEARCH_LIMIT).map(doc => {{
+                const [kind, local, title, sub] = SEARCH_INDEX.docs[doc];
+                return `<button onclick="openDoc(${{kind}}, ${{local}})" class="w-full text-left px-3 py-2 rounded-xl hover:bg-slate-50 flex items-center gap-3"><span class="text-[10px] font-bold text-blue-600 bg-blue-50 px-2 py-0.5 rounded-full whitespace-nowrap">${{SEARCH_INDEX.kinds[kind][2]}}</span><span class="flex-1 min-w-0"><span class="block text-sm font-bold text-slate-800 truncate">${{title}}</span><span class="block text-xs text-slate-400 truncate">${{sub}}</span></span></button>`;
+            }}).join('') + (docs.length > SEARCH_LIMIT ? `<div class="px-3 py-2 text-xs text-slate-400">還有 ${{docs.length - SEARCH_LIMIT}} 筆，請輸入更多關鍵字</div>` : '')
+                : `<div class="px-3 py-6 text-center text-sm text-slate-400">找不到符合的項目</div>`;
+            searchResults.hidden = false;
         }}
-        function renderPreparation() {{
-            let html = `<div class="fade-in space-y-8"><div><h2 class="text-xl font-bold text-slate-800 mb-4 flex items-center gap-2"><i data-lucide="backpack" class="text-purple-500"></i> 攜帶物品</h2><div class="grid gap-4 sm:grid-cols-2">`;
-            packingData.forEach(cat => {{ html += `<div class="bg-white p-5 rounded-2xl border border-purple-50 shadow-sm"><h3 class="font-bold text-purple-700 mb-3 border-b border-purple-50 pb-2">${{cat.category}}</h3><ul class="space-y-3">${{cat.items.map(i => `<li class="checklist-item flex items-start gap-3"><input type="checkbox" class="mt-1 w-4 h-4 accent-purple-600 rounded border-slate-300 cursor-pointer"><div class="flex-1"><span class="text-sm text-slate-700 font-medium block">${{i.item}}</span>${{i.note ? `<span class="text-xs text-slate-400">${{i.note}}</span>` : ''}}</div></li>`).join('')}}</ul></div>`; }});
-            html += `</div></div><div><h2 class="text-xl font-bold text-slate-800 mb-4 flex items-center gap-2"><i data-lucide="shopping-bag" class="text-pink-500"></i> 購物攻略</h2><div class="space-y-4">`;
-            shoppingData.forEach(shop => {{ html += `<div class="bg-white p-5 rounded-2xl border border-pink-50 shadow-sm flex flex-col sm:flex-row gap-4"><div class="sm:w-1/3 border-b sm:border-b-0 sm:border-r border-pink-50 pb-3 sm:pb-0 sm:pr-4"><h3 class="font-bold text-pink-700 text-lg">${{shop.location}}</h3><p class="text-sm text-slate-500 mt-1">${{shop.desc}}</p></div><div class="flex-1"><div class="flex flex-wrap gap-2">${{shop.items.map(i => `<span class="bg-pink-50 text-pink-700 text-xs px-2.5 py-1 rounded-md border border-pink-100 flex items-center gap-1"><i data-lucide="check" width="10"></i> ${{i}}</span>`).join('')}}</div></div></div>`; }});
-            html += `</div></div></div>`;
-            contentArea.innerHTML = html;
-            lucide.createIcons();
+        window.openDoc = async function(kind, local) {{
+            const [tab, prefix] = SEARCH_INDEX.kinds[kind];
+            searchResults.hidden = true;
+            await switchTab(tab);
+            if (prefix === 'food') filterFood('全部');
+            const list = Object.values(virtualLists).find(l => l.view.prefix === prefix);
+            const target = list ? revealVirtual(list, local) : document.querySelector(`[data-doc="${{prefix}}-${{local}}"]:not([hidden])`);
+            if (!target) return;
+            if (!list) target.scrollIntoView({{ behavior: 'smooth', block: 'center' }});
+            target.classList.remove('search-hit');
+            void target.offsetWidth;
+            target.classList.add('search-hit');
         }}
-        function getTagLabel(tag) {{ const map = {{ food: "美食", traffic: "交通", spot: "景點", shop: "購物", nap: "午睡/休息", hotel: "住宿", park: "公園/放電" }}; return map[tag] || "其他"; }}
+        searchInput.addEventListener('input', () => loadSearchIndex().then(renderSearch, searchFailed));
+        searchInput.addEventListener('focus', () => loadSearchIndex().then(() => {{ if (searchInput.value) renderSearch(); }}, searchFailed));
+        searchInput.addEventListener('keydown', e => {{
+            if (e.key === 'Escape') {{ searchResults.hidden = true; searchInput.blur(); }}
+            if (e.key === 'Enter') searchResults.querySelector('button')?.click();
+        }});
+        document.addEventListener('click', e => {{ if (!e.target.closest('#search-results, #search-input')) searchResults.hidden = true; }});
 
-        switchTab('dashboard');
+        const panels = document.querySelectorAll('[data-panel]');
+        const navBtns = document.querySelectorAll('.nav-btn');
+
+        let currentTab = null;
+        async function switchTab(tabId) {{
+            currentTab = tabId;
+            navBtns.forEach(btn => btn.classList.remove('active'));
+            const activeBtn = document.querySelector(`.nav-btn[data-tab="${{tabId}}"]`);
+            if (activeBtn) activeBtn.classList.add('active');
+            
+            window.scrollTo({{ top: 0, behavior: 'smooth' }});
+            const panel = document.getElementById(`tab-${{tabId}}`);
+            panels.forEach(p => {{ p.hidden = p !== panel; }});
+            if (CHUNK_URLS[tabId] && !panel.dataset.loaded) {{
+                panel.innerHTML = `<div class="py-16 text-center text-sm text-slate-400">載入中...</div>`;
+                try {{
+                    // 分頁內容綁定餐廳排程時就要用到共用資料，先載入
+                    for (const dep of CHUNK_DEPS[tabId] || []) await loadChunk(dep);
+                    await loadChunk(tabId);
+                }} catch (e) {{
+                    panel.innerHTML = `<div class="py-16 text-center text-sm text-red-500">資料載入失敗，請檢查網路後再試一次</div>`;
+                    return;
+                }}
+            }}
+            if (currentTab === tabId) mountVirtual(panel);
+        }}
+        bindMeals(document);
     </script>
 </body>
 </html>
 """
 
-    with open("index.html", "w", encoding="utf-8") as f:
-        # 修正：將所有 HTML 區塊組合起來寫入
-        f.write(html_head + html_body_start + html_script)
-    
-    print("✅ 互動版 index.html 已生成！")
+    # --- 圖示 sprite (分頁 HTML 已先替換；虛擬捲動的 JS 樣板也含圖示) ---
+    html_body_start = replace_icon_tags(html_body_start, icons_used)
+    html_script = replace_icon_tags(html_script, icons_used)
+    sprite = build_sprite(icons_used)
+    html_body_start = html_body_start.replace('<body class="bg-slate-50">', '<body class="bg-slate-50">\n    ' + sprite, 1)
+    if _profile is not None:
+        _profile.add("template", time.perf_counter() - template_start)
+        _profile.add_bytes("sprite", len(sprite.encode("utf-8")))
+        _profile.add_bytes("script", len(html_script.encode("utf-8")))
+
+    # --- 樣式：建置時編譯 Tailwind，只保留用到的 class ---
+    print("🎨 正在編譯 CSS...")
+    css_source = html_body_start + html_script + "\n".join(sorted(tab_classes))
+    with profile_phase("css"):
+        css = cache.section("css", [_sha(css_source), _sha(page_css)], lambda: build_css(css_source, page_css))
+    # 樣板或 CSV 中拼錯、尚未支援的 class 不會有任何樣式，建置時提出警告
+    attrs = tab_classes | set(CLASS_ATTR_RE.findall(html_body_start + html_script))
+    unknown = [cls for cls in unknown_classes(class_tokens(attrs), page_css) if not HOOK_CLASS_RE.fullmatch(cls)]
+    if unknown:
+        print(f"⚠️ 以下 class 沒有對應的樣式 (拼錯或編譯器尚未支援)：{', '.join(unknown)}")
+    if write:
+        os.makedirs(out_dir, exist_ok=True)
+    hashed_urls = list(chunk_urls.values())
+    if css_mode == "file":
+        css_name = f"app.{hashlib.sha256(css.encode()).hexdigest()[:10]}.css"
+        os.makedirs(asset_dir, exist_ok=True)
+        if not os.path.exists(os.path.join(asset_dir, css_name)):
+            _atomic_write(os.path.join(asset_dir, css_name), css.encode("utf-8"))
+        css_tag = f'<link rel="stylesheet" href="{asset_url}/{css_name}">'
+        hashed_urls.append(f"{asset_url}/{css_name}")
+    else:
+        css_tag = f"<style>{css}</style>"
+        if _profile is not None:
+            _profile.add_bytes("css", len(css_tag.encode("utf-8")))
+    html_head = html_head_template.replace("{css_tag}", css_tag)
+    html_body_start, html_body_end = html_body_start.split("{panels_html}", 1)
+
+    # 依序串流寫出頁首、殼頁面、暫存的分頁與程式 (內容未變時不重寫，保留檔案時間戳記)
+    out_path = os.path.join(out_dir, "index.html") if write else None
+    with profile_phase("write"), (cache.open_output(out_path, compress) if write else MemoryOutput(compress)) as out:
+        out.write(html_head)
+        out.write(html_body_start)
+        spool.seek(0)
+        for block in iter(lambda: spool.read(STREAM_BLOCK), b""):
+            out.write_bytes(block)
+        out.write(html_body_end)
+        if not split:
+            out.write('    <script type="application/json" id="data-foodmap">')
+            out.write_all(iter_dataset("foodmap", foodmap_data(store)))
+            out.write("</script>\n")
+        out.write("    <script>const MEAL_SLOTS = ")
+        out.write_all(iter_dataset("meal_slots", meals))
+        out.write(";</script>\n")
+        if not split:
+            # 搜尋索引直接以 JSON 串流寫入，不先組成字串
+            out.write('    <script type="application/json" id="data-search">')
+            out.write_all(search_fragments)
+            out.write("</script>")
+        out.write(html_script)
+    spool.close()
+    # 搜尋索引不論內嵌或另存成區塊，內容都與快取檔相同
+    index_bytes = os.path.getsize(cache.blob_path(cache.manifest["sections"]["search_index"]["value"]))
+    if search_cached is not None and _profile is not None:
+        _profile.add_bytes("json:search_index", index_bytes)
+    if pwa:
+        image_urls = {url: fallback for asset in images.values() for url, fallback in _offline_images(asset).items()}
+        with profile_phase("pwa"):
+            total, changed = write_pwa(out_dir, trip, out.digest, hashed_urls, image_urls, cache)
+        print(f"📴 PWA：預先快取 {total} 個檔案，本次變動 {changed} 個")
+    elif write and retire_pwa(out_dir, cache):
+        print(f"📴 已停用 PWA：{PWA_SW_FILE} 改為清除快取並解除註冊的版本")
+    if _profile is not None:
+        _profile.page = {"path": out_path, "bytes": out.size, "digest": out.digest}
+        _profile.add_bytes("page", out.size)
+    cache.save()
+
+    print(f"🔎 搜尋索引：{search_meta['docs']} 筆資料、{search_meta['terms']} 個詞，"
+          f"{index_bytes / 1024:.1f} KB，" + (f"建置耗時 {search_ms:.0f} ms" if search_cached is None else "沿用快取"))
+    if cache.misses:
+        print(f"♻️ 快取命中 {len(cache.hits)} 個區段，重新計算：{', '.join(cache.misses)}")
+    if not write:
+        print(f"✅ 已在記憶體中渲染 index.html ({out.size / 1024:.1f} KB)")
+    elif out.written:
+        print(f"✅ 互動版 index.html 已生成！({out.size / 1024:.1f} KB)")
+    else:
+        print("✅ 內容無變動，略過寫入 index.html")
+    peak, kind = peak_memory()
+    if peak is not None:
+        print(f"📈 峰值記憶體：{peak / 1024 / 1024:.1f} MB ({kind})")
+    return Page(out_path, out.digest, out.size, out.variants if not write else {})
+
+# --- 監看模式：CSV/圖片存檔後自動重建，並通知瀏覽器重新整理 ---
+LIVE_RELOAD_SNIPPET = b"<script>new EventSource('/__livereload').onmessage = () => location.reload();</script>"
+
+class _ReloadHub:
+    """建置完成時遞增版本，喚醒所有等待中的 SSE 連線"""
+    def __init__(self):
+        self.version = 0
+        self.cond = threading.Condition()
+
+    def notify(self):
+        with self.cond:
+            self.version += 1
+            self.cond.notify_all()
+
+    def wait(self, seen, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != seen, timeout)
+            return self.version
+
+def _make_handler(out_dir, hub):
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=out_dir, **kwargs)
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/__livereload":
+                return self._event_stream()
+            if path in ("/", "/index.html"):
+                return self._index()
+            return super().do_GET()
+
+        def _index(self):
+            # 只在回應時注入 live reload，輸出檔本身保持乾淨
+            with open(os.path.join(out_dir, "index.html"), "rb") as f:
+                body = f.read().replace(b"</body>", LIVE_RELOAD_SNIPPET + b"</body>", 1)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _event_stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            seen = hub.version
+            try:
+                while True:
+                    version = hub.wait(seen, 15)
+                    if version != seen:
+                        self.wfile.write(b"data: reload\n\n")
+                        seen = version
+                    else:
+                        self.wfile.write(b": ping\n\n")  # 保持連線
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+    return Handler
+
+def _mtimes(paths):
+    result = {}
+    for path in paths:
+        try:
+            result[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            result[path] = None
+    return result
+
+def source_files(src_dir="."):
+    """影響建置結果的所有來源檔 (CSV、圖片與 trip.json)"""
+    return [os.path.join(src_dir, name) for name in
+            list(FILES.values()) + [cfg["src"] for cfg in IMAGES.values()] + [TRIP_FILE]]
+
+def watch(out_dir=".", inline_max=INLINE_MAX_BYTES, css_mode="inline", port=8000, interval=0.3, debounce=0.5,
+          src_dir=".", split=False):
+    """監看 CSV 與圖片，去抖動後增量重建並推送重新整理"""
+    cache = BuildCache(src_dir=src_dir)
+    generate_html(out_dir, inline_max, css_mode, cache=cache, src_dir=src_dir, split=split)
+
+    hub = _ReloadHub()
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), _make_handler(out_dir, hub))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"👀 監看中：http://127.0.0.1:{port}/ (Ctrl+C 結束)")
+
+    watched = source_files(src_dir)
+    snapshot = _mtimes(watched)
+    try:
+        while True:
+            time.sleep(interval)
+            current = _mtimes(watched)
+            if current == snapshot:
+                continue
+            # 去抖動：Excel 存檔常連續寫入多次，等到檔案穩定再建置
+            while True:
+                time.sleep(debounce)
+                latest = _mtimes(watched)
+                if latest == current:
+                    break
+                current = latest
+            changed = [p for p in watched if current[p] != snapshot[p]]
+            snapshot = current
+            start = time.perf_counter()
+            try:
+                generate_html(out_dir, inline_max, css_mode, cache=cache, src_dir=src_dir, split=split)
+            except Exception as e:
+                print(f"❌ 建置失敗 ({', '.join(changed)}): {e}")
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"⚡ {', '.join(changed)} 變更，重新建置耗時 {elapsed:.0f} ms")
+            hub.notify()
+    except KeyboardInterrupt:
+        print("👋 結束監看")
+    finally:
+        server.shutdown()
+
+# --- 批次模式：平行建置多個行程資料夾 ---
+SHARED_DIR = "_shared"  # 各行程共用的圖片與 CSS (內容雜湊檔名，相同內容只存一份)
+
+def find_trips(patterns):
+    """展開資料夾或 glob；含 itinerary.csv 的資料夾即為一個行程，否則往下找一層"""
+    trips = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            if not os.path.isdir(path):
+                continue
+            if os.path.exists(os.path.join(path, FILES["itinerary"])):
+                trips.append(path)
+            else:
+                trips += [d for d in sorted(glob.glob(os.path.join(path, "*")))
+                          if os.path.exists(os.path.join(d, FILES["itinerary"]))]
+    return list(dict.fromkeys(os.path.normpath(t) for t in trips))
+
+def _build_trip(src_dir, out_root, inline_max, css_mode, force, split, pwa, compress, trace_memory, profile=False, budgets=()):
+    """在子行程中建置單一行程；輸出訊息先收集起來，避免多個行程交錯"""
+    name = os.path.basename(os.path.abspath(src_dir))
+    log = io.StringIO()
+    start = time.perf_counter()
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(log):
+            trip_budget = trip_budgets(src_dir, budgets)
+            with (BuildProfile(trip_budget) if profile or trip_budget else contextlib.nullcontext()) as build_profile:
+                page = generate_html(os.path.join(out_root, name), inline_max, css_mode, force, src_dir=src_dir,
+                                     asset_dir=os.path.join(out_root, SHARED_DIR, ASSET_DIR),
+                                     asset_url=f"../{SHARED_DIR}/{ASSET_DIR}", split=split, pwa=pwa, compress=compress)
+            if build_profile is not None:
+                exceeded = finish_profile(build_profile, os.path.join(out_root, name, PROFILE_FILE) if profile else None)
+                if exceeded:
+                    return {"name": name, "ok": False, "seconds": time.perf_counter() - start,
+                            "error": f"超出效能預算：{exceeded}", "log": log.getvalue()}
+        # 子行程會被重複使用，RSS 為至今的最大值 (同一子行程先前建置的行程也算在內)；要精確數字請加 --trace-memory
+        return {"name": name, "ok": True, "seconds": time.perf_counter() - start,
+                "bytes": page.size, "peak": peak_memory()[0], "log": log.getvalue()}
+    except Exception as e:
+        return {"name": name, "ok": False, "seconds": time.perf_counter() - start,
+                "error": f"{type(e).__name__}: {e}", "log": log.getvalue()}
+
+def batch(patterns, out_root="dist", jobs=None, inline_max=INLINE_MAX_BYTES, css_mode="file", force=False, split=False,
+          pwa=False, compress=(), trace_memory=False, profile=False, budgets=()):
+    """以 ProcessPoolExecutor 平行建置所有行程，回傳 exit code (有任何失敗即為 1)"""
+    trips = find_trips(patterns)
+    if not trips:
+        print("❌ 找不到任何行程資料夾 (需含 itinerary.csv)")
+        return 1
+    names = [os.path.basename(os.path.abspath(t)) for t in trips]
+    duplicated = sorted({n for n in names if names.count(n) > 1})
+    if duplicated:
+        print(f"❌ 行程資料夾名稱重複，輸出會互相覆蓋：{', '.join(duplicated)}")
+        return 1
+
+    print(f"📦 平行建置 {len(trips)} 個行程 → {out_root}")
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(_build_trip, t, out_root, inline_max, css_mode, force, split, pwa, compress, trace_memory,
+                               profile, budgets): t for t in trips}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # 子行程本身掛掉 (例如記憶體不足)
+                result = {"name": os.path.basename(futures[future]), "ok": False, "seconds": 0,
+                          "error": f"{type(e).__name__}: {e}", "log": ""}
+            results.append(result)
+            print(f"  {'✅' if result['ok'] else '❌'} {result['name']}")
+
+    print(f"\n{'行程':<24}{'狀態':<6}{'時間':>10}{'大小':>12}{'峰值記憶體':>12}")
+    for r in sorted(results, key=lambda r: r["name"]):
+        size = f"{r['bytes'] / 1024:.1f} KB" if r["ok"] else "-"
+        peak = f"{r['peak'] / 1024 / 1024:.1f} MB" if r.get("peak") else "-"
+        print(f"{r['name']:<24}{'OK' if r['ok'] else 'FAIL':<6}{r['seconds'] * 1000:>8.0f}ms{size:>12}{peak:>12}")
+    shared = os.path.join(out_root, SHARED_DIR, ASSET_DIR)
+    if os.path.isdir(shared):
+        shared_files = os.listdir(shared)
+        shared_bytes = sum(os.path.getsize(os.path.join(shared, f)) for f in shared_files)
+        print(f"共用資源：{len(shared_files)} 個檔案，{shared_bytes / 1024:.1f} KB")
+    print(f"總耗時 {time.perf_counter() - start:.2f} s")
+
+    failed = [r for r in results if not r["ok"]]
+    for r in failed:
+        print(f"\n❌ {r['name']} 失敗：{r['error']}")
+        if r["log"]:
+            print(r["log"].rstrip())
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    generate_html()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="由 CSV 產生沖繩行程互動網頁")
+    parser.add_argument("command", nargs="?", choices=["build", "watch", "batch"], default="build",
+                        help="build: 產生一次 (預設)；watch: 監看 CSV 變更並啟動本機預覽伺服器；batch: 平行建置多個行程")
+    parser.add_argument("trips", nargs="*", help="batch 模式的行程資料夾或 glob (例如 'trips/*')")
+    parser.add_argument("--src", default=".", help="行程資料夾 (CSV、圖片與 trip.json 所在處)")
+    parser.add_argument("--out", default=None, help="輸出目錄 (預設為目前目錄；batch 模式為 dist)")
+    parser.add_argument("--inline-max", type=int, default=INLINE_MAX_BYTES,
+                        help="小於此位元組數的圖片直接內嵌為 Base64 (0 表示全部輸出為檔案)")
+    parser.add_argument("--css", choices=["inline", "file"], default=None,
+                        help="CSS 內嵌於頁面，或輸出為 assets/ 下的雜湊檔 (batch 模式預設 file 讓行程共用；--split 也預設 file，殼頁面保持精簡)")
+    parser.add_argument("--force", action="store_true", help="忽略建置快取，全部重新計算並寫入")
+    parser.add_argument("--port", type=int, default=8000, help="watch 模式的預覽伺服器埠號")
+    parser.add_argument("--split", action="store_true",
+                        help="輸出殼頁面 + 各分頁的雜湊資料區塊 (首次切換分頁時載入)；預設為可離線分享的單一檔案")
+    parser.add_argument("--pwa", action="store_true",
+                        help="另外輸出 manifest 與 Service Worker (依建置輸出產生預先快取清單)，可安裝到主畫面並離線使用")
+    parser.add_argument("--compress", nargs="*", choices=list(COMPRESS_SUFFIXES), default=None,
+                        help="另外輸出最高壓縮等級的 .gz / .br (不指定格式時兩者皆輸出)，供伺服器直接回應")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="以 tracemalloc 回報精確的 Python 記憶體峰值 (建置會變慢；預設回報 RSS)")
+    parser.add_argument("--jobs", type=int, default=None, help="batch 模式的平行行程數 (預設為 CPU 數)")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="REPORT",
+                        help=f"記錄各階段耗時、頁面位元組組成與記憶體峰值，寫成 JSON 報告 (預設為輸出目錄的 {PROFILE_FILE})")
+    parser.add_argument("--budget", action="append", default=[], metavar="ITEM=LIMIT",
+                        help="效能預算，超出時建置失敗 (可重複，例如 page=500KB、total=3s、tab:days=200KB)；"
+                             "亦可寫在 trip.json 的 budgets")
+    args = parser.parse_args()
+    try:
+        for text in args.budget:
+            parse_budget(text)
+    except ValueError as e:
+        parser.error(str(e))
+    css_mode = args.css or ("file" if args.split else "inline")
+    compress = ()
+    if args.compress is not None:
+        compress = tuple(dict.fromkeys(args.compress or COMPRESS_SUFFIXES))
+        if "br" in compress and brotli is None:
+            print("⚠️ 未安裝 brotli，略過 .br 輸出 (pip install brotli 以啟用)")
+            compress = tuple(kind for kind in compress if kind != "br")
+    if args.trace_memory:
+        tracemalloc.start()
+    if args.command == "batch":
+        if args.profile:
+            print(f"⚠️ batch 模式的剖析報告固定寫在各行程輸出目錄的 {PROFILE_FILE}")
+        raise SystemExit(batch(args.trips or ["."], args.out or "dist", args.jobs, args.inline_max,
+                               args.css or "file", args.force, args.split, args.pwa, compress, args.trace_memory,
+                               args.profile is not None, args.budget))
+    elif args.command == "watch":
+        if args.pwa:
+            print("⚠️ watch 模式不輸出 Service Worker (避免快取蓋過即時重新整理)，已忽略 --pwa；既有的 sw.js 會改寫為解除註冊的版本")
+        watch(args.out or ".", args.inline_max, css_mode, args.port, src_dir=args.src, split=args.split)
+    else:
+        try:
+            budgets = trip_budgets(args.src, args.budget)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.profile is None and not budgets:
+            generate_html(args.out or ".", args.inline_max, css_mode, args.force, src_dir=args.src, split=args.split,
+                          pwa=args.pwa, compress=compress)
+        else:
+            with BuildProfile(budgets) as profile:
+                generate_html(args.out or ".", args.inline_max, css_mode, args.force, src_dir=args.src,
+                              split=args.split, pwa=args.pwa, compress=compress)
+            report = None if args.profile is None else args.profile or os.path.join(args.out or ".", PROFILE_FILE)
+            if finish_profile(profile, report):
+                raise SystemExit(1)
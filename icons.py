@@ -0,0 +1,126 @@
+"""
+建置時的圖示 sprite
+
+取代 unpkg 上未鎖版本的 lucide@latest 與執行期的 lucide.createIcons()：
+只把頁面實際用到的圖示輸出成 inline <symbol>，各處以 <svg><use> 參照。
+圖示路徑取自 Lucide (ISC License, https://lucide.dev)，完整圖示集鎖定版本後存於 lucide_icons.json，
+由 `python icons.py update <lucide.zip | wheel | SVG 資料夾>` 產生，請勿手動修改。
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import zipfile
+
+LUCIDE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lucide_icons.json")
+
+def load_icons(path=LUCIDE_FILE):
+    """讀取產生好的圖示集：{名稱: 24x24、stroke 樣式的 <svg> 內層}"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["icons"]
+
+try:
+    ICONS = load_icons()
+except FileNotFoundError:  # 尚未產生圖示集 (例如第一次執行 update)
+    print(f"⚠️ 找不到 {os.path.basename(LUCIDE_FILE)}，請執行 python icons.py update <lucide.zip>")
+    ICONS = {}
+
+# 舊名稱 (lucide@latest 仍接受的別名) -> 目前名稱
+ALIASES = {
+    "home": "house",
+    "check-square": "square-check-big",
+    "check-circle": "circle-check-big",
+    "train": "tram-front",
+    "alert-triangle": "triangle-alert",
+    "palmtree": "tree-palm",
+    "parking-circle": "circle-parking",
+}
+FALLBACK_ICON = "circle"
+
+SVG_ATTRS = 'fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"'
+
+_warned = set()  # 已警告過的未知圖示 (同一名稱只警告一次)
+
+def resolve_icon(name):
+    """別名轉成正式名稱；不認得的圖示以 FALLBACK_ICON 代替"""
+    name = ALIASES.get(name.strip(), name.strip())
+    if name not in ICONS:
+        if name not in _warned:
+            _warned.add(name)
+            print(f"⚠️ 找不到圖示 {name}，改用 {FALLBACK_ICON}")
+        return FALLBACK_ICON
+    return name
+
+def icon_svg(name, size=24, css_class=""):
+    """單一圖示的 <svg><use> 參照 (class 與 lucide.createIcons() 的輸出一致)"""
+    cls = f"lucide lucide-{name} {css_class}".strip()
+    return f'<svg class="{cls}" width="{size}" height="{size}" {SVG_ATTRS}><use href="#i-{name}"/></svg>'
+
+def build_sprite(names):
+    """只包含指定圖示的隱藏 sprite"""
+    symbols = "".join(f'<symbol id="i-{n}" viewBox="0 0 24 24">{ICONS[n]}</symbol>' for n in sorted(names))
+    return f'<svg xmlns="http://www.w3.org/2000/svg" style="display:none">{symbols}</svg>'
+
+LUCIDE_TAG_RE = re.compile(r'<i data-lucide="([a-z0-9-]+)"([^>]*)></i>')
+
+def replace_icon_tags(html, used):
+    """將樣板中的 <i data-lucide="..."> 換成 sprite 參照，並把圖示名稱加入 used"""
+    def repl(m):
+        name = resolve_icon(m[1])
+        used.add(name)
+        attrs = dict(re.findall(r'([a-z-]+)="([^"]*)"', m[2]))
+        return icon_svg(name, attrs.get("width", 24), attrs.get("class", ""))
+    return LUCIDE_TAG_RE.sub(repl, html)
+
+# --- 產生 lucide_icons.json ---
+def _svg_inner(svg):
+    """Lucide 原始 SVG 檔 → <svg> 內層 (去掉排版用的空白)"""
+    body = svg[svg.index(">", svg.index("<svg")) + 1:svg.rindex("</svg>")]
+    body = re.sub(r"\s+", " ", re.sub(r">\s+<", "><", body.strip()))
+    return body.replace(" />", "/>")
+
+def _read_svgs(source):
+    """由 lucide.zip、內含 lucide.zip 的 wheel (PyPI 的 lucide 套件) 或 SVG 資料夾逐一讀出 (名稱, SVG)"""
+    if isinstance(source, str) and os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.endswith(".svg"):
+                with open(os.path.join(source, name), encoding="utf-8") as f:
+                    yield name[:-4], f.read()
+        return
+    with zipfile.ZipFile(source) as z:
+        nested = [n for n in z.namelist() if n.endswith("/lucide.zip")]
+        if nested:
+            yield from _read_svgs(io.BytesIO(z.read(nested[0])))
+            return
+        for name in sorted(z.namelist()):
+            if name.endswith(".svg"):
+                yield os.path.basename(name)[:-4], z.read(name).decode("utf-8")
+
+def update_icons(source, version, path=LUCIDE_FILE):
+    """以完整的 Lucide 圖示集重新產生 lucide_icons.json (記錄版本與來源檔雜湊)；回傳圖示數"""
+    icons = {name: _svg_inner(svg) for name, svg in _read_svgs(source)}
+    if FALLBACK_ICON not in icons:
+        raise ValueError(f"{source} 不是完整的 Lucide 圖示集 (缺少 {FALLBACK_ICON})")
+    digest = hashlib.sha256()
+    if os.path.isfile(source):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+    data = {"version": version, "source": os.path.basename(os.path.normpath(source)),
+            "sha256": digest.hexdigest() if os.path.isfile(source) else None,
+            "icons": dict(sorted(icons.items()))}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=0)
+        f.write("\n")
+    return len(icons)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="管理建置時使用的 Lucide 圖示集")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update = sub.add_parser("update", help="由 Lucide 原始 SVG 重新產生 lucide_icons.json")
+    update.add_argument("source", help="lucide.zip、PyPI lucide 套件的 wheel，或 SVG 資料夾")
+    update.add_argument("--version", required=True, help="記錄在檔案中的 Lucide 版本 (例如 'lucide 1.1.4 (PyPI)')")
+    args = parser.parse_args()
+    print(f"✅ 已產生 {LUCIDE_FILE}：{update_icons(args.source, args.version)} 個圖示")
@@ -0,0 +1,198 @@
+"""
+以記憶體中預先壓縮好的頁面提供行程網站 (WSGI / ASGI)，不必每次請求都即時壓縮：
+    python serve.py --src . --port 8000                                  # 內建 wsgiref 伺服器
+    gunicorn 'serve:make_wsgi_app("trips/okinawa")'
+    uvicorn --factory 'serve:make_asgi_app'
+
+index.html 依 Accept-Encoding 回應 br / gzip / 原文，附內容雜湊的強 ETag，If-None-Match 相符時回 304；
+來源 CSV、圖片或 trip.json 改變後的下一個請求才在記憶體中重新渲染 (未變動的區段沿用建置快取)。
+"""
+import argparse
+import asyncio
+import hashlib
+import mimetypes
+import os
+import socketserver
+import threading
+import time
+import wsgiref.simple_server
+
+import generator
+
+CHECK_INTERVAL = 1.0  # 檢查來源檔案時間戳記的最短間隔 (秒)
+ENCODINGS = ("br", "gzip")  # 同樣可接受時的偏好順序
+ASSET_TYPES = {".avif": "image/avif", ".webp": "image/webp"}  # 部分 Python 版本的 mimetypes 不認得
+
+def negotiate(accept_encoding, available):
+    """依 Accept-Encoding (含 q 值) 挑出可用的壓縮格式；都不接受時回傳 "identity" """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            qualities[name] = q
+    best, best_q = "identity", 0.0
+    for encoding in ENCODINGS:
+        q = qualities.get(encoding, qualities.get("*", 0.0))
+        if encoding in available and q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 比對 (弱比較：忽略 W/ 前綴)"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+class TripSite:
+    """
+    WSGI 與 ASGI 共用的核心：respond() 回傳 (狀態, 標頭, 內容)。
+    頁面在記憶體中渲染並同時產生 br / gzip 版本；圖片輸出到 asset_dir，以 /assets/ 提供並長期快取。
+    """
+    def __init__(self, src_dir=".", inline_max=generator.INLINE_MAX_BYTES, asset_dir=None, check_interval=CHECK_INTERVAL):
+        key = hashlib.sha256(os.path.abspath(src_dir).encode("utf-8")).hexdigest()[:12]
+        self.src_dir = src_dir
+        self.inline_max = inline_max
+        self.asset_dir = asset_dir or os.path.join(generator.CACHE_DIR, "serve", f"assets-{key}")
+        self.check_interval = check_interval
+        # 與 CLI 建置分開的 manifest，避免兩邊的圖片輸出位置互相蓋掉快取
+        self.cache = generator.BuildCache(cache_dir=os.path.join(generator.CACHE_DIR, "serve"), src_dir=src_dir)
+        self.compress = ("gzip", "br") if generator.brotli is not None else ("gzip",)
+        self._lock = threading.Lock()
+        self._page, self._etags = None, {}
+        self._snapshot, self._checked = None, 0.0
+        self._assets = {}
+        self.page()
+
+    def page(self):
+        """回傳目前的 Page；來源檔案有變動時才重新渲染，失敗時繼續提供上一版"""
+        with self._lock:
+            now = time.monotonic()
+            if self._page is not None and now - self._checked < self.check_interval:
+                return self._page
+            self._checked = now
+            snapshot = generator._mtimes(generator.source_files(self.src_dir))
+            if snapshot == self._snapshot:
+                return self._page
+            try:
+                page = generator.generate_html(None, self.inline_max, "inline", cache=self.cache, src_dir=self.src_dir,
+                                               asset_dir=self.asset_dir, asset_url=generator.ASSET_DIR,
+                                               compress=self.compress, write=False)
+            except Exception as e:
+                if self._page is None:
+                    raise
+                print(f"❌ 重新渲染失敗，繼續提供上一版：{e}")
+                return self._page
+            self._snapshot = snapshot
+            # 強 ETag 必須隨編碼不同，否則快取可能把 gzip 內容當成 br 回應
+            self._page = page
+            self._etags = {encoding: f'"{page.digest[:20]}"' if encoding == "identity" else f'"{page.digest[:20]}-{encoding}"'
+                           for encoding in page.variants}
+            return page
+
+    def _asset(self, name):
+        """讀取內容雜湊命名的圖片 (檔名即版本，讀過一次就留在記憶體)"""
+        if name not in self._assets:
+            path = os.path.join(self.asset_dir, name)
+            if name != os.path.basename(name) or name.startswith(".") or not os.path.isfile(path):
+                return None
+            with open(path, "rb") as f:
+                body = f.read()
+            ext = os.path.splitext(name)[1].lower()
+            content_type = ASSET_TYPES.get(ext) or mimetypes.guess_type(name)[0] or "application/octet-stream"
+            self._assets[name] = (body, f'"{hashlib.sha256(body).hexdigest()[:20]}"', content_type)
+        return self._assets[name]
+
+    def respond(self, method, path, headers):
+        """headers 為小寫標頭名稱的 dict；回傳 (WSGI 狀態字串, [(標頭, 值)], 內容)"""
+        if method not in ("GET", "HEAD"):
+            return "405 Method Not Allowed", [("Allow", "GET, HEAD"), ("Content-Length", "0")], b""
+        if path in ("/", "/index.html"):
+            page = self.page()
+            encoding = negotiate(headers.get("accept-encoding", ""), page.variants)
+            body, etag = page.variants[encoding], self._etags[encoding]
+            response_headers = [("Content-Type", "text/html; charset=utf-8"), ("ETag", etag),
+                                ("Cache-Control", "no-cache"), ("Vary", "Accept-Encoding")]
+            if encoding != "identity":
+                response_headers.append(("Content-Encoding", encoding))
+        elif path.startswith(f"/{generator.ASSET_DIR}/"):
+            asset = self._asset(path[len(generator.ASSET_DIR) + 2:])
+            if asset is None:
+                return "404 Not Found", [("Content-Type", "text/plain; charset=utf-8"), ("Content-Length", "9")], b"Not Found"
+            body, etag, content_type = asset
+            response_headers = [("Content-Type", content_type), ("ETag", etag),
+                                ("Cache-Control", "public, max-age=31536000, immutable")]
+        else:
+            return "404 Not Found", [("Content-Type", "text/plain; charset=utf-8"), ("Content-Length", "9")], b"Not Found"
+
+        if etag_matches(headers.get("if-none-match", ""), etag):
+            return "304 Not Modified", response_headers, b""
+        response_headers.append(("Content-Length", str(len(body))))
+        return "200 OK", response_headers, b"" if method == "HEAD" else body
+
+def make_wsgi_app(src_dir=".", **options):
+    site = TripSite(src_dir, **options)
+
+    def app(environ, start_response):
+        headers = {key[5:].replace("_", "-").lower(): value for key, value in environ.items() if key.startswith("HTTP_")}
+        status, response_headers, body = site.respond(environ["REQUEST_METHOD"], environ.get("PATH_INFO") or "/", headers)
+        start_response(status, response_headers)
+        return [body]
+    app.site = site
+    return app
+
+def make_asgi_app(src_dir=".", **options):
+    site = TripSite(src_dir, **options)
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        # 重新渲染會阻塞，交給執行緒處理，不卡住事件迴圈
+        status, response_headers, body = await asyncio.get_running_loop().run_in_executor(
+            None, site.respond, scope["method"], scope["path"], headers)
+        await send({"type": "http.response.start", "status": int(status.split(" ", 1)[0]),
+                    "headers": [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in response_headers]})
+        await send({"type": "http.response.body", "body": body})
+    app.site = site
+    return app
+
+class _ThreadingWSGIServer(socketserver.ThreadingMixIn, wsgiref.simple_server.WSGIServer):
+    daemon_threads = True
+
+class _QuietHandler(wsgiref.simple_server.WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="以預先壓縮的記憶體頁面提供行程網站 (WSGI)")
+    parser.add_argument("--src", default=".", help="行程資料夾 (CSV、圖片與 trip.json 所在處)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--inline-max", type=int, default=generator.INLINE_MAX_BYTES,
+                        help="小於此位元組數的圖片直接內嵌為 Base64")
+    args = parser.parse_args()
+    app = make_wsgi_app(args.src, inline_max=args.inline_max)
+    server = wsgiref.simple_server.make_server(args.host, args.port, app, server_class=_ThreadingWSGIServer,
+                                               handler_class=_QuietHandler)
+    print(f"🌐 提供中：http://{args.host}:{args.port}/ (Ctrl+C 結束)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 結束")
@@ -0,0 +1,379 @@
+"""
+建置時的 Tailwind 編譯 (精簡版)
+
+取代瀏覽器端的 cdn.tailwindcss.com：掃描輸出的 HTML/JS 文字，
+找出所有用到的 utility class，只產生這些 class 的 CSS (含 preflight)。
+只支援本專案樣板實際用到的 utility 與變體，未知的 token 會被略過；
+class 屬性中無法編譯的 token 可用 unknown_classes() 找出並提出警告。
+"""
+import re
+
+# Tailwind v3 預設色票 (完整，含 950)
+COLORS = {
+    "slate": ["#f8fafc", "#f1f5f9", "#e2e8f0", "#cbd5e1", "#94a3b8", "#64748b", "#475569", "#334155", "#1e293b", "#0f172a", "#020617"],
+    "gray": ["#f9fafb", "#f3f4f6", "#e5e7eb", "#d1d5db", "#9ca3af", "#6b7280", "#4b5563", "#374151", "#1f2937", "#111827", "#030712"],
+    "zinc": ["#fafafa", "#f4f4f5", "#e4e4e7", "#d4d4d8", "#a1a1aa", "#71717a", "#52525b", "#3f3f46", "#27272a", "#18181b", "#09090b"],
+    "neutral": ["#fafafa", "#f5f5f5", "#e5e5e5", "#d4d4d4", "#a3a3a3", "#737373", "#525252", "#404040", "#262626", "#171717", "#0a0a0a"],
+    "stone": ["#fafaf9", "#f5f5f4", "#e7e5e4", "#d6d3d1", "#a8a29e", "#78716c", "#57534e", "#44403c", "#292524", "#1c1917", "#0c0a09"],
+    "red": ["#fef2f2", "#fee2e2", "#fecaca", "#fca5a5", "#f87171", "#ef4444", "#dc2626", "#b91c1c", "#991b1b", "#7f1d1d", "#450a0a"],
+    "orange": ["#fff7ed", "#ffedd5", "#fed7aa", "#fdba74", "#fb923c", "#f97316", "#ea580c", "#c2410c", "#9a3412", "#7c2d12", "#431407"],
+    "amber": ["#fffbeb", "#fef3c7", "#fde68a", "#fcd34d", "#fbbf24", "#f59e0b", "#d97706", "#b45309", "#92400e", "#78350f", "#451a03"],
+    "yellow": ["#fefce8", "#fef9c3", "#fef08a", "#fde047", "#facc15", "#eab308", "#ca8a04", "#a16207", "#854d0e", "#713f12", "#422006"],
+    "lime": ["#f7fee7", "#ecfccb", "#d9f99d", "#bef264", "#a3e635", "#84cc16", "#65a30d", "#4d7c0f", "#3f6212", "#365314", "#1a2e05"],
+    "green": ["#f0fdf4", "#dcfce7", "#bbf7d0", "#86efac", "#4ade80", "#22c55e", "#16a34a", "#15803d", "#166534", "#14532d", "#052e16"],
+    "emerald": ["#ecfdf5", "#d1fae5", "#a7f3d0", "#6ee7b7", "#34d399", "#10b981", "#059669", "#047857", "#065f46", "#064e3b", "#022c22"],
+    "teal": ["#f0fdfa", "#ccfbf1", "#99f6e4", "#5eead4", "#2dd4bf", "#14b8a6", "#0d9488", "#0f766e", "#115e59", "#134e4a", "#042f2e"],
+    "cyan": ["#ecfeff", "#cffafe", "#a5f3fc", "#67e8f9", "#22d3ee", "#06b6d4", "#0891b2", "#0e7490", "#155e75", "#164e63", "#083344"],
+    "sky": ["#f0f9ff", "#e0f2fe", "#bae6fd", "#7dd3fc", "#38bdf8", "#0ea5e9", "#0284c7", "#0369a1", "#075985", "#0c4a6e", "#082f49"],
+    "blue": ["#eff6ff", "#dbeafe", "#bfdbfe", "#93c5fd", "#60a5fa", "#3b82f6", "#2563eb", "#1d4ed8", "#1e40af", "#1e3a8a", "#172554"],
+    "indigo": ["#eef2ff", "#e0e7ff", "#c7d2fe", "#a5b4fc", "#818cf8", "#6366f1", "#4f46e5", "#4338ca", "#3730a3", "#312e81", "#1e1b4b"],
+    "violet": ["#f5f3ff", "#ede9fe", "#ddd6fe", "#c4b5fd", "#a78bfa", "#8b5cf6", "#7c3aed", "#6d28d9", "#5b21b6", "#4c1d95", "#2e1065"],
+    "purple": ["#faf5ff", "#f3e8ff", "#e9d5ff", "#d8b4fe", "#c084fc", "#a855f7", "#9333ea", "#7e22ce", "#6b21a8", "#581c87", "#3b0764"],
+    "fuchsia": ["#fdf4ff", "#fae8ff", "#f5d0fe", "#f0abfc", "#e879f9", "#d946ef", "#c026d3", "#a21caf", "#86198f", "#701a75", "#4a044e"],
+    "pink": ["#fdf2f8", "#fce7f3", "#fbcfe8", "#f9a8d4", "#f472b6", "#ec4899", "#db2777", "#be185d", "#9d174d", "#831843", "#500724"],
+    "rose": ["#fff1f2", "#ffe4e6", "#fecdd3", "#fda4af", "#fb7185", "#f43f5e", "#e11d48", "#be123c", "#9f1239", "#881337", "#4c0519"],
+}
+SHADES = ["50", "100", "200", "300", "400", "500", "600", "700", "800", "900", "950"]
+SPECIAL_COLORS = {"white": "#ffffff", "black": "#000000", "transparent": "transparent", "current": "currentColor"}
+
+FONT_SIZES = {
+    "xs": ("0.75rem", "1rem"), "sm": ("0.875rem", "1.25rem"), "base": ("1rem", "1.5rem"),
+    "lg": ("1.125rem", "1.75rem"), "xl": ("1.25rem", "1.75rem"), "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"), "4xl": ("2.25rem", "2.5rem"),
+}
+FONT_WEIGHTS = {"light": "300", "normal": "400", "medium": "500", "semibold": "600", "bold": "700", "extrabold": "800"}
+RADII = {"none": "0px", "sm": "0.125rem", "": "0.25rem", "md": "0.375rem", "lg": "0.5rem",
+         "xl": "0.75rem", "2xl": "1rem", "3xl": "1.5rem", "full": "9999px"}
+MAX_WIDTHS = {"xs": "20rem", "sm": "24rem", "md": "28rem", "lg": "32rem", "xl": "36rem", "2xl": "42rem",
+              "3xl": "48rem", "4xl": "56rem", "5xl": "64rem", "6xl": "72rem", "7xl": "80rem", "full": "100%", "none": "none"}
+SHADOWS = {
+    "sm": "0 1px 2px 0 rgb(0 0 0 / 0.05)",
+    "": "0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)",
+    "md": "0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)",
+    "lg": "0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)",
+    "none": "0 0 #0000",
+}
+TRANSITIONS = {
+    "": "color, background-color, border-color, text-decoration-color, fill, stroke, opacity, box-shadow, transform, filter, backdrop-filter",
+    "all": "all",
+    "colors": "color, background-color, border-color, text-decoration-color, fill, stroke",
+    "opacity": "opacity",
+    "shadow": "box-shadow",
+    "transform": "transform",
+}
+BREAKPOINTS = {"sm": "640px", "md": "768px", "lg": "1024px", "xl": "1280px"}
+MONO = 'ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, "Liberation Mono", "Courier New", monospace'
+
+PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}"
+    "html{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4;font-family:ui-sans-serif,system-ui,sans-serif}"
+    "body{margin:0;line-height:inherit}"
+    "h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}"
+    "a{color:inherit;text-decoration:inherit}"
+    "b,strong{font-weight:bolder}"
+    f"code,kbd,samp,pre{{font-family:{MONO};font-size:1em}}"
+    "table{text-indent:0;border-color:inherit;border-collapse:collapse}"
+    "button,input,optgroup,select,textarea{font-family:inherit;font-size:100%;font-weight:inherit;line-height:inherit;color:inherit;margin:0;padding:0}"
+    "button,select{text-transform:none}"
+    "button,[type=button],[type=reset],[type=submit]{-webkit-appearance:button;background-color:transparent;background-image:none}"
+    "blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}"
+    "ol,ul,menu{list-style:none;margin:0;padding:0}"
+    "input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}"
+    "button,[role=button]{cursor:pointer}"
+    "img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}"
+    "img,video{max-width:100%;height:auto}"
+    "[hidden]{display:none}"
+)
+
+# 固定對應的 utility (class -> 宣告)
+STATIC = {
+    "block": "display:block", "inline": "display:inline", "inline-block": "display:inline-block",
+    "flex": "display:flex", "inline-flex": "display:inline-flex", "grid": "display:grid", "hidden": "display:none",
+    "table": "display:table", "contents": "display:contents",
+    "table-fixed": "table-layout:fixed", "table-auto": "table-layout:auto",
+    "static": "position:static", "relative": "position:relative", "absolute": "position:absolute",
+    "fixed": "position:fixed", "sticky": "position:sticky",
+    "flex-row": "flex-direction:row", "flex-col": "flex-direction:column", "flex-wrap": "flex-wrap:wrap",
+    "flex-1": "flex:1 1 0%", "flex-auto": "flex:1 1 auto", "flex-none": "flex:none",
+    "flex-grow": "flex-grow:1", "grow": "flex-grow:1", "shrink-0": "flex-shrink:0", "flex-shrink-0": "flex-shrink:0",
+    "items-start": "align-items:flex-start", "items-center": "align-items:center", "items-end": "align-items:flex-end",
+    "items-baseline": "align-items:baseline", "items-stretch": "align-items:stretch",
+    "justify-start": "justify-content:flex-start", "justify-center": "justify-content:center",
+    "justify-end": "justify-content:flex-end", "justify-between": "justify-content:space-between",
+    "overflow-hidden": "overflow:hidden", "overflow-auto": "overflow:auto",
+    "overflow-x-auto": "overflow-x:auto", "overflow-y-auto": "overflow-y:auto",
+    "whitespace-nowrap": "white-space:nowrap", "whitespace-normal": "white-space:normal",
+    "truncate": "overflow:hidden;text-overflow:ellipsis;white-space:nowrap",
+    "break-words": "overflow-wrap:break-word", "break-all": "word-break:break-all",
+    "uppercase": "text-transform:uppercase", "lowercase": "text-transform:lowercase",
+    "text-left": "text-align:left", "text-center": "text-align:center", "text-right": "text-align:right",
+    "font-mono": f"font-family:{MONO}", "italic": "font-style:italic", "underline": "text-decoration-line:underline",
+    "tracking-tight": "letter-spacing:-0.025em", "tracking-wide": "letter-spacing:0.025em",
+    "tracking-wider": "letter-spacing:0.05em", "tracking-widest": "letter-spacing:0.1em",
+    "leading-none": "line-height:1", "leading-tight": "line-height:1.25", "leading-snug": "line-height:1.375",
+    "leading-normal": "line-height:1.5", "leading-relaxed": "line-height:1.625", "leading-loose": "line-height:2",
+    "cursor-pointer": "cursor:pointer", "pointer-events-none": "pointer-events:none", "select-none": "user-select:none",
+    "sr-only": "position:absolute;width:1px;height:1px;padding:0;margin:-1px;overflow:hidden;clip:rect(0, 0, 0, 0);white-space:nowrap;border-width:0",
+    "backdrop-blur-sm": "-webkit-backdrop-filter:blur(4px);backdrop-filter:blur(4px)",
+    "backdrop-blur": "-webkit-backdrop-filter:blur(8px);backdrop-filter:blur(8px)",
+    "backdrop-blur-md": "-webkit-backdrop-filter:blur(12px);backdrop-filter:blur(12px)",
+    "object-cover": "object-fit:cover", "object-contain": "object-fit:contain",
+    "list-disc": "list-style-type:disc", "outline-none": "outline:2px solid transparent;outline-offset:2px",
+}
+
+# 間距刻度 (n * 0.25rem)，另支援 px / auto / full / 分數 / 任意值 [..]
+def _spacing(value, allow_auto=False):
+    if value == "px":
+        return "1px"
+    if value == "0":
+        return "0px"
+    if value == "auto" and allow_auto:
+        return "auto"
+    if value == "full":
+        return "100%"
+    if value == "screen":
+        return "100vh"
+    if value.startswith("[") and value.endswith("]"):
+        return value[1:-1].replace("_", " ")
+    if re.fullmatch(r"\d+/\d+", value):
+        a, b = value.split("/")
+        return f"{int(a) / int(b) * 100:.6f}".rstrip("0").rstrip(".") + "%"
+    if re.fullmatch(r"\d+(\.5)?", value):
+        return f"{float(value) * 0.25:g}rem"
+    return None
+
+def _color(value):
+    """'blue-500' / 'white' / 'slate-50/95' / '[#f8fafc]' -> CSS 顏色"""
+    alpha = None
+    if "/" in value and not value.startswith("["):
+        value, alpha = value.split("/", 1)
+        if not alpha.isdigit():
+            return None
+    if value.startswith("[") and value.endswith("]"):
+        hex_value = value[1:-1]
+        if not re.fullmatch(r"#[0-9a-fA-F]{3,8}", hex_value):
+            return None
+    elif value in SPECIAL_COLORS:
+        hex_value = SPECIAL_COLORS[value]
+    else:
+        name, _, shade = value.rpartition("-")
+        if name not in COLORS or shade not in SHADES:
+            return None
+        hex_value = COLORS[name][SHADES.index(shade)]
+    if alpha is None or not hex_value.startswith("#"):
+        return hex_value
+    h = hex_value.lstrip("#")
+    if len(h) == 3:
+        h = "".join(c * 2 for c in h)
+    r, g, b = (int(h[i:i + 2], 16) for i in (0, 2, 4))
+    return f"rgb({r} {g} {b} / {int(alpha) / 100:g})"
+
+def _is_length(value):
+    return bool(re.fullmatch(r"-?[\d.]+(px|rem|em|vh|vw|%)", value))
+
+SIDES = {"": ("",), "x": ("-left", "-right"), "y": ("-top", "-bottom"),
+         "t": ("-top",), "r": ("-right",), "b": ("-bottom",), "l": ("-left",)}
+
+def _box(prop, sides, value, negative=False):
+    v = _spacing(value, allow_auto=(prop == "margin"))
+    if v is None:
+        return None
+    if negative:
+        v = f"-{v}" if v not in ("0px", "auto") else v
+    return ";".join(f"{prop}{s}:{v}" for s in SIDES[sides])
+
+# (順序群組, 正則, 產生宣告) — 順序群組決定輸出順序，簡寫排在單邊之前
+RULES = [
+    (10, r"(-?)m([xytrbl]?)-(.+)", lambda m: _box("margin", m[2], m[3], bool(m[1]))),
+    (20, r"(min-w|max-w|min-h|max-h|w|h)-(.+)", lambda m: _size(m[1], m[2])),
+    (25, r"(-?)(top|bottom|left|right|inset)-(.+)", lambda m: _inset(m[2], m[3], bool(m[1]))),
+    (26, r"z-(\d+|auto)", lambda m: f"z-index:{m[1]}"),
+    (30, r"grid-cols-(\d+)", lambda m: f"grid-template-columns:repeat({m[1]}, minmax(0, 1fr))"),
+    (31, r"col-span-(\d+)", lambda m: f"grid-column:span {m[1]} / span {m[1]}"),
+    (32, r"gap-([xy]?)-?(.+)", lambda m: _gap(m[1], m[2])),
+    (40, r"rounded(?:-([trbl]))?(?:-(.+))?", lambda m: _rounded(m[1], m[2])),
+    (41, r"border(?:-([xytrbl]))?(?:-(\d+))?", lambda m: _border_width(m[1], m[2])),
+    (42, r"border-(.+)", lambda m: _decl("border-color", _color(m[1]))),
+    (50, r"bg-(.+)", lambda m: _decl("background-color", _color(m[1]))),
+    (55, r"accent-(.+)", lambda m: _decl("accent-color", _color(m[1]))),
+    (60, r"p([xytrbl]?)-(.+)", lambda m: _box("padding", m[1], m[2])),
+    (70, r"text-(.+)", lambda m: _text(m[1])),
+    (71, r"font-(.+)", lambda m: _decl("font-weight", FONT_WEIGHTS.get(m[1]))),
+    (80, r"opacity-(\d+)", lambda m: f"opacity:{int(m[1]) / 100:g}"),
+    (81, r"shadow(?:-(.+))?", lambda m: _shadow(m[1] or "")),
+    (82, r"ring(?:-(\d+))?", lambda m: "--tw-ring-shadow:0 0 0 {}px var(--tw-ring-color, rgb(59 130 246 / 0.5));box-shadow:var(--tw-ring-shadow), var(--tw-shadow, 0 0 #0000)".format(m[1] or 3)),
+    (83, r"ring-(.+)", lambda m: _decl("--tw-ring-color", _color(m[1]))),
+    (90, r"transition(?:-(.+))?", lambda m: _transition(m[1] or "")),
+    (91, r"duration-(\d+)", lambda m: f"transition-duration:{m[1]}ms"),
+    (95, r"scroll-mt-(.+)", lambda m: _decl("scroll-margin-top", _spacing(m[1]))),
+    (96, r"line-clamp-(\d+)", lambda m: f"overflow:hidden;display:-webkit-box;-webkit-box-orient:vertical;-webkit-line-clamp:{m[1]}"),
+]
+
+def _decl(prop, value):
+    return f"{prop}:{value}" if value else None
+
+def _size(kind, value):
+    prop = {"w": "width", "h": "height", "min-w": "min-width", "max-w": "max-width",
+            "min-h": "min-height", "max-h": "max-height"}[kind]
+    if kind == "max-w" and value in MAX_WIDTHS:
+        return f"{prop}:{MAX_WIDTHS[value]}"
+    v = _spacing(value, allow_auto=True)
+    if value == "screen" and kind in ("w", "min-w", "max-w"):
+        v = "100vw"
+    return _decl(prop, v)
+
+def _inset(side, value, negative):
+    v = _spacing(value, allow_auto=True)
+    if v is None:
+        return None
+    if negative:
+        v = f"-{v}"
+    if side == "inset":
+        return f"inset:{v}"
+    return f"{side}:{v}"
+
+def _gap(axis, value):
+    v = _spacing(value)
+    prop = {"": "gap", "x": "column-gap", "y": "row-gap"}[axis]
+    return _decl(prop, v)
+
+def _rounded(side, size):
+    if side is None and size in ("t", "r", "b", "l"):
+        side, size = size, None
+    radius = RADII.get(size or "")
+    if radius is None:
+        return None
+    corners = {None: ("border-radius",),
+               "t": ("border-top-left-radius", "border-top-right-radius"),
+               "r": ("border-top-right-radius", "border-bottom-right-radius"),
+               "b": ("border-bottom-right-radius", "border-bottom-left-radius"),
+               "l": ("border-top-left-radius", "border-bottom-left-radius")}[side]
+    return ";".join(f"{c}:{radius}" for c in corners)
+
+def _border_width(side, width):
+    w = f"{width}px" if width is not None else "1px"
+    return ";".join(f"border{s}-width:{w}" for s in SIDES[side or ""])
+
+def _text(value):
+    if value in FONT_SIZES:
+        size, line_height = FONT_SIZES[value]
+        return f"font-size:{size};line-height:{line_height}"
+    if value.startswith("[") and _is_length(value[1:-1]):
+        return f"font-size:{value[1:-1]}"
+    return _decl("color", _color(value))
+
+def _shadow(size):
+    if size not in SHADOWS:
+        return None
+    return (f"--tw-shadow:{SHADOWS[size]};"
+            "box-shadow:var(--tw-ring-shadow, 0 0 #0000), var(--tw-shadow)")
+
+def _transition(kind):
+    if kind not in TRANSITIONS:
+        return None
+    return (f"transition-property:{TRANSITIONS[kind]};"
+            "transition-timing-function:cubic-bezier(0.4, 0, 0.2, 1);transition-duration:150ms")
+
+COMPILED_RULES = [(order, re.compile(pattern), fn) for order, pattern, fn in RULES]
+
+def _compile_utility(name):
+    """回傳 (順序, 選擇器後綴, 宣告)；不認得時回傳 None"""
+    if name in STATIC:
+        return 5, "", STATIC[name]
+    m = re.fullmatch(r"space-([xy])-(.+)", name)
+    if m:
+        v = _spacing(m[2])
+        if v is None:
+            return None
+        prop = "margin-top" if m[1] == "y" else "margin-left"
+        return 11, " > :not([hidden]) ~ :not([hidden])", f"{prop}:{v}"
+    for order, pattern, fn in COMPILED_RULES:
+        m = pattern.fullmatch(name)
+        if m:
+            decl = fn(m)
+            if decl:
+                return order, "", decl
+    return None
+
+VARIANTS = {
+    "first": lambda sel: f"{sel}:first-child",
+    "last": lambda sel: f"{sel}:last-child",
+    "odd": lambda sel: f"{sel}:nth-child(odd)",
+    "even": lambda sel: f"{sel}:nth-child(even)",
+    "focus-within": lambda sel: f"{sel}:focus-within",
+    "hover": lambda sel: f"{sel}:hover",
+    "focus": lambda sel: f"{sel}:focus",
+    "focus-visible": lambda sel: f"{sel}:focus-visible",
+    "active": lambda sel: f"{sel}:active",
+    "disabled": lambda sel: f"{sel}:disabled",
+    "group-hover": lambda sel: f".group:hover {sel}",
+    "group-focus": lambda sel: f".group:focus {sel}",
+    "peer-checked": lambda sel: f".peer:checked ~ {sel}",
+    "peer-focus": lambda sel: f".peer:focus ~ {sel}",
+}
+VARIANT_ORDER = [""] + list(VARIANTS)  # 與 Tailwind 相同：後面的變體優先
+# 只作為 group-* / peer-* 變體的標記，本身不產生 CSS
+MARKER_CLASSES = {"group", "peer"}
+
+def _escape(cls):
+    return re.sub(r"([^a-zA-Z0-9_-])", r"\\\1", cls)
+
+def compile_class(cls):
+    """單一 class -> (排序鍵, media 斷點, CSS 規則)；非 utility 回傳 None"""
+    parts = cls.split(":")
+    utility = parts[-1]
+    variants = parts[:-1]
+    screen = None
+    pseudo = []
+    for v in variants:
+        if v in BREAKPOINTS and screen is None:
+            screen = v
+        elif v in VARIANTS:
+            pseudo.append(v)
+        else:
+            return None
+    compiled = _compile_utility(utility)
+    if compiled is None:
+        return None
+    order, suffix, decl = compiled
+    selector = "." + _escape(cls)
+    for v in pseudo:
+        selector = VARIANTS[v](selector)
+    variant_rank = max((VARIANT_ORDER.index(v) for v in pseudo), default=0)
+    return (variant_rank, order, cls), screen, f"{selector}{suffix}{{{decl}}}"
+
+CANDIDATE_RE = re.compile(r"[^\s\"'`<>=${}()]+")
+
+def extract_candidates(text):
+    """仿 Tailwind content 掃描：取出所有可能是 class 的 token (含 JS 字串內的)"""
+    return set(CANDIDATE_RE.findall(text))
+
+def build_css(text, extra_css=""):
+    """掃描文字並回傳壓縮後的 CSS (preflight + 用到的 utilities + 自訂樣式)"""
+    rules = {None: [], **{bp: [] for bp in BREAKPOINTS}}
+    for cls in extract_candidates(text):
+        compiled = compile_class(cls)
+        if compiled:
+            key, screen, rule = compiled
+            rules[screen].append((key, rule))
+    out = [PREFLIGHT, minify_css(extra_css)]
+    out += [rule for _, rule in sorted(rules[None])]
+    for bp, width in BREAKPOINTS.items():
+        if rules[bp]:
+            out.append(f"@media (min-width:{width}){{" + "".join(rule for _, rule in sorted(rules[bp])) + "}")
+    return "".join(out)
+
+def unknown_classes(classes, extra_css=""):
+    """
+    class 屬性中既無法編譯、也沒有出現在自訂樣式 (extra_css 的 .選擇器) 的 token，
+    多半是拼錯或編譯器尚未支援的 utility，會在頁面上毫無樣式；回傳排序後的清單供建置時警告。
+    """
+    custom = set(re.findall(r"\.([a-zA-Z_][\w-]*)", extra_css))
+    return sorted(cls for cls in classes
+                  if cls not in MARKER_CLASSES and cls not in custom and compile_class(cls) is None)
+
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 專案是平鋪在根目錄的模組 (generator、serve…)，讓測試不論從哪裡執行都能匯入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,35 @@
+"""generator 的資料處理與建置設定：餐廳排程紀錄、效能預算"""
+import pytest
+
+import generator
+from generator import Event, Food
+
+def test_meal_plan_b_is_per_event():
+    food = [Food("A 食堂", 0, "a", "", "A 食堂", "s1"), Food("B 牛排", 0, "b", "", "B", "s2"),
+            Food("C 拉麵", 0, "c", "", "C", "s2")]
+    events = [Event(0, "12:00", "utensils", "food", "午餐", "", "", "便利商店", "s1"),
+              Event(1, "12:00", "utensils", "food", "午餐", "", "", "", "s1"),       # 同一時段的第二個事件，沒有備案
+              Event(1, "18:00", "utensils", "food", "晚餐", "", "", "居酒屋", "s2")]
+    meals = generator.build_meal_slots({"events": events, "food": food, "slots": {"s1": [0], "s2": [1, 2]}})
+
+    # 只有一個候選時備案為各事件自己的備案
+    assert [generator.meal_record(food, meals["s1"], 0, j)[2] for j in (0, 1)] == ["便利商店", ""]
+    # 有其他候選時備案為其餘候選
+    assert generator.meal_record(food, meals["s2"], 0, 2) == ("B 牛排", "b", "C 拉麵", generator.map_url("B"))
+    assert generator.meal_record(food, meals["s2"], 1, 2)[2] == "B 牛排"
+
+@pytest.mark.parametrize("text, expected", [
+    ("page=500KB", ("page", "bytes", 500 * 1024)),
+    ("total=3s", ("total", "seconds", 3.0)),
+    ("render:days=300ms", ("render:days", "seconds", 0.3)),
+    (" css = 1.5 mb ", ("css", "bytes", 1.5 * 1024 ** 2)),
+    ("tab:days=20000B", ("tab:days", "bytes", 20000)),
+])
+def test_parse_budget(text, expected):
+    key, kind, limit = generator.parse_budget(text)
+    assert (key, kind) == expected[:2] and limit == pytest.approx(expected[2])
+
+@pytest.mark.parametrize("text", ["page", "page=", "=3s", "page=3", "page=3 parsecs", "page=-1KB", "page=KB"])
+def test_parse_budget_rejects(text):
+    with pytest.raises(ValueError):
+        generator.parse_budget(text)
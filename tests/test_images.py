@@ -0,0 +1,45 @@
+"""generator.build_image：備用圖格式依實際內容判定，不比原檔小的版本不輸出"""
+import os
+import random
+
+import pytest
+
+import generator
+
+Image = pytest.importorskip("PIL.Image")
+
+def _photo(path, quality, size=(1000, 500)):
+    """寫出有雜訊的 JPEG (不論副檔名)，回傳檔案大小"""
+    rng = random.Random(0)
+    img = Image.new("RGB", size)
+    img.putdata([(x * 255 // size[0], rng.randrange(256), y * 255 // size[1])
+                 for y in range(size[1]) for x in range(size[0])])
+    img.save(path, "JPEG", quality=quality)
+    return os.path.getsize(path)
+
+def _outputs(asset_dir, asset):
+    return {url: os.path.getsize(os.path.join(asset_dir, url.rsplit("/", 1)[-1])) for url in generator._asset_urls(asset)}
+
+def test_jpeg_data_in_png_file(tmp_path):
+    src = tmp_path / "timetable.png"
+    source_size = _photo(src, 95)
+    asset_dir = str(tmp_path / "assets")
+    asset = generator.build_image(str(src), asset_dir, inline_max=0, cache_dir=str(tmp_path / "cache"))
+
+    # 內容是 JPEG，備用圖就應該是 JPEG，不會被重新編碼成 PNG
+    assert asset["src"].endswith(".jpg")
+    assert all(not url.endswith(".png") for url in _outputs(asset_dir, asset))
+    assert all(size < source_size for size in _outputs(asset_dir, asset).values())
+
+def test_variants_never_larger_than_source(tmp_path):
+    # 高壓縮率的原檔：以預設品質重新編碼反而更大，備用圖改用原檔
+    src = tmp_path / "small.jpg"
+    source_size = _photo(src, 5)
+    asset_dir = str(tmp_path / "assets")
+    asset = generator.build_image(str(src), asset_dir, inline_max=0, cache_dir=str(tmp_path / "cache"))
+
+    outputs = _outputs(asset_dir, asset)
+    with open(os.path.join(asset_dir, asset["src"].rsplit("/", 1)[-1]), "rb") as f:
+        assert f.read() == src.read_bytes()
+    assert asset["srcset"].endswith(" 1000w")
+    assert all(size < source_size for url, size in outputs.items() if url != asset["src"])
@@ -0,0 +1,82 @@
+"""頁面內 JS 的查詢切詞必須與建置時的 search_terms 一致，否則查得到的字在索引裡卻永遠比對不到"""
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import generator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NODE = shutil.which("node")
+
+SAMPLES = [
+    "美麗海水族館",                    # 中文 bigram
+    "海",                              # 單一中日文字 (以字 → 詞對照查詢)
+    "ひらがな カタカナ",               # 平假名、片假名
+    "ｶﾀｶﾅ ｿﾌﾄｸﾘｰﾑ",                  # 半形片假名 (NFKC 轉成全形)
+    "ＡＢＣ１２３　Ｃａｆｅ",          # 全形英數字與全形空白
+    "Blue Seal 冰淇淋 ブルーシール",   # 中英日混合
+    "Okinawa Churaumi Aquarium 2026",  # 超過前綴上限的英文字
+    "Café A&W ステーキ88 國際通り",    # 重音字母、符號、英數與假名相連
+    "한국어 안내",                     # 韓文
+    "",
+    "!!! ---",                         # 沒有任何索引詞
+]
+
+# 在 node 中執行頁面裡的搜尋程式：postings / charPostings 換成記錄查詢的詞，SEARCH_INDEX 由 merge_search_index 建好傳入
+HARNESS = r"""
+const vm = require('vm');
+const {code, index, samples} = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const context = {SEARCH_INDEX: index};
+vm.createContext(context);
+vm.runInContext(code, context);
+const results = samples.map(text => {
+    const docs = context.searchDocs(text);
+    // 單一中日文字會合併所有含該字的 bigram，記錄該字本身即可
+    const asked = [], postings = context.postings, charPostings = context.charPostings;
+    let inChar = false;
+    context.postings = term => { if (!inChar) asked.push(term); return postings(term); };
+    context.charPostings = ch => { asked.push(ch); inChar = true; try { return charPostings(ch); } finally { inChar = false; } };
+    context.searchDocs(text);
+    Object.assign(context, {postings, charPostings});
+    return {docs, asked};
+});
+process.stdout.write(JSON.stringify(results));
+"""
+
+@pytest.fixture(scope="module")
+def search_script(tmp_path_factory):
+    """從實際渲染的頁面擷取搜尋程式 (SEARCH_TOKEN_RE 到 searchDocs)"""
+    tmp = tmp_path_factory.mktemp("page")
+    cache = generator.BuildCache(cache_dir=str(tmp / "cache"), src_dir=ROOT)
+    page = generator.generate_html(None, cache=cache, src_dir=ROOT, asset_dir=str(tmp / "assets"), write=False)
+    html = page.variants["identity"].decode("utf-8")
+    start = html.index("const SEARCH_TOKEN_RE")
+    end = html.index("const searchInput")
+    return html[start:end]
+
+@pytest.mark.skipif(NODE is None, reason="需要 node 才能執行頁面內的 JS")
+def test_js_query_terms_match_search_terms(search_script):
+    # 每個範例各是一筆文件，以自己為查詢時必須找回自己
+    store_docs = [generator.search_terms(text) for text in SAMPLES]
+
+    # 以實際的 search_partial 切詞 (購物來源：標題即範例文字)，分成兩個來源再經 merge_search_index 合併 (含文件編號位移與差值編碼)
+    half = len(SAMPLES) // 2
+    partials = [generator.search_partial({"shopping": [(text, "", []) for text in texts]}, "shopping")
+                for texts in (SAMPLES[:half], SAMPLES[half:])]
+    index = generator.merge_search_index(partials)
+    assert [doc[2] for doc in index["docs"]] == SAMPLES
+
+    payload = json.dumps({"code": search_script, "index": index, "samples": SAMPLES})
+    proc = subprocess.run([NODE, "-e", HARNESS], input=payload, capture_output=True, text=True, encoding="utf-8", check=True)
+    results = json.loads(proc.stdout)
+
+    for doc, (text, expected, result) in enumerate(zip(SAMPLES, store_docs, results)):
+        # 瀏覽器查詢的詞都必須是建置時會產生的索引詞
+        assert set(result["asked"]) <= expected, text
+        if expected:
+            assert doc in (result["docs"] or []), text
+        else:
+            assert result["docs"] is None, text
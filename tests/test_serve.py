@@ -0,0 +1,68 @@
+"""serve.py 的內容協商、ETag 比對與 304 回應"""
+import os
+
+import pytest
+
+import generator
+import serve
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.mark.parametrize("accept, available, expected", [
+    ("gzip, br", {"identity", "gzip", "br"}, "br"),                  # 同樣可接受時偏好 br
+    ("gzip;q=1.0, br;q=0.5", {"identity", "gzip", "br"}, "gzip"),    # q 值優先於偏好順序
+    ("br", {"identity", "gzip"}, "identity"),                        # 沒有 br 版本
+    ("*", {"identity", "gzip", "br"}, "br"),                         # 萬用字元
+    ("*;q=0.3, br;q=0", {"identity", "gzip", "br"}, "gzip"),         # q=0 表示拒絕，其餘依 *
+    ("gzip;q=0, br;q=0", {"identity", "gzip", "br"}, "identity"),
+    ("GZIP ; Q=0.8", {"identity", "gzip"}, "gzip"),                  # 名稱不分大小寫
+    ("gzip;q=abc", {"identity", "gzip"}, "identity"),                # 無效 q 值視為 0
+    ("", {"identity", "gzip", "br"}, "identity"),
+])
+def test_negotiate(accept, available, expected):
+    assert serve.negotiate(accept, available) == expected
+
+@pytest.mark.parametrize("header, expected", [
+    ('"abc"', True),
+    ('W/"abc"', True),                 # 弱比較忽略 W/
+    ('"xyz", W/"abc"', True),          # 清單中任一相符
+    (' "xyz" ,"abc" ', True),
+    ("*", True),
+    ('"abc-gzip"', False),
+    ('"xyz"', False),
+    ("", False),
+])
+def test_etag_matches(header, expected):
+    assert serve.etag_matches(header, '"abc"') is expected
+
+@pytest.fixture(scope="module")
+def site(tmp_path_factory):
+    cache_dir = str(tmp_path_factory.mktemp("cache"))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(generator, "CACHE_DIR", cache_dir)
+        yield serve.TripSite(ROOT, check_interval=3600)
+
+def test_304_when_etag_matches(site):
+    status, headers, body = site.respond("GET", "/", {"accept-encoding": "gzip"})
+    headers = dict(headers)
+    assert status == "200 OK" and headers["Content-Encoding"] == "gzip"
+    assert headers["Content-Length"] == str(len(body)) and body
+
+    status, headers_304, body = site.respond("GET", "/", {"accept-encoding": "gzip", "if-none-match": headers["ETag"]})
+    assert status == "304 Not Modified" and body == b""
+    assert dict(headers_304)["ETag"] == headers["ETag"]
+
+def test_etag_differs_per_encoding(site):
+    _, gzip_headers, _ = site.respond("GET", "/", {"accept-encoding": "gzip"})
+    gzip_etag = dict(gzip_headers)["ETag"]
+    # 原文版本不能用 gzip 版的 ETag 命中 304
+    status, headers, body = site.respond("GET", "/index.html", {"if-none-match": gzip_etag})
+    assert status == "200 OK" and "Content-Encoding" not in dict(headers)
+    assert body.lstrip().lower().startswith(b"<!doctype html>")
+
+def test_head_and_errors(site):
+    status, headers, body = site.respond("HEAD", "/", {})
+    assert status == "200 OK" and body == b"" and int(dict(headers)["Content-Length"]) > 0
+    assert site.respond("POST", "/", {})[0] == "405 Method Not Allowed"
+    assert site.respond("GET", "/missing", {})[0] == "404 Not Found"
+    assert site.respond("GET", f"/{generator.ASSET_DIR}/../generator.py", {})[0] == "404 Not Found"